@@ -6,15 +6,70 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
-
-# Create directories if they don't exist
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+# No directories are created here: importing settings has no side effects,
+# writers create what they need.
 
 # Data Sources
 NSE_EQUITY_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
 BSE_EQ_API_URL = "https://api.bseindia.com/BseIndiaAPI/api/ListofScripData/w?Group=&Scripcode=&industry=&segment=Equity&status=Active"
 
+# Historical Store
+# 'partitioned' keeps the whole universe in a few files (exchange/year),
+# 'per_file' is the legacy one-parquet-per-symbol layout,
+# 'auto' picks whichever already holds data (partitioned for fresh installs).
+HISTORY_STORE_BACKEND = os.environ.get("HISTORY_STORE_BACKEND", "auto")
+HISTORY_STORE_FLUSH_SYMBOLS = 500 # Buffered symbols before partitions are rewritten
+HISTORY_STORE_ROW_GROUP_ROWS = 10000 # Small row groups keep per-symbol pushdown selective
+HISTORY_COMPACT_MIN_SEGMENTS = 5 # Fold appended deltas once reads merge this many segments
+HISTORY_COMPACT_INTERVAL = 6 * 60 * 60 # Background compaction cadence (seconds)
+HISTORY_BATCH_SIZE = 50 # Tickers per multi-ticker download request
+HISTORY_CACHE_SYMBOLS = 256 # Symbols whose chart history the API keeps in memory
+HISTORY_BATCH_MAX_SYMBOLS = int(os.environ.get("HISTORY_BATCH_MAX_SYMBOLS", "100")) # Cap per batch /history request
+
+# Async ingestion (HistoricalDataService.update_all_async)
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+HISTORY_ASYNC_RATE_PER_HOST = 8.0 # Requests/second per host (token bucket)
+HISTORY_ASYNC_BURST = 16
+HISTORY_ASYNC_FETCH_CONCURRENCY = 16
+HISTORY_ASYNC_NORMALIZE_CONCURRENCY = 4
+HISTORY_ASYNC_PERSIST_CONCURRENCY = 2
+HISTORY_ASYNC_QUEUE_SIZE = 200
+
+# Breakout Scan
+SCAN_ENGINE = os.environ.get("SCAN_ENGINE", "threads") # 'threads' | 'processes' | 'vectorized' | 'incremental'
+BREAKOUT_STATE_PATH = DATA_DIR / "cache" / "breakout_state.pkl" # Per-symbol window state (incremental engine)
+SCAN_DIRTY_ONLY = os.environ.get("SCAN_DIRTY_ONLY", "1") == "1" # Recompute only symbols whose history changed
+SCAN_RESULTS_PATH = DATA_DIR / "cache" / "scan_results.pkl" # Previous scan's breakouts per symbol fingerprint
+
+SCAN_INTERVAL_OPEN = int(os.environ.get("SCAN_INTERVAL_OPEN", "120")) # Seconds between scans while the market is open
+SCAN_IDLE_CHECK_INTERVAL = 300 # Seconds between new-data checks while closed
+SCAN_RETRY_BACKOFF = 30 # Seconds before retrying after a failed scan or planning error; doubles per failure up to SCAN_IDLE_CHECK_INTERVAL
+SCAN_DIFF_LOG_SIZE = 500 # Scan diffs kept for reconnecting WebSocket clients
+SCAN_WATCH_INTERVAL = 5 # Seconds between checks for a new scan result
+BACKGROUND_START_DELAY = float(os.environ.get("BACKGROUND_START_DELAY", "2")) # Seconds after API startup before scans/scan watching begin
+SCAN_LOG_DIR = DATA_DIR / "scan_log" # Append-only history of every scan (date/scan-time partitions)
+SCAN_LOG_RETENTION_DAYS = int(os.environ.get("SCAN_LOG_RETENTION_DAYS", "90")) # 0 keeps everything
+DISMISSED_SNAPSHOT_EVERY = 500 # Journal events between dismissed.json snapshots
+
+# Background Jobs (pipeline phases run in-process from the API)
+JOB_PHASE_LIMITS = {"universe": 1, "history": 1, "scan": 1} # Concurrent jobs per phase; more wait queued
+JOB_HISTORY_SIZE = 100 # Finished jobs kept (and persisted) for the dashboard
+JOB_HISTORY_PATH = PROCESSED_DIR / "jobs.json"
+
+# Signal Backfill (breakouts for every historical trading day)
+SIGNALS_DIR = DATA_DIR / "signals"
+SIGNAL_BACKFILL_CHUNK = 250 # Symbols per worker task
+
+# Live Intraday Triggers
+# Tick feed for the live monitor: 'file:<path>[@speed]' (recorded replay) or 'tcp:<host>:<port>'.
+# Empty disables live mode.
+LIVE_TICK_SOURCE = os.environ.get("LIVE_TICK_SOURCE", "")
+
+# Trading Calendar (shared session index)
+SESSION_INDEX_CALENDAR = 'XBOM' # XBOM follows the same holidays as NSE
+SESSION_INDEX_YEARS_BACK = 6 # Covers the 5y history horizon
+SESSION_INDEX_DAYS_AHEAD = 60
+
 # Network Settings
 DEFAULT_TIMEOUT = 30
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -5,38 +5,68 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent
 sys.path.append(str(BASE_DIR))
 
-from src.universe.builder import build_universe
-from src.historical.service import HistoricalDataService
-from src.analytics.service import BreakoutService
+# Services are imported inside each phase, so a run only loads what it uses
+# (a scan with history on disk never imports yfinance; --help loads no pandas).
 
 def run_phase1():
     print("--- Phase 1: Market Universe Builder ---")
+    from src.universe.builder import build_universe
     if build_universe():
         print("Phase 1 Complete.")
     else:
         print("Phase 1 Failed.")
         sys.exit(1)
 
-def run_phase2():
+def run_phase2(ingest: str = "batch"):
     print("\n--- Phase 2: Historical Data Engine ---")
+    from src.historical.service import HistoricalDataService
     svc = HistoricalDataService()
-    svc.update_all(max_workers=20)
+    if ingest == "async":
+        svc.update_all_async()
+    else:
+        svc.update_all(max_workers=20, batch=(ingest == "batch"))
     print("Phase 2 Complete.")
 
-def run_phase3():
+def run_compaction():
+    print("\n--- History Store Compaction ---")
+    from src.historical.service import HistoricalDataService
+    svc = HistoricalDataService()
+    svc.compact()
+
+def run_phase3(engine: str = None, full: bool = False):
     print("\n--- Phase 3: Breakout Detection Engine ---")
+    from src.analytics.service import BreakoutService
     svc = BreakoutService()
-    df = svc.scan_universe(max_workers=20)
+    df = svc.scan_universe(max_workers=20, engine=engine, full=full)
     print("Phase 3 Complete.")
     if not df.empty:
          print("\nTop 5 Breakouts:")
          print(df[['symbol', 'breakout_type', 'breakout_pct', 'volume_confirmation']].head().to_string())
 
+def run_backfill(start: str = None, end: str = None, workers: int = None, force: bool = False):
+    print("\n--- Signal Backfill (every trading day) ---")
+    from datetime import date
+    from src.analytics.backfill import SignalBackfill
+    backfill = SignalBackfill()
+    backfill.run(
+        start=date.fromisoformat(start) if start else None,
+        end=date.fromisoformat(end) if end else None,
+        max_workers=workers,
+        force=force
+    )
+
 import argparse
 
 def main():
     parser = argparse.ArgumentParser(description="Market Analytics System CLI")
-    parser.add_argument("--mode", type=str, choices=['universe', 'history', 'scan', 'all'], default='all', help="Execution mode")
+    parser.add_argument("--mode", type=str, choices=['universe', 'history', 'scan', 'compact', 'backfill', 'all'], default='all', help="Execution mode")
+    parser.add_argument("--ingest", type=str, choices=['batch', 'threads', 'async'], default='batch', help="History download strategy")
+    parser.add_argument("--engine", type=str, choices=['threads', 'processes', 'vectorized', 'incremental'], default=None, help="Breakout scan engine (default: SCAN_ENGINE setting)")
+    parser.add_argument("--from", dest="from_date", type=str, default=None, help="Backfill start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", type=str, default=None, help="Backfill end date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Backfill worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Recompute backfill days that are already done")
+    parser.add_argument("--full", action="store_true", help="Scan every symbol, not just those whose history changed")
     args = parser.parse_args()
     
     print(f"Initializing Market Analytics System (Mode: {args.mode})...")
@@ -55,10 +85,16 @@ def main():
                  run_phase1()
 
     if args.mode in ['history', 'all']:
-        run_phase2()
+        run_phase2(args.ingest)
+        
+    if args.mode == 'compact':
+        run_compaction()
+        
+    if args.mode == 'backfill':
+        run_backfill(args.from_date, args.to_date, args.workers, args.force)
         
     if args.mode in ['scan', 'all']:
-        run_phase3()
+        run_phase3(args.engine, args.full)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+"""
+Offline check and benchmark for HistoricalDataFetcher batching.
+
+Stand-in clients expose the two yfinance entry points the fetcher uses
+(Ticker().history() and download()), so batching, splitting and the
+per-symbol fallback run without touching the network:
+
+    # Synthetic responses with simulated round-trip latency
+    python scripts/bench_fetch_batch.py --symbols 300 --latency 0.05
+
+    # Record real responses once, then replay them offline
+    python scripts/bench_fetch_batch.py --record data/fixtures/yf --symbols 20
+    python scripts/bench_fetch_batch.py --fixture data/fixtures/yf --symbols 20
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from src.historical.fetcher import HistoricalDataFetcher
+
+
+def _synthetic_ohlcv(ticker: str, start=None, period: str = "5y") -> pd.DataFrame:
+    seed = int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed)
+    years = int(period[:-1]) if period and period.endswith("y") else 1
+    end = pd.Timestamp.today().normalize()
+    begin = pd.Timestamp(start) if start is not None else end - pd.DateOffset(years=years)
+    dates = pd.bdate_range(begin, end, name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.005, len(dates))),
+        "High": close * (1 + rng.uniform(0, 0.02, len(dates))),
+        "Low": close * (1 - rng.uniform(0, 0.02, len(dates))),
+        "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, len(dates)),
+    }, index=dates)
+
+
+class SyntheticClient:
+    """Generates deterministic OHLCV per ticker and sleeps `latency` per HTTP round trip."""
+
+    def __init__(self, latency: float = 0.05, failing: set = None):
+        self.latency = latency
+        self.failing = failing or set()
+        self.requests = 0
+
+    def Ticker(self, ticker: str):
+        client = self
+
+        class _Ticker:
+            def history(self, start=None, end=None, period="5y", auto_adjust=True):
+                client.requests += 1
+                time.sleep(client.latency)
+                return _synthetic_ohlcv(ticker, start, period)
+
+        return _Ticker()
+
+    def download(self, tickers, start=None, period="5y", group_by="ticker", **kwargs):
+        self.requests += 1
+        time.sleep(self.latency)
+        frames = {t: _synthetic_ohlcv(t, start, period) for t in tickers if t not in self.failing}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+
+
+class RecordedClient:
+    """Replays (or records, when `live` is given) download() responses as parquet fixtures."""
+
+    def __init__(self, fixture_dir: Path, live=None):
+        self.fixture_dir = Path(fixture_dir)
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        self.live = live
+        self.requests = 0
+
+    def _key(self, tickers, kwargs) -> Path:
+        payload = json.dumps({"tickers": list(tickers), "start": str(kwargs.get("start")), "period": kwargs.get("period")}, sort_keys=True)
+        return self.fixture_dir / f"{hashlib.sha1(payload.encode()).hexdigest()}.parquet"
+
+    def download(self, tickers, **kwargs):
+        self.requests += 1
+        path = self._key(tickers, kwargs)
+        if self.live is not None:
+            wide = self.live.download(tickers, **kwargs)
+            flat = wide.copy()
+            flat.columns = [f"{t}|{f}" for t, f in flat.columns]
+            flat.to_parquet(path)
+            return wide
+        if not path.exists():
+            return pd.DataFrame()
+        flat = pd.read_parquet(path)
+        flat.columns = pd.MultiIndex.from_tuples([tuple(c.split("|", 1)) for c in flat.columns], names=["Ticker", "Price"])
+        return flat
+
+    def Ticker(self, ticker: str):
+        if self.live is not None:
+            return self.live.Ticker(ticker)
+
+        class _Missing:
+            def history(self, **kwargs):
+                return pd.DataFrame()
+
+        return _Missing()
+
+
+def run(client, symbols, batch_size: int):
+    tasks = [(s, "NSE", None) for s in symbols]
+    fetcher = HistoricalDataFetcher(client=client)
+
+    client.requests = 0
+    t0 = time.perf_counter()
+    batched = fetcher.fetch_batch(tasks, batch_size=batch_size)
+    batch_time = time.perf_counter() - t0
+    batch_requests = client.requests
+
+    ok = sum(1 for df in batched.values() if df is not None and not df.empty)
+    print(f"Batched:    {batch_time:7.2f}s  {batch_requests:5d} requests  {ok}/{len(tasks)} symbols")
+    return batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for multi-ticker history downloads")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per request (synthetic mode)")
+    parser.add_argument("--fail", type=int, default=3, help="Tickers the synthetic bulk endpoint drops (exercise fallback)")
+    parser.add_argument("--fixture", type=str, help="Replay recorded responses from this directory")
+    parser.add_argument("--record", type=str, help="Record live yfinance responses into this directory")
+    args = parser.parse_args()
+
+    if args.record:
+        import yfinance as yf
+        universe = pd.read_parquet(Path(__file__).resolve().parent.parent / "data/processed/universe.parquet")
+        symbols = universe[universe['exchange'] == 'NSE']['symbol'].head(args.symbols).tolist()
+        run(RecordedClient(Path(args.record), live=yf), symbols, args.batch_size)
+        return
+
+    if args.fixture:
+        # Replays need the same ticker list/chunking the recording used
+        universe = pd.read_parquet(Path(__file__).resolve().parent.parent / "data/processed/universe.parquet")
+        symbols = universe[universe['exchange'] == 'NSE']['symbol'].head(args.symbols).tolist()
+        run(RecordedClient(Path(args.fixture)), symbols, args.batch_size)
+        return
+
+    symbols = [f"SYN{i:04d}" for i in range(args.symbols)]
+    failing = {f"{s}.NS" for s in symbols[:args.fail]}
+    client = SyntheticClient(latency=args.latency, failing=failing)
+
+    batched = run(client, symbols, args.batch_size)
+
+    # Same symbols one request each, as update_all(batch=False) would
+    fetcher = HistoricalDataFetcher(client=client)
+    client.requests = 0
+    t0 = time.perf_counter()
+    single = {(s, "NSE"): fetcher.fetch_history(s, "NSE") for s in symbols}
+    single_time = time.perf_counter() - t0
+    print(f"Per-symbol: {single_time:7.2f}s  {client.requests:5d} requests")
+
+    # Splitting must reproduce the per-symbol frames exactly
+    mismatches = [k for k in single if not single[k].equals(batched[k])]
+    if mismatches:
+        print(f"Mismatch for {len(mismatches)} symbols, e.g. {mismatches[:3]}")
+        sys.exit(1)
+    print("Batched frames match per-symbol frames.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark for BreakoutService scan engines on a synthetic universe.
+
+Builds a throwaway OHLCV panel (random walks, some short listings and
+missing days) in a temp directory, runs the thread, process and vectorized
+engines over it and checks that they report the same breakouts:
+
+    python scripts/bench_scan_modes.py --symbols 3000 --days 1250
+    python scripts/bench_scan_modes.py --modes processes vectorized --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from src.analytics.service import BreakoutService
+from src.historical.panel import OHLCVPanel
+
+
+def synthetic_history(symbols: int, days: int, seed: int = 7) -> pd.DataFrame:
+    """Long (exchange, symbol, trade_date, OHLCV) frame; ~10% of symbols listed recently, ~2% missing bars."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days).date
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (symbols, days)), axis=1))
+    frame = pd.DataFrame({
+        'exchange': np.repeat(np.where(np.arange(symbols) % 2, 'NSE', 'BSE'), days),
+        'symbol': np.repeat([f"SYN{i:05d}" for i in range(symbols)], days),
+        'trade_date': np.tile(dates, symbols),
+        'open': (close * (1 + rng.normal(0, 0.005, close.shape))).ravel(),
+        'high': (close * (1 + rng.uniform(0, 0.02, close.shape))).ravel(),
+        'low': (close * (1 - rng.uniform(0, 0.02, close.shape))).ravel(),
+        'close': close.ravel(),
+        'volume': rng.integers(1_000, 1_000_000, close.size),
+    })
+    listed = np.repeat(rng.integers(0, days // 2, symbols) * (rng.random(symbols) < 0.1), days)
+    position = np.tile(np.arange(days), symbols)
+    keep = (position >= listed) & ((rng.random(len(frame)) > 0.02) | (position == days - 1))
+    return frame[keep].reset_index(drop=True)
+
+
+def normalized(df: pd.DataFrame) -> pd.DataFrame:
+    cols = ['exchange', 'symbol', 'trade_date', 'breakout_type', 'breakout_level',
+            'close_price', 'breakout_pct', 'volume', 'avg_volume_n', 'volume_confirmation']
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    out = df[cols].copy()
+    out['trade_date'] = pd.to_datetime(out['trade_date']).dt.date
+    return out.sort_values(['exchange', 'symbol', 'breakout_type']).reset_index(drop=True).astype(str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare breakout scan engines on a synthetic universe")
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=1250)
+    parser.add_argument("--modes", nargs="+", default=["threads", "processes", "vectorized"],
+                        choices=["threads", "processes", "vectorized"])
+    parser.add_argument("--threads", type=int, default=60, help="Thread pool size for the threads engine")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the processes engine (default: CPU count)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        history = synthetic_history(args.symbols, args.days)
+        panel = OHLCVPanel(Path(tmp) / "panel")
+        panel.build(history)
+        print(f"Synthetic panel: {args.symbols} symbols x {args.days} days, "
+              f"{len(history):,} bars ({time.perf_counter() - t0:.1f}s to build)")
+        universe = history[['symbol', 'exchange']].drop_duplicates().reset_index(drop=True)
+        del history
+
+        service = BreakoutService()
+        service.panel = panel
+        results = {}
+        print(f"CPU count: {os.cpu_count()}")
+        for mode in args.modes:
+            t0 = time.perf_counter()
+            if mode == "processes":
+                service.use_panel = panel.open()
+                df = service._scan_processes(universe, max_workers=args.workers)
+            else:
+                df = service.run_engine(universe, engine=mode, max_workers=args.threads)
+            elapsed = time.perf_counter() - t0
+            results[mode] = normalized(df)
+            print(f"{mode:<11} {elapsed:8.2f}s  {len(universe) / elapsed:9.0f} symbols/s  {len(df)} breakouts")
+
+        baseline_mode = args.modes[0]
+        for mode, df in results.items():
+            if not df.equals(results[baseline_mode]):
+                print(f"Mismatch between {baseline_mode} and {mode} results.")
+                sys.exit(1)
+        print("All engines report identical breakouts.")
+
+
+if __name__ == "__main__":
+    main()
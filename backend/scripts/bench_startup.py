@@ -0,0 +1,210 @@
+"""
+Startup benchmark for the CLI and the API, checked against a time budget.
+
+Each measurement runs in a fresh interpreter (median of --repeat runs):
+
+    cli_help        wall-clock of `python main.py --help`
+    cli_import      `import main`, from `python -X importtime`
+    api_import      `import src.api.main`, from `python -X importtime`
+    first_request   uvicorn launch until GET /api/v1/system/status answers 200
+
+    # Report, check the budgets, and append the run to the history file
+    python scripts/bench_startup.py
+
+    # Where import time goes (self time per top-level package)
+    python scripts/bench_startup.py --only api_import --top 15
+
+    # Tighter budget for one measurement, without recording the run
+    python scripts/bench_startup.py --budget first_request=1.5 --no-record
+
+Every run is appended to data/benchmarks/startup.jsonl (with the git commit)
+so regressions show up as a trend; the report shows the change against the
+previous recorded run. Exits 1 if any measurement is over its budget.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+# Seconds; generous enough for a single slow CPU, tight enough to catch an eager pandas/yfinance import
+BUDGETS = {
+    "cli_help": 0.5,
+    "cli_import": 0.1,
+    "api_import": 1.0,
+    "first_request": 1.5,
+}
+# Should not be loaded by the import alone
+HEAVY = ("pandas", "pyarrow", "yfinance", "pandas_market_calendars", "tqdm", "requests", "httpx")
+DEFAULT_HISTORY = BACKEND_DIR / "data" / "benchmarks" / "startup.jsonl"
+
+
+def import_profile(module: str) -> dict:
+    """
+    Cumulative import time of `module` and self time per top-level package
+    (python -X importtime). Modules the bare interpreter loads (site etc.)
+    are left out of the package breakdown.
+    """
+    bare = subprocess.run([sys.executable, "-X", "importtime", "-c", "import sys"],
+                          capture_output=True, text=True, check=True)
+    preloaded = {line.split("|")[-1].strip() for line in bare.stderr.splitlines() if line.startswith("import time:")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, '.'); import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    packages = defaultdict(int)
+    total = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name not in preloaded:
+            packages[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total = int(cumulative_us)
+    return {"seconds": (total or 0) / 1e6, "packages": dict(packages)}
+
+
+def cli_help() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--help"], cwd=BACKEND_DIR, capture_output=True, check=True)
+    return time.perf_counter() - started
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_request(path: str, timeout: float = 60.0) -> float:
+    """Seconds from launching uvicorn until `path` answers 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as res:
+                    if res.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"No answer from {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _last_record(history: Path) -> dict:
+    if not history.exists():
+        return {}
+    lines = history.read_text().strip().splitlines()
+    return json.loads(lines[-1]) if lines else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI/API startup benchmark with a time budget")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--only", nargs="+", choices=list(BUDGETS), default=None, help="Measurements to run")
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=SECONDS", help="Override a budget")
+    parser.add_argument("--path", type=str, default="/api/v1/system/status", help="Endpoint for first_request")
+    parser.add_argument("--top", type=int, default=8, help="Packages listed per import profile")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSONL file runs are appended to")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the history")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        name, _, seconds = item.partition("=")
+        if name not in budgets:
+            parser.error(f"Unknown budget '{name}', expected one of {list(budgets)}")
+        budgets[name] = float(seconds)
+
+    names = args.only or list(BUDGETS)
+    results, profiles = {}, {}
+    for name in names:
+        samples = []
+        for _ in range(args.repeat):
+            if name == "cli_help":
+                samples.append(cli_help())
+            elif name == "first_request":
+                samples.append(first_request(args.path))
+            else:
+                profile = import_profile("main" if name == "cli_import" else "src.api.main")
+                profiles[name] = profile
+                samples.append(profile["seconds"])
+        results[name] = statistics.median(samples)
+
+    previous = _last_record(args.history).get("results", {})
+    print(f"{'measurement':<15} {'median':>9} {'budget':>8} {'previous':>9}")
+    over = []
+    for name in names:
+        seconds, budget = results[name], budgets[name]
+        before = f"{previous[name]:.3f}s" if name in previous else "-"
+        flag = "  OVER BUDGET" if seconds > budget else ""
+        print(f"{name:<15} {seconds:>8.3f}s {budget:>7.2f}s {before:>9}{flag}")
+        if seconds > budget:
+            over.append(name)
+
+    for name, profile in profiles.items():
+        ranked = sorted(profile["packages"].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        heavy = [pkg for pkg in HEAVY if pkg in profile["packages"]]
+        print(f"\n{name}: self time by package")
+        for pkg, us in ranked:
+            print(f"  {pkg:<28} {us / 1000:>8.1f} ms")
+        if heavy:
+            print(f"  heavy modules loaded at import: {', '.join(heavy)}")
+
+    if not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "results": {k: round(v, 4) for k, v in results.items()},
+            "budgets": {k: budgets[k] for k in names},
+        }
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nRecorded in {args.history}")
+
+    if over:
+        print(f"\nFAIL: over budget: {', '.join(over)}")
+        sys.exit(1)
+    print("\nOK: all measurements within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+One-shot migration from the legacy per-symbol parquet files
+(data/historical/<EXCHANGE>/<SYMBOL>.parquet) to the partitioned store
+(data/history_store/<EXCHANGE>/<YEAR>.parquet).
+
+Usage (from backend/):
+    python scripts/migrate_history_store.py [--verify] [--delete-legacy]
+"""
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from tqdm import tqdm
+from src.historical.store import ParquetFileStore, PartitionedParquetStore
+
+
+def migrate(verify: bool = False, delete_legacy: bool = False, chunk_size: int = 500) -> bool:
+    # Never delete the legacy files without checking the copy first
+    verify = verify or delete_legacy
+    source = ParquetFileStore()
+    target = PartitionedParquetStore(flush_every=chunk_size)
+
+    keys = source.keys()
+    if not keys:
+        print(f"No legacy files found under {source.base_path}. Nothing to migrate.")
+        return False
+
+    print(f"Migrating {len(keys)} symbols from {source.base_path} to {target.base_path}...")
+    migrated = []
+    for symbol, exchange in tqdm(keys):
+        df = source.load(symbol, exchange)
+        if df.empty:
+            continue
+        # File names are sanitized; the frame carries the real symbol
+        real_symbol = str(df['symbol'].iloc[0]) if 'symbol' in df.columns else symbol
+        df['symbol'] = real_symbol
+        df['exchange'] = exchange
+        target.save(df, real_symbol, exchange)
+        migrated.append((symbol, real_symbol, exchange, len(df)))
+    # Flushes the rest, then folds the segments new symbols are written to into the year files
+    target.compact()
+
+    if verify:
+        print("Verifying row counts...")
+        panel = target.load_all()
+        counts = panel.groupby(['exchange', 'symbol']).size().to_dict() if not panel.empty else {}
+        mismatches = [m for m in migrated if counts.get((m[2], m[1]), 0) != m[3]]
+        if mismatches:
+            print(f"Verification failed for {len(mismatches)} symbols, e.g. {mismatches[:5]}")
+            return False
+        print("Verification passed.")
+
+    if delete_legacy:
+        print(f"Removing legacy files under {source.base_path}...")
+        shutil.rmtree(source.base_path)
+
+    print(f"Migrated {len(migrated)} symbols.")
+    print("Set HISTORY_STORE_BACKEND=partitioned (or leave 'auto') to use the new store.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate per-symbol history files to the partitioned store")
+    parser.add_argument("--verify", action="store_true", help="Compare row counts after migration")
+    parser.add_argument("--delete-legacy", action="store_true", help="Delete the per-symbol files afterwards")
+    args = parser.parse_args()
+
+    if not migrate(verify=args.verify, delete_legacy=args.delete_legacy):
+        sys.exit(1)
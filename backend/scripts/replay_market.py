@@ -0,0 +1,110 @@
+"""
+Accelerated market replay for end-to-end latency benchmarking.
+
+Replays the last N sessions of stored history (or a synthetic universe)
+through the live trigger path and the periodic scan/push path on a
+simulated market clock, then prints throughput and latency percentiles:
+
+    # Synthetic universe, as fast as possible
+    python scripts/replay_market.py --source synthetic --symbols 1000 --sessions 3
+
+    # Stored history at 60x (a session takes ~6 minutes)
+    python scripts/replay_market.py --source store --symbols 500 --sessions 1 --speed 60
+
+    # Fail (exit 1) when scan p95 or signal-to-push p95 exceeds a budget
+    python scripts/replay_market.py --max-scan-p95-ms 50 --max-signal-p95-ms 400000
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from src.live.replay import MarketReplay
+from src.market_state.sessions import get_session_index
+
+
+def synthetic_history(symbols: int, days: int, seed: int = 11) -> pd.DataFrame:
+    """Random-walk bars on real exchange sessions, so the resolver sees trading days."""
+    index = get_session_index()
+    sessions = index.sessions[index.sessions <= np.datetime64(index.previous_session(date.today()), 'D')][-days:]
+    dates = pd.to_datetime(sessions).date
+    rng = np.random.default_rng(seed)
+    n = len(dates)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (symbols, n)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.01, close.shape))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, close.shape))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, close.shape))
+    return pd.DataFrame({
+        'exchange': 'NSE',
+        'symbol': np.repeat([f"SYN{i:05d}" for i in range(symbols)], n),
+        'trade_date': np.tile(dates, symbols),
+        'open': open_.ravel(), 'high': high.ravel(), 'low': low.ravel(), 'close': close.ravel(),
+        'volume': rng.integers(1_000, 1_000_000, close.size),
+    })
+
+
+def stored_history(symbols: int) -> pd.DataFrame:
+    from src.historical.store import HistoricalDataCache
+    cache = HistoricalDataCache()
+    keys = cache.keys()[:symbols]
+    return cache.load_many(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay sessions through the scan and notification path")
+    parser.add_argument("--source", choices=["synthetic", "store"], default="synthetic")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=400, help="Synthetic history length (sessions)")
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions to replay (the most recent ones)")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, 10 = 10x, 0 = as fast as possible")
+    parser.add_argument("--scan-interval", type=int, default=300, help="Simulated seconds between scans")
+    parser.add_argument("--ticks-per-bar", type=int, default=40)
+    parser.add_argument("--json", type=str, help="Write the full report to this file")
+    parser.add_argument("--max-scan-p95-ms", type=float, help="Exit 1 if scan latency p95 is above this")
+    parser.add_argument("--max-signal-p95-ms", type=float, help="Exit 1 if signal-to-push p95 is above this")
+    args = parser.parse_args()
+
+    history = synthetic_history(args.symbols, args.days) if args.source == "synthetic" else stored_history(args.symbols)
+    if history.empty:
+        print("No history to replay.")
+        sys.exit(1)
+
+    replay = MarketReplay(history, speed=args.speed, scan_interval=args.scan_interval, ticks_per_bar=args.ticks_per_bar)
+    report = asyncio.run(replay.run(replay.sessions(args.sessions)))
+
+    for session in report["sessions"]:
+        if session.get("skipped"):
+            print(f"{session['session']}: skipped (no bars)")
+            continue
+        print(f"{session['session']}: {session['symbols']} symbols, {session['ticks']} ticks in {session['replay_sec']}s "
+              f"({session['ticks_per_sec']}/s), prepare {session['prepare_sec']}s")
+        print(f"  states:         {' -> '.join(f'{t} {s}' for t, s in session['states'])}")
+        print(f"  scan ms:        {session['scan_ms']}")
+        print(f"  live events:    {session['live_events']}, tick->events us {session['tick_latency_us']}")
+        print(f"  tick->push us:  {session['tick_push_latency_us']}")
+        print(f"  scan signals:   {session['scan_signals']}, signal->push ms {session['signal_to_push_ms']}")
+    summary = report["summary"]
+    print(f"Summary: {json.dumps(summary)}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str))
+
+    failed = []
+    if args.max_scan_p95_ms is not None and summary["scan_ms"].get("p95", 0) > args.max_scan_p95_ms:
+        failed.append(f"scan p95 {summary['scan_ms']['p95']}ms > {args.max_scan_p95_ms}ms")
+    if args.max_signal_p95_ms is not None and summary["signal_to_push_ms"].get("p95", 0) > args.max_signal_p95_ms:
+        failed.append(f"signal-to-push p95 {summary['signal_to_push_ms']['p95']}ms > {args.max_signal_p95_ms}ms")
+    if failed:
+        print("Regression: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
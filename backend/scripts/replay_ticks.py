@@ -0,0 +1,114 @@
+"""
+Tick replay stand-in for the live breakout monitor.
+
+    # Write a synthetic tick file around each symbol's trigger levels
+    python scripts/replay_ticks.py synthesize data/ticks/sample.csv --symbols 500 --ticks 20
+
+    # Run the monitor against a file locally and print per-tick latency
+    python scripts/replay_ticks.py run data/ticks/sample.csv
+
+    # Serve a file over TCP for LIVE_TICK_SOURCE=tcp:127.0.0.1:9100
+    python scripts/replay_ticks.py serve data/ticks/sample.csv --port 9100 --speed 1
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from src.historical.panel import OHLCVPanel
+from src.live.monitor import LiveBreakoutMonitor
+from src.live.sources import FileReplaySource
+from src.live.triggers import TriggerIndex
+
+
+def synthesize(path: Path, symbols: int, ticks: int, seed: int = 1):
+    """Random walk per symbol starting at its last close, sized to cross a few levels."""
+    panel = OHLCVPanel()
+    if not panel.open():
+        print("OHLCV panel not available. Run the history update first.")
+        sys.exit(1)
+    index = TriggerIndex()
+    index.build(panel, date.today())
+    rng = np.random.default_rng(seed)
+    packed = panel.packed(fields=('close', 'volume'))
+    keys = list(zip(packed['exchange'], packed['symbol']))[:symbols]
+    last_close = packed['close'][:len(keys), -1]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ts = time.time()
+    with open(path, "w") as f:
+        f.write("ts,exchange,symbol,price,volume\n")
+        walks = last_close[:, None] * np.exp(np.cumsum(rng.normal(0, 0.01, (len(keys), ticks)), axis=1))
+        volume = np.cumsum(rng.integers(100, 10_000, (len(keys), ticks)), axis=1)
+        for j in range(ticks):
+            for i, (exchange, symbol) in enumerate(keys):
+                if np.isnan(walks[i, j]):
+                    continue
+                ts += 0.001
+                f.write(f"{ts:.3f},{exchange},{symbol},{walks[i, j]:.2f},{volume[i, j]}\n")
+    print(f"Wrote {len(keys) * ticks} ticks for {len(keys)} symbols to {path}")
+
+
+async def run(path: Path):
+    pushed = []
+
+    async def broadcast(message: str):
+        pushed.append(message)
+
+    monitor = LiveBreakoutMonitor(broadcast, lambda: FileReplaySource(path, speed=0))
+    if not monitor.prepare(date.today()):
+        sys.exit(1)
+    t0 = time.perf_counter()
+    await monitor.run_session(FileReplaySource(path, speed=0), until_closed=False)
+    elapsed = time.perf_counter() - t0
+    snap = monitor.snapshot()
+    print(f"{snap['ticks']} ticks in {elapsed:.2f}s ({snap['ticks'] / elapsed:,.0f}/s), {snap['events']} crossings, {len(pushed)} pushes")
+    print(f"Tick -> events: {snap['tick_latency']}")
+    print(f"Tick -> pushed: {snap['push_latency']}")
+
+
+async def serve(path: Path, port: int, speed: float):
+    async def handle(reader, writer):
+        print(f"Client connected: {writer.get_extra_info('peername')}")
+        async for tick in FileReplaySource(path, speed=speed).ticks():
+            writer.write(f"{tick.ts},{tick.exchange},{tick.symbol},{tick.price},{tick.volume}\n".encode())
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    print(f"Serving {path} on 127.0.0.1:{port} (speed {speed or 'max'})")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick replay for the live breakout monitor")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("synthesize")
+    p.add_argument("path", type=Path)
+    p.add_argument("--symbols", type=int, default=500)
+    p.add_argument("--ticks", type=int, default=20, help="Ticks per symbol")
+    p = sub.add_parser("run")
+    p.add_argument("path", type=Path)
+    p = sub.add_parser("serve")
+    p.add_argument("path", type=Path)
+    p.add_argument("--port", type=int, default=9100)
+    p.add_argument("--speed", type=float, default=1.0, help="Replay speed (0: as fast as possible)")
+    args = parser.parse_args()
+
+    if args.command == "synthesize":
+        synthesize(args.path, args.symbols, args.ticks)
+    elif args.command == "run":
+        asyncio.run(run(args.path))
+    else:
+        asyncio.run(serve(args.path, args.port, args.speed))
+
+
+if __name__ == "__main__":
+    main()
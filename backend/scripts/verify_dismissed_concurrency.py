@@ -0,0 +1,128 @@
+"""
+Concurrency check for the dismissed-signal store.
+
+Fires parallel dismiss/restore calls and checks that no change is lost,
+both in memory and after rebuilding from snapshot + journal on disk.
+
+    # Against the store directly (temporary files)
+    python scripts/verify_dismissed_concurrency.py --threads 32 --ids 400
+
+    # Through the API routes in-process (FastAPI TestClient, temporary files)
+    python scripts/verify_dismissed_concurrency.py --api
+
+Each id is owned by one worker, which dismisses it, optionally restores it
+and dismisses it again, so the final set is known up front. A second phase
+hammers a small set of shared ids from every worker; there the final state
+must match the journal replay. Exits 1 on any mismatch.
+"""
+import argparse
+import random
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.api.dismissed import DismissedStore
+
+
+def make_store(base: Path, snapshot_every: int) -> DismissedStore:
+    return DismissedStore(base / "dismissed.json", base / "dismissed.journal", snapshot_every)
+
+
+def plan(ids: int, seed: int):
+    """Per id: the ops to run in order, and whether it should end up dismissed."""
+    rng = random.Random(seed)
+    ops, expected = {}, set()
+    for i in range(ids):
+        uid = f"NSE:SYM{i:05d}"
+        pattern = rng.choice([("dismiss",), ("dismiss", "restore"), ("dismiss", "restore", "dismiss")])
+        ops[uid] = pattern
+        if pattern[-1] == "dismiss":
+            expected.add(uid)
+    return ops, expected
+
+
+def run_calls(call, ops: dict, threads: int, shared: list, rounds: int):
+    def owned(uid):
+        for op in ops[uid]:
+            call(op, uid)
+
+    def contended(worker):
+        rng = random.Random(worker)
+        for _ in range(rounds):
+            call(rng.choice(("dismiss", "restore")), rng.choice(shared))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(owned, uid) for uid in ops]
+        futures += [executor.submit(contended, w) for w in range(threads)]
+        for future in futures:
+            future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel dismiss/restore consistency check")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ids", type=int, default=400, help="Ids with a known final state")
+    parser.add_argument("--shared", type=int, default=5, help="Ids every worker fights over")
+    parser.add_argument("--rounds", type=int, default=50, help="Contended calls per worker")
+    parser.add_argument("--snapshot-every", type=int, default=97, help="Small so snapshots happen mid-run")
+    parser.add_argument("--api", action="store_true", help="Go through the HTTP routes (TestClient)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    ops, expected = plan(args.ids, args.seed)
+    shared = [f"BSE:SHARED{i}" for i in range(args.shared)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        store = make_store(base, args.snapshot_every)
+        store.load()
+
+        if args.api:
+            from fastapi.testclient import TestClient
+            import src.api.endpoints as endpoints
+            from src.api.main import app
+            endpoints.dismissed = store
+            endpoints.get_breakout_table().dismissed = store
+            client = TestClient(app)
+
+            def call(op, uid):
+                exchange, symbol = uid.split(":", 1)
+                res = client.post(f"/api/v1/{op}", json={"symbol": symbol, "exchange": exchange})
+                res.raise_for_status()
+        else:
+            def call(op, uid):
+                getattr(store, op)(uid)
+
+        calls = sum(len(v) for v in ops.values()) + args.threads * args.rounds
+        print(f"{calls} calls from {args.threads} threads ({'API' if args.api else 'store'})...")
+        run_calls(call, ops, args.threads, shared, args.rounds)
+        store.close()
+
+        final = store.items()
+        owned = {uid for uid in final if uid not in shared}
+        rebuilt = make_store(base, args.snapshot_every)
+        rebuilt.load()
+
+        ok = True
+        if owned != expected:
+            print(f"FAIL: in-memory set differs: {len(expected - owned)} lost dismissals, {len(owned - expected)} lost restores")
+            ok = False
+        if rebuilt.items() != final:
+            print(f"FAIL: rebuilt from disk differs from memory ({len(rebuilt.items() ^ final)} ids)")
+            ok = False
+        if args.api and set(client.get("/api/v1/dismissed").json()) != final:
+            print("FAIL: /dismissed differs from the store")
+            ok = False
+
+    if not ok:
+        sys.exit(1)
+    print(f"OK: {len(expected)} owned ids dismissed as planned, {len(final) - len(owned)}/{len(shared)} shared ids dismissed, "
+          f"disk replay matches")
+
+
+if __name__ == "__main__":
+    main()
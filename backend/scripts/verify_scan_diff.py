@@ -0,0 +1,75 @@
+"""
+Check for the scan-to-scan diff log behind the WebSocket updates.
+
+Feeds synthetic scans through ScanDiffLog and checks that detected_at,
+which every scan restamps, is not compared as a result column:
+
+    python scripts/verify_scan_diff.py --rows 100
+
+    1. an identical rescan (only detected_at restamped) returns None
+    2. one moved breakout_pct is one changed row, fields == ['breakout_pct'],
+       shipped without detected_at
+    3. a new row ships with its detected_at
+
+Exits 1 on any mismatch.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.analytics.diff import ScanDiffLog
+
+
+def make_scan(rows: int, detected_at: str, first_pct: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame([{
+        'exchange': 'NSE', 'symbol': f"SYM{i:04d}", 'trade_date': '2024-01-02', 'breakout_type': '20D',
+        'breakout_level': 100.0, 'close_price': 101.0, 'breakout_pct': first_pct if i == 0 else 1.0,
+        'volume': 1000, 'avg_volume_n': 500.0, 'volume_confirmation': True,
+        'data_source_date': '2024-01-02', 'detected_at': detected_at,
+    } for i in range(rows)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScanDiffLog consistency check")
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+
+    failures = []
+    log = ScanDiffLog()
+    log.load(make_scan(args.rows, "2024-01-02T15:40:00"))
+
+    diff = log.apply(make_scan(args.rows, "2024-01-02T15:42:00"))
+    if diff is not None:
+        failures.append(f"unchanged rescan produced a diff ({len(diff['changed'])} changed)")
+
+    diff = log.apply(make_scan(args.rows, "2024-01-02T15:44:00", first_pct=2.5))
+    if diff is None or len(diff["changed"]) != 1:
+        failures.append(f"one moved row: expected 1 changed, got {diff and len(diff['changed'])}")
+    else:
+        changed = diff["changed"][0]
+        if changed["fields"] != ["breakout_pct"]:
+            failures.append(f"changed fields: {changed['fields']}")
+        if "detected_at" in changed:
+            failures.append("changed row carries detected_at")
+
+    scan = make_scan(args.rows, "2024-01-02T15:46:00", first_pct=2.5)
+    extra = {**scan.iloc[0].to_dict(), 'symbol': 'NEWSYM'}
+    diff = log.apply(pd.concat([scan, pd.DataFrame([extra])], ignore_index=True))
+    if diff is None or [r['symbol'] for r in diff["added"]] != ['NEWSYM'] or diff["changed"]:
+        failures.append(f"one new row: unexpected diff {diff and {k: len(v) for k, v in diff.items() if k != 'version'}}")
+    elif diff["added"][0].get("detected_at") != "2024-01-02T15:46:00":
+        failures.append("added row lacks its detected_at")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: unchanged rescan is silent; only result columns are compared")
+
+
+if __name__ == "__main__":
+    main()
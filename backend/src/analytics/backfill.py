@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+from tqdm import tqdm
+from config.settings import SIGNALS_DIR, SIGNAL_BACKFILL_CHUNK
+from src.analytics.config import BreakoutConfig
+from src.analytics.engine import VectorizedBreakoutEngine, RESULT_COLUMNS
+from src.historical.panel import OHLCVPanel
+
+SIGNAL_COLUMNS = [c for c in RESULT_COLUMNS if c != 'data_source_date']
+
+SIGNAL_SCHEMA = pa.schema([
+    ('exchange', pa.string()),
+    ('symbol', pa.string()),
+    ('trade_date', pa.date32()),
+    ('breakout_type', pa.string()),
+    ('breakout_level', pa.float64()),
+    ('close_price', pa.float64()),
+    ('breakout_pct', pa.float64()),
+    ('volume', pa.int64()),
+    ('avg_volume_n', pa.int64()),
+    ('volume_confirmation', pa.bool_()),
+])
+
+
+def _backfill_chunk(panel_path: Path, keys: list, config: BreakoutConfig,
+                    start: date, end: date, out_path: Path) -> int:
+    """
+    Worker: every-bar signals for one chunk of symbols, restricted to
+    [start, end], written to out_path. Runs in a separate process and maps
+    the panel itself (shared through the OS page cache).
+    """
+    panel = OHLCVPanel(panel_path)
+    engine = VectorizedBreakoutEngine(config)
+    packed = panel.packed(keys=keys, fields=('high', 'low', 'close', 'volume'), with_cols=True)
+
+    frames = []
+    if packed and len(packed['count']):
+        windows = engine.kernel.every_bar(packed['high'], packed['low'], packed['volume'], packed['count'])
+        days = panel.days
+        col = packed['col']
+        c_lo = int(np.searchsorted(days, np.datetime64(start, 'D'), side='left'))
+        c_hi = int(np.searchsorted(days, np.datetime64(end, 'D'), side='right'))
+        in_range = (col >= c_lo) & (col < c_hi)
+
+        for order, (name, (r, t), level, c, pct, vol, avg, confirmed) in enumerate(
+                engine.evaluate(windows, packed['close'], packed['volume'])):
+            keep = in_range[r, t]
+            if not keep.any():
+                continue
+            r, t = r[keep], t[keep]
+            avg = avg[keep]
+            frames.append(pd.DataFrame({
+                'exchange': packed['exchange'][r],
+                'symbol': packed['symbol'][r],
+                'trade_date': pd.to_datetime(days[col[r, t]]).date,
+                'breakout_type': name,
+                'breakout_level': np.round(level[keep], 2),
+                'close_price': np.round(c[keep], 2),
+                'breakout_pct': np.round(pct[keep], 2),
+                'volume': vol[keep].astype(np.int64),
+                'avg_volume_n': np.where(np.isnan(avg), 0, avg).astype(np.int64),
+                'volume_confirmation': confirmed[keep],
+                '_order': order,
+            }))
+
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+        # Calculator order within a day: symbol by symbol, lookbacks in config order
+        df = df.sort_values(['trade_date', 'exchange', 'symbol', '_order'], kind='stable').drop(columns=['_order'])
+    else:
+        df = pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+    temp_path = out_path.with_suffix(".tmp")
+    pq.write_table(pa.Table.from_pandas(df[SIGNAL_COLUMNS], schema=SIGNAL_SCHEMA, preserve_index=False), temp_path)
+    os.replace(temp_path, out_path)
+    return len(df)
+
+
+class SignalBackfill:
+    """
+    Breakout signals for every historical trading day, not just the latest bar.
+
+    Each symbol chunk is one vectorized every-bar pass over the OHLCV panel
+    (MultiWindowKernel.every_bar), run across processes. Output is a
+    date-partitioned signal table:
+
+        <base>/YYYY/YYYY-MM-DD.parquet   signals of one trading day
+        <base>/_progress.json            completed days + config fingerprint
+        <base>/_staging/<run>/           per-chunk worker output of an unfinished run
+
+    Runs are resumable by date range: completed days are skipped, and chunks
+    already staged by an interrupted run are not recomputed (as long as the
+    config, panel generation and range match; other staged runs are
+    removed). Changing the breakout config invalidates earlier days.
+    """
+
+    def __init__(self, config: BreakoutConfig = None, panel: OHLCVPanel = None, base_path: Optional[Path] = None):
+        self.config = config or BreakoutConfig()
+        self.panel = panel or OHLCVPanel()
+        self.base_path = base_path or SIGNALS_DIR
+        self.progress_path = self.base_path / "_progress.json"
+
+    # ---------- Progress ----------
+
+    def fingerprint(self) -> str:
+        payload = json.dumps({
+            "lookbacks": self.config.LOOKBACKS,
+            "volume_mult": self.config.VOLUME_MULT,
+            "all_time_vol_window": self.config.ALL_TIME_VOL_WINDOW,
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    def completed_dates(self) -> set:
+        if not self.progress_path.exists():
+            return set()
+        with open(self.progress_path) as f:
+            progress = json.load(f)
+        if progress.get("fingerprint") != self.fingerprint():
+            return set()
+        return {date.fromisoformat(d) for d in progress.get("dates", [])}
+
+    def _save_progress(self, dates: set):
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.progress_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump({"fingerprint": self.fingerprint(), "dates": sorted(d.isoformat() for d in dates)}, f)
+        os.replace(temp_path, self.progress_path)
+
+    def pending_dates(self, start: Optional[date] = None, end: Optional[date] = None, force: bool = False) -> List[date]:
+        """Panel trading days in [start, end] that have no signals yet."""
+        if not self.panel.open():
+            return []
+        days = pd.to_datetime(self.panel.days).date
+        done = set() if force else self.completed_dates()
+        return [d for d in days if (start is None or d >= start) and (end is None or d <= end) and d not in done]
+
+    # ---------- Run ----------
+
+    def _partition_path(self, d: date) -> Path:
+        return self.base_path / f"{d.year:04d}" / f"{d.isoformat()}.parquet"
+
+    def run(self, start: Optional[date] = None, end: Optional[date] = None, max_workers: Optional[int] = None,
+            chunk_size: int = SIGNAL_BACKFILL_CHUNK, force: bool = False) -> dict:
+        if not self.panel.open():
+            print("OHLCV panel not available. Run the history update first.")
+            return {"dates": 0, "signals": 0}
+
+        pending = self.pending_dates(start, end, force=force)
+        if not pending:
+            print("Signal table is up to date for the requested range.")
+            return {"dates": 0, "signals": 0}
+
+        run_start, run_end = min(pending), max(pending)
+        index = self.panel.index.reset_index().sort_values('row')
+        keys = list(zip(index['symbol'], index['exchange']))
+        chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+
+        # Staged chunks from an interrupted run with the same inputs are reused
+        run_id = f"{self.fingerprint()}-{self.panel.generation}-{run_start}-{run_end}"
+        staging = self.base_path / "_staging" / run_id
+        # Any other run's chunks (config, panel generation or range changed since) can never be resumed
+        stale = [p for p in staging.parent.iterdir() if p.is_dir() and p.name != run_id] if staging.parent.exists() else []
+        for path in stale:
+            shutil.rmtree(path, ignore_errors=True)
+        if stale:
+            print(f"Removed {len(stale)} stale staging run(s) from earlier interrupted backfills.")
+        staging.mkdir(parents=True, exist_ok=True)
+        todo = [(i, chunk) for i, chunk in enumerate(chunks) if not (staging / f"chunk-{i:05d}.parquet").exists()]
+
+        print(f"Backfilling {len(pending)} trading days ({run_start} to {run_end}) for {len(keys)} symbols "
+              f"in {len(chunks)} chunks ({len(chunks) - len(todo)} already staged)...")
+
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_backfill_chunk, self.panel.base_path, chunk, self.config,
+                                run_start, run_end, staging / f"chunk-{i:05d}.parquet")
+                for i, chunk in todo
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                future.result()
+
+        total = self._publish(staging, pending)
+        shutil.rmtree(staging, ignore_errors=True)
+        if not any(staging.parent.iterdir()):
+            staging.parent.rmdir()
+        print(f"Backfill complete: {total} signals over {len(pending)} trading days.")
+        return {"dates": len(pending), "signals": total}
+
+    def _publish(self, staging: Path, pending: List[date]) -> int:
+        """Splits staged chunks into per-day partitions, one year at a time, recording progress as it goes."""
+        files = [str(p) for p in sorted(staging.glob("chunk-*.parquet"))]
+        dataset = ds.dataset(files, format="parquet", schema=SIGNAL_SCHEMA)
+        done = self.completed_dates()
+        total = 0
+        for year in sorted({d.year for d in pending}):
+            days = [d for d in pending if d.year == year]
+            table = dataset.to_table(filter=(ds.field('trade_date') >= days[0]) & (ds.field('trade_date') <= days[-1]))
+            df = table.to_pandas()
+            grouped = dict(tuple(df.groupby('trade_date', sort=False))) if not df.empty else {}
+
+            for d in days:
+                path = self._partition_path(d)
+                day_df = grouped.get(d)
+                if day_df is None or day_df.empty:
+                    path.unlink(missing_ok=True)
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = path.with_suffix(".tmp")
+                day_df.to_parquet(temp_path, index=False)
+                os.replace(temp_path, path)
+                total += len(day_df)
+
+            done.update(days)
+            self._save_progress(done)
+        return total
+
+    # ---------- Read ----------
+
+    def load(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Signals for trading days in [start, end]; only the matching day files are read."""
+        if not self.base_path.exists():
+            return pd.DataFrame(columns=SIGNAL_COLUMNS)
+        paths = []
+        for year_dir in sorted(p for p in self.base_path.iterdir() if p.is_dir() and p.name.isdigit()):
+            year = int(year_dir.name)
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            for path in sorted(year_dir.glob("*.parquet")):
+                d = date.fromisoformat(path.stem)
+                if (start is None or d >= start) and (end is None or d <= end):
+                    paths.append(path)
+        if not paths:
+            return pd.DataFrame(columns=SIGNAL_COLUMNS)
+        return pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
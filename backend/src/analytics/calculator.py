@@ -3,10 +3,12 @@ import numpy as np
 from typing import List, Dict, Any
 from src.analytics.config import BreakoutConfig
 from src.analytics.validator import BreakoutValidator
+from src.analytics.windows import MultiWindowKernel
 
 class BreakoutCalculator:
     def __init__(self, config: BreakoutConfig = None):
         self.config = config or BreakoutConfig()
+        self.kernel = MultiWindowKernel(self.config.LOOKBACKS, self.config.ALL_TIME_VOL_WINDOW)
 
     def compute(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -21,6 +23,18 @@ class BreakoutCalculator:
         # Get the target row (Latest)
         current_row = df.iloc[-1]
         
+        # Window stats for every lookback in one pass over the history before
+        # the current candle ("Exclude current candle" from the lookback).
+        windows = self.kernel.last(df['high'].to_numpy(), df['low'].to_numpy(), df['volume'].to_numpy())
+        
+        return self.evaluate(windows, current_row)
+
+    def evaluate(self, windows: Dict[str, Any], current_row) -> List[Dict[str, Any]]:
+        """
+        Breakouts of one bar against precomputed window stats (name -> WindowStats
+        with scalar fields). current_row: mapping with close, volume, trade_date,
+        symbol, exchange and optionally data_source_date.
+        """
         current_close = current_row['close']
         current_vol = current_row['volume']
         current_date = current_row['trade_date']
@@ -28,51 +42,20 @@ class BreakoutCalculator:
         exchange = current_row['exchange']
         data_source_date = current_row.get('data_source_date', None)
         
-        # Pre-calculate rolling Highs and Volume Averages
-        # Only up to the previous day (shift 1)
-        # We need efficient lookups. Since we are only checking the LAST row, 
-        # we can just take the window max from the tail.
-        
-        # Actually, for correctness and speed on single DF:
-        # window_max = df['high'].iloc[-N-1:-1].max()
-        # This is strictly complying with "Exclude current candle".
-        
         detected_breakouts = []
         
-        total_rows = len(df)
-        
         for name, lookback in self.config.LOOKBACKS.items():
             
             # 1. Determine Window
-            if lookback == -1: # All Time
-                # All history EXCEPT current
-                if total_rows < 2: 
-                    continue
-                window_high = df['high'].iloc[:-1].max()
-                # Volume lookback for all time? 
-                # Usually we take a standard avg like 50 days for volume confirmation even on ATH.
-                # Let's use 50 for volume reference on ATH or full if less.
-                vol_window_size = min(total_rows - 1, 50)
-                window_vol_avg = df['volume'].iloc[-vol_window_size-1:-1].mean()
-                
-            else:
-                if total_rows <= lookback: 
-                    # Not enough history for this specific timeframe
-                    # Example: Stock listed 10 days ago, cannot have D50 breakout.
-                    continue
-                    
-                # Slice: From (End - 1 - Lookback) to (End - 1)
-                # e.g., if Lookback=1, we want index -2 (only one candle, the previous one)
-                start_idx = -1 - lookback
-                end_idx = -1
-                
-                subset_high = df['high'].iloc[start_idx:end_idx]
-                subset_low = df['low'].iloc[start_idx:end_idx]
-                subset_vol = df['volume'].iloc[start_idx:end_idx]
-                
-                window_high = subset_high.max()
-                window_low = subset_low.min()
-                window_vol_avg = subset_vol.mean()
+            stats = windows[name]
+            if not stats.complete:
+                # Not enough history for this specific timeframe
+                # Example: Stock listed 10 days ago, cannot have D50 breakout.
+                continue
+            # All Time uses ALL_TIME_VOL_WINDOW days for volume reference
+            window_high = float(stats.high)
+            window_low = float(stats.low)
+            window_vol_avg = float(stats.vol_avg)
                 
             # 2. Check Breakout/Breakdown Condition
             if np.isnan(window_high) or np.isnan(window_low):
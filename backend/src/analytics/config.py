@@ -21,6 +21,7 @@ class BreakoutConfig:
     })
     
     VOLUME_MULT: float = 1.5
+    ALL_TIME_VOL_WINDOW: int = 50 # Volume reference for ALL_TIME breakouts
     MIN_HISTORY_DAYS: int = 50 # Ignore stocks with very less history for long breakouts
     
     # Priority for sorting
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd # Frames are passed in; no pandas import needed at runtime
+
+KEY_FIELDS = ('exchange', 'symbol', 'breakout_type')
+# Compared between scans; detected_at is restamped on every scan and only ships with added rows
+COMPARED_FIELDS = (
+    'breakout_level', 'close_price', 'breakout_pct', 'volume', 'avg_volume_n',
+    'volume_confirmation', 'trade_date', 'data_source_date'
+)
+
+
+def scan_records(df: "pd.DataFrame") -> List[dict]:
+    """Scan rows as JSON-ready dicts, same shape as the /breakouts response."""
+    if df.empty:
+        return []
+    df = df.copy()
+    if 'trade_date' in df.columns:
+        df['trade_date'] = df['trade_date'].astype(str)
+    if 'data_source_date' in df.columns:
+        df['data_source_date'] = df['data_source_date'].astype(str)
+    return df.fillna("").to_dict(orient="records")
+
+
+class ScanDiffLog:
+    """
+    Keyed diffs between consecutive breakout scans.
+
+    Rows are keyed by (exchange, symbol, breakout_type). Applying a new scan
+    compares it with the previous one and, if anything differs, records
+
+        {"version": v, "added": [rec...], "removed": [key...], "changed": [rec...]}
+
+    where changed records are the new row (without detected_at) plus
+    "fields", the names of the columns that moved (breakout_pct,
+    volume_confirmation, ...). Only COMPARED_FIELDS count as changes, so an
+    unchanged rescan yields no diff even though detected_at moved.
+    Versions increase by one per non-empty diff. The last `maxlen` diffs are
+    kept so a reconnecting client can catch up with since(version); older
+    versions (or one from another server process, see `epoch`) get None and
+    must reload the full list.
+    """
+
+    def __init__(self, maxlen: int = 500):
+        self.epoch = str(int(time.time() * 1000)) # Changes on every restart
+        self.version = 0
+        self._rows: Dict[Tuple[str, str, str], dict] = {}
+        self._diffs = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.source_mtime: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def _keyed(df: "pd.DataFrame") -> Dict[Tuple[str, str, str], dict]:
+        return {tuple(rec[k] for k in KEY_FIELDS): rec for rec in scan_records(df)}
+
+    def load(self, df: "pd.DataFrame", source_mtime: Optional[float] = None):
+        """Sets the baseline rows without recording a diff (e.g. the scan on disk at startup)."""
+        rows = self._keyed(df)
+        with self._lock:
+            self._rows = rows
+            self.source_mtime = source_mtime
+
+    def apply(self, df: "pd.DataFrame", source_mtime: Optional[float] = None) -> Optional[dict]:
+        """Diffs `df` (a full scan result) against the current rows. Returns the new diff or None."""
+        rows = self._keyed(df)
+        with self._lock:
+            self.source_mtime = source_mtime
+            previous = self._rows
+            added = [rec for key, rec in rows.items() if key not in previous]
+            removed = [dict(zip(KEY_FIELDS, key)) for key in previous if key not in rows]
+            changed = []
+            for key, rec in rows.items():
+                old = previous.get(key)
+                if old is None:
+                    continue
+                fields = [name for name in COMPARED_FIELDS if old.get(name) != rec.get(name)]
+                if fields:
+                    changed.append({**{k: v for k, v in rec.items() if k != 'detected_at'}, "fields": fields})
+            self._rows = rows
+            if not (added or removed or changed):
+                return None
+            self.version += 1
+            diff = {"version": self.version, "added": added, "removed": removed, "changed": changed}
+            self._diffs.append(diff)
+            return diff
+
+    def since(self, version: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """Diffs after `version`, oldest first; None if the log no longer covers it."""
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            if version == self.version:
+                return []
+            if version > self.version or version < 0:
+                return None
+            oldest = self._diffs[0]["version"] if self._diffs else self.version + 1
+            if version + 1 < oldest:
+                return None
+            return [d for d in self._diffs if d["version"] > version]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"epoch": self.epoch, "version": self.version, "breakouts": list(self._rows.values())}
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from typing import Dict
+from src.analytics.config import BreakoutConfig
+from src.analytics.windows import MultiWindowKernel
+
+RESULT_COLUMNS = [
+    'exchange', 'symbol', 'trade_date', 'breakout_type', 'breakout_level',
+    'close_price', 'breakout_pct', 'volume', 'avg_volume_n',
+    'volume_confirmation', 'data_source_date'
+]
+
+
+class VectorizedBreakoutEngine:
+    """
+    Cross-sectional version of BreakoutCalculator.
+
+    Works on right-aligned (symbols x days) arrays where each row's latest bar
+    is the last column and older columns are NaN-padded on the left (see
+    OHLCVPanel.packed). MultiWindowKernel derives every lookback from one
+    pass over all symbols at once; output matches BreakoutCalculator.compute
+    row for row.
+    """
+    def __init__(self, config: BreakoutConfig = None):
+        self.config = config or BreakoutConfig()
+        self.kernel = MultiWindowKernel(self.config.LOOKBACKS, self.config.ALL_TIME_VOL_WINDOW)
+
+    def evaluate(self, windows, close: np.ndarray, volume: np.ndarray):
+        """
+        Breakout/breakdown test for MultiWindowKernel output of any shape
+        (last bar per symbol, or every bar of a block). Yields, per lookback
+        with hits: (name, index tuple from np.nonzero, level, close, pct,
+        volume, avg_volume, volume_confirmation).
+        """
+        for name, stats in windows.items():
+            window_high, window_low, window_vol_avg = stats.high, stats.low, stats.vol_avg
+            valid = stats.complete & ~np.isnan(window_high) & ~np.isnan(window_low)
+
+            with np.errstate(invalid='ignore'):
+                bullish = valid & (close > window_high)
+                bearish = valid & ~bullish & (close < window_low)
+            hit = bullish | bearish
+            if not hit.any():
+                continue
+
+            idx = np.nonzero(hit)
+            level = np.where(bullish[idx], window_high[idx], window_low[idx])
+            c = close[idx]
+            pct = ((c - level) / level) * 100
+            avg = window_vol_avg[idx]
+            vol = volume[idx]
+            with np.errstate(invalid='ignore'):
+                confirmed = np.where(avg > 0, vol > (avg * self.config.VOLUME_MULT), False)
+            yield name, idx, level, c, pct, vol, avg, confirmed.astype(bool)
+
+    def compute(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                count: np.ndarray, meta: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        high/low/close/volume: right-aligned (symbols x days) float arrays.
+        count: bars per symbol. meta: per-symbol 'exchange', 'symbol', 'trade_date'
+        and optionally 'data_source_date' arrays.
+        """
+        windows = self.kernel.last(high, low, volume, count)
+        frames = []
+        for name, (idx,), level, c, pct, vol, avg, confirmed in self.evaluate(windows, close[:, -1], volume[:, -1]):
+            frames.append(pd.DataFrame({
+                'exchange': meta['exchange'][idx],
+                'symbol': meta['symbol'][idx],
+                'trade_date': meta['trade_date'][idx],
+                'breakout_type': name,
+                'breakout_level': np.round(level, 2),
+                'close_price': np.round(c, 2),
+                'breakout_pct': np.round(pct, 2),
+                'volume': vol.astype(np.int64),
+                'avg_volume_n': np.where(np.isnan(avg), 0, avg).astype(np.int64),
+                'volume_confirmation': confirmed,
+                'data_source_date': meta['data_source_date'][idx] if 'data_source_date' in meta else None,
+                '_row': idx,
+            }))
+
+        if not frames:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        # Per-symbol order like the calculator: symbol by symbol, lookbacks in config order
+        result = pd.concat(frames, ignore_index=True)
+        result = result.sort_values('_row', kind='stable').drop(columns=['_row']).reset_index(drop=True)
+        return result[RESULT_COLUMNS]
+
+    def compute_panel(self, panel, keys=None) -> pd.DataFrame:
+        """Runs the engine over an OHLCVPanel (optionally restricted to (symbol, exchange) keys)."""
+        packed = panel.packed(keys=keys, fields=('high', 'low', 'close', 'volume'))
+        if not packed or len(packed['count']) == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        count = packed['count']
+        keep = count >= 2 # BreakoutValidator minimum
+        index = panel.index
+        keys_idx = pd.MultiIndex.from_arrays([packed['exchange'][keep], packed['symbol'][keep]])
+        meta = {
+            'exchange': packed['exchange'][keep],
+            'symbol': packed['symbol'][keep],
+            'trade_date': pd.to_datetime(panel.days[packed['last_col'][keep]]).date,
+        }
+        if 'data_source_date' in index.columns:
+            meta['data_source_date'] = index['data_source_date'].reindex(keys_idx).to_numpy()
+
+        return self.compute(
+            packed['high'][keep], packed['low'][keep], packed['close'][keep], packed['volume'][keep],
+            count[keep], meta
+        )
@@ -0,0 +1,89 @@
+import os
+import pickle
+import threading
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+from config.settings import SCAN_RESULTS_PATH
+from src.analytics.config import BreakoutConfig
+
+
+class ScanResultCache:
+    """
+    Last scan's breakouts per symbol, keyed by the fingerprint of the history
+    they were computed from (panel fingerprint or manifest version/hash).
+
+    A scan asks dirty() for the symbols whose fingerprint moved, recomputes
+    only those, splices them in with update() and assembles the full result
+    with frame(). Like BreakoutStateStore it is derived data in one pickle:
+    a config change or an unreadable file means everything is dirty once.
+    `version` counts saved changes.
+    """
+    VERSION = 1 # Bump when the cached record layout changes
+
+    def __init__(self, config: BreakoutConfig = None, path: Optional[Path] = None):
+        self.config = config or BreakoutConfig()
+        self.path = path or SCAN_RESULTS_PATH
+        self.entries: Dict[Tuple[str, str], Tuple[Hashable, List[dict]]] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def _fingerprint(self) -> tuple:
+        return (self.VERSION, tuple(sorted(self.config.LOOKBACKS.items())), self.config.VOLUME_MULT,
+                self.config.ALL_TIME_VOL_WINDOW, self.config.MIN_HISTORY_DAYS)
+
+    def load(self):
+        self.entries = {}
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+            if payload.get("fingerprint") == self._fingerprint():
+                self.entries = payload["entries"]
+                self.version = payload.get("version", 0)
+        except Exception as e:
+            print(f"Scan result cache unreadable, recomputing: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.version += 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "wb") as f:
+                pickle.dump({"fingerprint": self._fingerprint(), "version": self.version, "entries": self.entries},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def dirty(self, keys: List[Tuple[str, str]], fingerprints: Dict[Tuple[str, str], Hashable]) -> List[Tuple[str, str]]:
+        """Keys ((exchange, symbol)) without a cached result for their current fingerprint."""
+        out = []
+        for key in keys:
+            fp = fingerprints.get(key)
+            cached = self.entries.get(key)
+            if fp is None or cached is None or cached[0] != fp:
+                out.append(key)
+        return out
+
+    def update(self, keys: List[Tuple[str, str]], fingerprints: Dict[Tuple[str, str], Hashable], results: pd.DataFrame):
+        """Stores fresh results for `keys` (symbols without rows get an empty entry)."""
+        grouped = {}
+        if results is not None and not results.empty:
+            grouped = {key: df.to_dict(orient="records")
+                       for key, df in results.groupby(['exchange', 'symbol'], sort=False)}
+        with self._lock:
+            for key in keys:
+                fp = fingerprints.get(key)
+                if fp is None:
+                    self.entries.pop(key, None) # Unknown inputs: never reuse
+                else:
+                    self.entries[key] = (fp, grouped.get(key, []))
+            self._dirty = True
+
+    def frame(self, keys: List[Tuple[str, str]]) -> pd.DataFrame:
+        records = [rec for key in keys for rec in self.entries.get(key, (None, []))[1]]
+        return pd.DataFrame(records)
@@ -0,0 +1,152 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import List, Optional
+from config.settings import SCAN_LOG_DIR, SCAN_LOG_RETENTION_DAYS
+from src.analytics.engine import RESULT_COLUMNS
+
+LOG_COLUMNS = ['scanned_at'] + RESULT_COLUMNS
+
+# Symbols and types repeat across every scan: dictionary-encoded on disk and in memory
+LOG_SCHEMA = pa.schema([
+    ('scanned_at', pa.timestamp('us')),
+    ('exchange', pa.dictionary(pa.int8(), pa.string())),
+    ('symbol', pa.dictionary(pa.int32(), pa.string())),
+    ('trade_date', pa.date32()),
+    ('breakout_type', pa.dictionary(pa.int8(), pa.string())),
+    ('breakout_level', pa.float64()),
+    ('close_price', pa.float64()),
+    ('breakout_pct', pa.float64()),
+    ('volume', pa.int64()),
+    ('avg_volume_n', pa.int64()),
+    ('volume_confirmation', pa.bool_()),
+    ('data_source_date', pa.date32()),
+])
+
+STAMP_FORMAT = "%H%M%S-%f"
+
+
+class ScanLog:
+    """
+    Append-only history of every breakout scan (breakout_scan.parquet only
+    holds the latest one).
+
+        <base>/YYYY-MM-DD/HHMMSS-ffffff.parquet   one scan, named by its start time
+
+    Files are never rewritten. Reads prune on the path first (day
+    directories, then scan times from the file names) and only then push
+    symbol/type filters down to the parquet row groups, so a query touches
+    only the scans in its time range however long the log grows. Days older
+    than the retention window are dropped on append.
+    """
+
+    def __init__(self, base_path: Optional[Path] = None, retention_days: int = SCAN_LOG_RETENTION_DAYS):
+        self.base_path = base_path or SCAN_LOG_DIR
+        self.retention_days = retention_days
+
+    # ---------- Write ----------
+
+    def _scan_path(self, scanned_at: datetime) -> Path:
+        return self.base_path / scanned_at.date().isoformat() / f"{scanned_at.strftime(STAMP_FORMAT)}.parquet"
+
+    def append(self, df: pd.DataFrame, scanned_at: Optional[datetime] = None) -> Path:
+        """Stores one scan result. Empty scans are stored too, so "no signals" is on record."""
+        scanned_at = scanned_at or datetime.now()
+        if df.empty:
+            # A bare DataFrame() reindexes to float64 columns, which Arrow cannot convert to the dictionary types
+            table = LOG_SCHEMA.empty_table()
+        else:
+            frame = df.reindex(columns=RESULT_COLUMNS).copy()
+            frame.insert(0, 'scanned_at', pd.Timestamp(scanned_at))
+            for col in ('trade_date', 'data_source_date'):
+                frame[col] = pd.to_datetime(frame[col]).dt.date
+            frame['avg_volume_n'] = frame['avg_volume_n'].fillna(0)
+            table = pa.Table.from_pandas(frame, schema=LOG_SCHEMA, preserve_index=False)
+
+        path = self._scan_path(scanned_at)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        pq.write_table(table, temp_path, compression="zstd")
+        os.replace(temp_path, path)
+        self.prune(scanned_at.date())
+        return path
+
+    def prune(self, today: Optional[date] = None) -> int:
+        """Removes day partitions older than the retention window. Returns the number removed."""
+        if not self.retention_days or not self.base_path.exists():
+            return 0
+        cutoff = (today or date.today()) - timedelta(days=self.retention_days)
+        removed = 0
+        for day, day_dir in self._days():
+            if day < cutoff:
+                shutil.rmtree(day_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+    # ---------- Read ----------
+
+    def _days(self):
+        if not self.base_path.exists():
+            return []
+        days = []
+        for p in self.base_path.iterdir():
+            try:
+                days.append((date.fromisoformat(p.name), p))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def files(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Path]:
+        """Scan files with start <= scanned_at <= end, from directory and file names only."""
+        paths = []
+        for day, day_dir in self._days():
+            if (start is not None and day < start.date()) or (end is not None and day > end.date()):
+                continue
+            for path in sorted(day_dir.glob("*.parquet")):
+                try:
+                    stamp = datetime.combine(day, datetime.strptime(path.stem, STAMP_FORMAT).time())
+                except ValueError:
+                    continue
+                if (start is None or stamp >= start) and (end is None or stamp <= end):
+                    paths.append(path)
+        return paths
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              symbol: Optional[str] = None, exchange: Optional[str] = None,
+              breakout_type: Optional[str] = None, confirmed_only: bool = False) -> pd.DataFrame:
+        """Logged signals between two scan times, optionally for one symbol / exchange / breakout type."""
+        paths = self.files(start, end)
+        if not paths:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        dataset = ds.dataset([str(p) for p in paths], format="parquet", schema=LOG_SCHEMA)
+        conditions = []
+        if symbol:
+            conditions.append(ds.field('symbol') == symbol)
+        if exchange:
+            conditions.append(ds.field('exchange') == exchange)
+        if breakout_type:
+            conditions.append(ds.field('breakout_type') == breakout_type)
+        if confirmed_only:
+            conditions.append(ds.field('volume_confirmation') == True)
+        expr = None
+        for cond in conditions:
+            expr = cond if expr is None else expr & cond
+        df = dataset.to_table(filter=expr).to_pandas()
+        # Dictionary columns come back as categoricals; callers expect plain strings
+        for col in ('exchange', 'symbol', 'breakout_type'):
+            df[col] = df[col].astype(str)
+        return df.sort_values('scanned_at', kind='stable').reset_index(drop=True)
+
+    def symbol_history(self, symbol: str, exchange: Optional[str] = None, days: int = 30) -> pd.DataFrame:
+        """Signals for one symbol over the last `days` calendar days."""
+        start = datetime.combine(date.today() - timedelta(days=days), time.min)
+        return self.query(start=start, symbol=symbol, exchange=exchange)
+
+    def breakouts_between(self, breakout_type: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Every `breakout_type` signal detected by scans between start and end."""
+        return self.query(start=start, end=end, breakout_type=breakout_type)
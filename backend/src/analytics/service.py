@@ -1,19 +1,74 @@
+import datetime
+import os
+import numpy as np
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+from typing import Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from config.settings import DATA_DIR, PROCESSED_DIR
+from config.settings import DATA_DIR, PROCESSED_DIR, SCAN_ENGINE, SCAN_DIRTY_ONLY
 from src.analytics.config import BreakoutConfig
 from src.analytics.calculator import BreakoutCalculator
+from src.analytics.engine import VectorizedBreakoutEngine
+from src.analytics.results import ScanResultCache
+from src.analytics.scan_log import ScanLog
+from src.analytics.state import BreakoutStateStore
 from src.historical.store import HistoricalDataCache
+from src.historical.panel import OHLCVPanel
+from src.utils.progress import Progress, checkpoint, track
+
+# Per-process state for the 'processes' scan engine
+_worker = {}
+
+
+def _init_scan_worker(panel_path, config: BreakoutConfig):
+    _worker['panel'] = OHLCVPanel(panel_path)
+    _worker['panel'].open()
+    _worker['calculator'] = BreakoutCalculator(config)
+
+
+def _scan_shard(keys: list) -> Tuple[dict, list]:
+    """
+    Runs the calculator for a shard of (symbol, exchange) keys; returns column
+    arrays and the (exchange, symbol) keys that raised.
+    """
+    panel, calculator = _worker['panel'], _worker['calculator']
+    rows, failed = [], []
+    for symbol, exchange in keys:
+        try:
+            df = panel.frame(symbol, exchange)
+            if not df.empty:
+                rows.extend(calculator.compute(df))
+        except Exception:
+            failed.append((exchange, symbol))
+    if not rows:
+        return {}, failed
+    columns = {name: [r[name] for r in rows] for name in rows[0]}
+    out = {name: np.array(values, dtype=object) for name, values in columns.items()}
+    for name in ('breakout_level', 'close_price', 'breakout_pct'):
+        out[name] = np.array(columns[name], dtype=np.float64)
+    for name in ('volume', 'avg_volume_n'):
+        out[name] = np.array(columns[name], dtype=np.int64)
+    out['volume_confirmation'] = np.array(columns['volume_confirmation'], dtype=bool)
+    out['trade_date'] = np.array(columns['trade_date'], dtype='datetime64[D]')
+    return out, failed
+
 
 class BreakoutService:
     MAX_WORKERS = 20 # Safe default for most PCs
+    SHARDS_PER_WORKER = 4 # Smaller shards even out uneven history lengths
 
     def __init__(self):
         self.config = BreakoutConfig()
         self.calculator = BreakoutCalculator(self.config)
+        self.engine_impl = VectorizedBreakoutEngine(self.config)
+        self.engine = SCAN_ENGINE
+        self.state = BreakoutStateStore(self.config)
+        self.scan_log = ScanLog()
+        self.results = ScanResultCache(self.config)
         self.cache = HistoricalDataCache()
+        self.panel = OHLCVPanel()
+        self.use_panel = False
+        self.failed: Set[Tuple[str, str]] = set() # (exchange, symbol) the last run_engine could not compute
         self.universe_path = PROCESSED_DIR / "universe.parquet"
         
     def _scan_stock(self, row) -> list:
@@ -21,8 +76,10 @@ class BreakoutService:
         exchange = row['exchange']
         
         try:
-            # Load Data
-            df = self.cache.load(symbol, exchange)
+            # Load Data (memory-mapped panel first, store as fallback)
+            df = self.panel.frame(symbol, exchange) if self.use_panel else pd.DataFrame()
+            if df.empty:
+                df = self.cache.load(symbol, exchange)
             if df.empty:
                 return []
                 
@@ -32,9 +89,192 @@ class BreakoutService:
             
         except Exception as e:
             # Silent fail or log? For mass scan, usually silent or lightweight log
+            # Recorded so a dirty-set scan does not cache "no breakouts" for it
+            self.failed.add((exchange, symbol))
             return []
 
-    def scan_universe(self, max_workers=60) -> pd.DataFrame:
+    def _scan_threaded(self, universe: pd.DataFrame, max_workers: int) -> list:
+        """Per-symbol BreakoutCalculator runs in a thread pool."""
+        all_breakouts = []
+        rows = [row for _, row in universe.iterrows()]
+        
+        # Parallel Execution
+        # Validating Input: Are we doing I/O? Yes (loading parquet files).
+        # Threading is suitable.
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_stock = {executor.submit(self._scan_stock, row): row['symbol'] for row in rows}
+            
+            for future in track(as_completed(future_to_stock), total=len(rows), desc="scan", pending=future_to_stock):
+                results = future.result()
+                if results:
+                    # Inject detection time
+                    now_str = datetime.datetime.now().isoformat()
+                    for r in results:
+                        r['detected_at'] = now_str
+                    all_breakouts.extend(results)
+        return all_breakouts
+
+    def _scan_vectorized(self, universe: pd.DataFrame) -> pd.DataFrame:
+        """All symbols at once over the memory-mapped panel (VectorizedBreakoutEngine)."""
+        keys = list(zip(universe['symbol'], universe['exchange']))
+        with Progress(total=len(keys), desc="scan") as progress:
+            breakout_df = self.engine_impl.compute_panel(self.panel, keys=keys)
+            progress.update(len(keys))
+        if not breakout_df.empty:
+            breakout_df['detected_at'] = datetime.datetime.now().isoformat()
+        return breakout_df
+
+    def _scan_processes(self, universe: pd.DataFrame, max_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Calculator runs spread over a process pool. Workers map the OHLCV panel
+        themselves (inputs never get pickled) and return columnar shard results.
+        """
+        workers = max_workers or os.cpu_count() or 1
+        keys = list(zip(universe['symbol'], universe['exchange']))
+        shard_size = max(1, -(-len(keys) // (workers * self.SHARDS_PER_WORKER)))
+        shards = [keys[i:i + shard_size] for i in range(0, len(keys), shard_size)]
+
+        columns = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scan_worker,
+                                 initargs=(self.panel.base_path, self.config)) as executor:
+            futures = [executor.submit(_scan_shard, shard) for shard in shards]
+            for future in track(as_completed(futures), total=len(futures), desc="scan shards", pending=futures):
+                result, failed = future.result()
+                self.failed.update(failed)
+                if result:
+                    columns.append(pd.DataFrame(result))
+
+        if not columns:
+            return pd.DataFrame()
+        breakout_df = pd.concat(columns, ignore_index=True)
+        breakout_df['trade_date'] = pd.to_datetime(breakout_df['trade_date']).dt.date
+        breakout_df['detected_at'] = datetime.datetime.now().isoformat()
+        return breakout_df
+
+    def _history_loaders(self, symbol: str, exchange: str):
+        """(load_since, load_full) callables for BreakoutStateStore.sync; panel first, store as fallback."""
+        if self.use_panel:
+            return (lambda start: self.panel.frame(symbol, exchange, start_date=start),
+                    lambda: self.panel.frame(symbol, exchange))
+
+        def load_since(start):
+            df = self.cache.load(symbol, exchange)
+            return df[pd.to_datetime(df['trade_date']) >= pd.Timestamp(start)]
+        return load_since, lambda: self.cache.load(symbol, exchange)
+
+    def _scan_incremental(self, universe: pd.DataFrame) -> list:
+        """
+        Evaluates each symbol from its persisted window state plus the latest
+        bar. Only bars added since the last scan are read; symbols whose
+        history was rewritten are rebuilt from full history.
+        """
+        manifest = self.cache.freshness().set_index(['exchange', 'symbol'])
+        entries = manifest.to_dict(orient='index')
+        self.state.load()
+        all_breakouts = []
+        now_str = datetime.datetime.now().isoformat()
+
+        for symbol, exchange in track(list(zip(universe['symbol'], universe['exchange'])), desc="scan"):
+            try:
+                load_since, load_full = self._history_loaders(symbol, exchange)
+                state = self.state.sync(symbol, exchange, entries.get((exchange, symbol)), load_since, load_full)
+                if state is None:
+                    continue
+                current = {**state.latest, 'symbol': symbol, 'exchange': exchange}
+                results = self.calculator.evaluate(state.windows(self.config), current)
+            except Exception:
+                self.failed.add((exchange, symbol))
+                continue
+            for r in results:
+                r['detected_at'] = now_str
+            all_breakouts.extend(results)
+
+        self.state.save()
+        print(f"State sync: {self.state.stats}")
+        return all_breakouts
+
+    def run_engine(self, universe: pd.DataFrame, engine: Optional[str] = None, max_workers: int = 60) -> pd.DataFrame:
+        """Unsorted breakouts for the (symbol, exchange) rows of `universe`; keys that raised end up in self.failed."""
+        self.use_panel = self.panel.open()
+        self.failed = set()
+        engine = engine or self.engine
+        if engine in ("vectorized", "processes") and not self.use_panel:
+            print("OHLCV panel not available; falling back to threaded scan.")
+            engine = "threads"
+        print(f"Scanning {len(universe)} stocks for breakouts... (engine: {engine}, source: {'panel' if self.use_panel else 'store'})")
+        
+        if engine == "vectorized":
+            return self._scan_vectorized(universe)
+        if engine == "processes":
+            return self._scan_processes(universe)
+        if engine == "incremental":
+            return pd.DataFrame(self._scan_incremental(universe))
+        return pd.DataFrame(self._scan_threaded(universe, max_workers))
+
+    def _fingerprints(self) -> Optional[dict]:
+        """
+        (exchange, symbol) -> fingerprint of the history the engines will read:
+        the panel's per-symbol content fingerprint, or the manifest's
+        version/hash/rows when scanning from the store. None if unknown.
+        """
+        if self.panel.open():
+            panel_fps = self.panel.fingerprints()
+            if panel_fps is None:
+                return None
+            return {key: ("panel", fp) for key, fp in panel_fps.items()}
+        manifest = self.cache.freshness()
+        if manifest.empty:
+            return None
+        return {
+            (ex, sym): ("store", version, content_hash, rows)
+            for ex, sym, version, content_hash, rows in zip(
+                manifest['exchange'], manifest['symbol'], manifest['version'], manifest['content_hash'], manifest['rows'])
+            if content_hash is not None and content_hash == content_hash
+        }
+
+    def run_dirty(self, universe: pd.DataFrame, engine: Optional[str] = None, max_workers: int = 60) -> pd.DataFrame:
+        """
+        Like run_engine, but only symbols whose history fingerprint changed since
+        the previous scan are recomputed; the rest come from ScanResultCache.
+        """
+        fingerprints = self._fingerprints()
+        if fingerprints is None:
+            print("No per-symbol fingerprints available; running a full scan.")
+            return self.run_engine(universe, engine, max_workers)
+
+        self.results.load()
+        keys = list(dict.fromkeys(zip(universe['exchange'], universe['symbol'])))
+        dirty = self.results.dirty(keys, fingerprints)
+        dirty_set = set(dirty)
+        clean = [key for key in keys if key not in dirty_set]
+        print(f"Dirty set: {len(dirty)} of {len(keys)} symbols changed since the last scan.")
+
+        fresh = pd.DataFrame()
+        if dirty:
+            sub = pd.DataFrame({'exchange': [k[0] for k in dirty], 'symbol': [k[1] for k in dirty]})
+            fresh = self.run_engine(sub, engine, max_workers)
+            if not fresh.empty:
+                fresh['trade_date'] = pd.to_datetime(fresh['trade_date']).dt.date
+        # Symbols that raised (e.g. a read during a store rewrite) stay dirty instead of caching "no breakouts"
+        computed = [key for key in dirty if key not in self.failed]
+        if len(computed) < len(dirty):
+            print(f"{len(dirty) - len(computed)} symbols failed to compute; they are retried on the next scan.")
+        self.results.update(computed, fingerprints, fresh)
+        self.results.save()
+
+        frames = [df for df in (self.results.frame(clean), fresh) if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def scan_universe(self, max_workers=60, engine: Optional[str] = None, full: bool = False) -> pd.DataFrame:
+        """
+        engine: 'threads' (per-symbol calculator in a thread pool),
+        'processes' (same calculator across processes, needs the OHLCV panel),
+        'vectorized' (whole-panel NumPy engine, needs the OHLCV panel) or
+        'incremental' (persisted per-symbol window state). Defaults to SCAN_ENGINE.
+        full: recompute every symbol instead of only those whose history
+        changed since the last scan (see SCAN_DIRTY_ONLY).
+        """
         if not self.universe_path.exists():
             print("Universe not found. Attempting to build universe...")
             from src.universe.builder import build_universe
@@ -50,13 +290,10 @@ class BreakoutService:
         from src.historical.service import HistoricalDataService
         hist_service = HistoricalDataService()
         
-        # Basic check: do we have at least 10 parquet files?
+        # Basic check: does the store hold any NSE history?
         has_data = False
         try:
-             # Check distinct files recursively or just check if NSE/BSE folders have content
-             nse_dir = hist_service.cache.base_path / "NSE"
-             if nse_dir.exists() and any(nse_dir.iterdir()):
-                 has_data = True
+             has_data = hist_service.cache.has_data()
         except:
             pass
             
@@ -68,35 +305,17 @@ class BreakoutService:
             except Exception as e:
                 print(f"Data download failed: {e}")
         
-        print(f"Scanning {len(universe)} stocks for breakouts...")
-        
-        all_breakouts = []
-        rows = [row for _, row in universe.iterrows()]
-        
-        # Parallel Execution
-        # Validating Input: Are we doing I/O? Yes (loading parquet files).
-        # Threading is suitable.
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_stock = {executor.submit(self._scan_stock, row): row['symbol'] for row in rows}
-            
-            for future in tqdm(as_completed(future_to_stock), total=len(rows)):
-                results = future.result()
-                if results:
-                    # Inject detection time
-                    import datetime
-                    now_str = datetime.datetime.now().isoformat()
-                    for r in results:
-                        r['detected_at'] = now_str
-                    all_breakouts.extend(results)
+        scanned_at = datetime.datetime.now()
+        if SCAN_DIRTY_ONLY and not full:
+            breakout_df = self.run_dirty(universe, engine, max_workers)
+        else:
+            breakout_df = self.run_engine(universe, engine, max_workers)
                     
         # Consolidate
-        if not all_breakouts:
+        if breakout_df.empty:
             print("No breakouts detected.")
             # Don't return early; proceed to save empty dataframe so API doesn't 404
             
-        breakout_df = pd.DataFrame(all_breakouts)
-        
         # Sort
         if not breakout_df.empty:
             # Custom sort by Breakout Type Priority then Pct
@@ -111,10 +330,14 @@ class BreakoutService:
              # Ensure schema is present for empty parquet if needed, or just save empty
              pass
         
+        # A cancelled job never publishes a partial scan
+        checkpoint()
+
         # Save
         # Atomic Save
         output_path = PROCESSED_DIR / "breakout_scan.parquet"
         temp_path = output_path.with_suffix(".tmp")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         
         breakout_df.to_parquet(temp_path, index=False)
         
@@ -127,6 +350,12 @@ class BreakoutService:
         print(f"Breakout Scan saved to {output_path}")
         print(f"Total Breakouts: {len(breakout_df)}")
 
+        # Keep every scan, not just the latest
+        try:
+            self.scan_log.append(breakout_df, scanned_at)
+        except Exception as e:
+            print(f"Scan log append failed: {e}")
+
         
         return breakout_df
 
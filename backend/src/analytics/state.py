@@ -0,0 +1,257 @@
+import math
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from config.settings import BREAKOUT_STATE_PATH
+from src.analytics.config import BreakoutConfig
+from src.analytics.windows import ALL_TIME, WindowStats
+
+
+class SymbolState:
+    """
+    Running window state of one symbol.
+
+    The latest bar is held on its own; every earlier bar has been pushed
+    into the windows (breakouts exclude the current candle). Per lookback:
+    monotonic deques of (index, value) for the window high/low and a running
+    volume sum, plus all-time high/low for ALL_TIME. Each new bar is O(number
+    of lookbacks) amortized.
+    """
+    __slots__ = (
+        'lookbacks', 'vol_windows', 'count', 'ath', 'atl', 'max_q', 'min_q',
+        'recent_vol', 'vol_sum', 'vol_cnt', 'latest', 'rows', 'first_date', 'content_hash'
+    )
+
+    def __init__(self, lookbacks: Tuple[int, ...], vol_windows: Tuple[int, ...]):
+        self.lookbacks = lookbacks # Fixed lookbacks (ALL_TIME excluded)
+        self.vol_windows = vol_windows # Fixed lookbacks + the ALL_TIME volume window
+        self.count = 0 # Bars seen, including the latest
+        self.ath = math.nan
+        self.atl = math.nan
+        self.max_q = {lb: deque() for lb in lookbacks}
+        self.min_q = {lb: deque() for lb in lookbacks}
+        self.recent_vol = deque(maxlen=max(vol_windows) + 1)
+        self.vol_sum = {w: 0.0 for w in vol_windows}
+        self.vol_cnt = {w: 0 for w in vol_windows}
+        self.latest = None # dict: trade_date, high, low, close, volume, data_source_date
+        self.rows = 0 # Manifest row count / first_date / hash the state was synced against
+        self.first_date = None
+        self.content_hash = None
+
+    @property
+    def depth(self) -> int:
+        """Bars needed to fill every window (plus the latest bar)."""
+        return max(max(self.lookbacks, default=1), max(self.vol_windows)) + 1
+
+    def _add_to_windows(self, bar: dict):
+        i = self.count - 1 # History index of the bar leaving the "latest" slot
+        high, low, vol = bar['high'], bar['low'], bar['volume']
+
+        if not math.isnan(high):
+            self.ath = high if math.isnan(self.ath) else max(self.ath, high)
+        if not math.isnan(low):
+            self.atl = low if math.isnan(self.atl) else min(self.atl, low)
+
+        for lb in self.lookbacks:
+            q = self.max_q[lb]
+            if not math.isnan(high):
+                while q and q[-1][1] <= high:
+                    q.pop()
+                q.append((i, high))
+            while q and q[0][0] <= i - lb:
+                q.popleft()
+
+            q = self.min_q[lb]
+            if not math.isnan(low):
+                while q and q[-1][1] >= low:
+                    q.pop()
+                q.append((i, low))
+            while q and q[0][0] <= i - lb:
+                q.popleft()
+
+        # Running volume sums: add the new bar, drop the one falling out of each window
+        valid = not math.isnan(vol)
+        for w in self.vol_windows:
+            if valid:
+                self.vol_sum[w] += vol
+                self.vol_cnt[w] += 1
+            if len(self.recent_vol) >= w:
+                old = self.recent_vol[-w]
+                if not math.isnan(old):
+                    self.vol_sum[w] -= old
+                    self.vol_cnt[w] -= 1
+        self.recent_vol.append(vol)
+
+    def push(self, bar: dict):
+        """Adds a new latest bar; the previous latest bar joins the windows."""
+        if self.latest is not None:
+            self._add_to_windows(self.latest)
+        self.latest = bar
+        self.count += 1
+
+    def windows(self, config: BreakoutConfig) -> Dict[str, WindowStats]:
+        """Window stats for the latest bar, in BreakoutCalculator.evaluate form."""
+        out = {}
+        for name, lookback in config.LOOKBACKS.items():
+            if lookback == ALL_TIME:
+                high, low = self.ath, self.atl
+                w = config.ALL_TIME_VOL_WINDOW
+                complete = self.count >= 2
+            else:
+                high = self.max_q[lookback][0][1] if self.max_q[lookback] else math.nan
+                low = self.min_q[lookback][0][1] if self.min_q[lookback] else math.nan
+                w = lookback
+                complete = self.count > lookback
+            vol_avg = self.vol_sum[w] / self.vol_cnt[w] if self.vol_cnt[w] > 0 else math.nan
+            out[name] = WindowStats(high, low, vol_avg, complete)
+        return out
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, lookbacks, vol_windows) -> "SymbolState":
+        """
+        Builds the state from full history. Only the last `depth` bars go
+        through the deques; older bars just seed the all-time high/low.
+        """
+        state = cls(lookbacks, vol_windows)
+        df = df.sort_values('trade_date')
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        tail = max(0, len(df) - state.depth)
+        if tail:
+            with np.errstate(invalid='ignore'):
+                state.ath = float(np.fmax.reduce(high[:tail]))
+                state.atl = float(np.fmin.reduce(low[:tail]))
+            # Deque/history indices continue from the skipped bars
+            state.count = tail
+        for bar in _bars(df.iloc[tail:]):
+            state.push(bar)
+        return state
+
+
+def _as_date(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).date()
+
+
+def _bars(df: pd.DataFrame):
+    has_source = 'data_source_date' in df.columns
+    for rec in df.itertuples(index=False):
+        yield {
+            'trade_date': _as_date(rec.trade_date),
+            'high': float(rec.high),
+            'low': float(rec.low),
+            'close': float(rec.close),
+            'volume': float(rec.volume),
+            'data_source_date': rec.data_source_date if has_source else None,
+        }
+
+
+class BreakoutStateStore:
+    """
+    Persisted SymbolState for the whole universe (one pickle, rewritten
+    atomically). It is derived data: a config change or an unreadable file
+    simply means every symbol is rebuilt from history on the next sync.
+    """
+    VERSION = 1 # Bump when SymbolState's layout changes
+
+    def __init__(self, config: BreakoutConfig = None, path: Optional[Path] = None):
+        self.config = config or BreakoutConfig()
+        self.path = path or BREAKOUT_STATE_PATH
+        self.lookbacks = tuple(sorted({lb for lb in self.config.LOOKBACKS.values() if lb != ALL_TIME}))
+        self.vol_windows = tuple(sorted(set(self.lookbacks) | {self.config.ALL_TIME_VOL_WINDOW}))
+        self.states: Dict[Tuple[str, str], SymbolState] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.stats = {"unchanged": 0, "advanced": 0, "rebuilt": 0}
+
+    def _fingerprint(self) -> tuple:
+        return (self.VERSION, self.lookbacks, self.vol_windows)
+
+    def load(self):
+        self.states = {}
+        self.stats = {"unchanged": 0, "advanced": 0, "rebuilt": 0}
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+            if payload.get("fingerprint") == self._fingerprint():
+                self.states = payload["states"]
+        except Exception as e:
+            print(f"Breakout state unreadable, rebuilding: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "wb") as f:
+                pickle.dump({"fingerprint": self._fingerprint(), "states": self.states}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def _rebuild(self, key, entry: dict, load_full: Callable[[], pd.DataFrame]) -> Optional[SymbolState]:
+        df = load_full()
+        if df is None or df.empty:
+            if self.states.pop(key, None) is not None:
+                self._dirty = True
+            return None
+        state = SymbolState.from_frame(df, self.lookbacks, self.vol_windows)
+        state.rows = int(entry['rows']) if entry else state.count
+        state.first_date = _as_date(entry['first_date'] if entry else df['trade_date'].min())
+        state.content_hash = entry.get('content_hash') if entry else None
+        self.states[key] = state
+        self._dirty = True
+        self.stats["rebuilt"] += 1
+        return state
+
+    def sync(self, symbol: str, exchange: str, entry: Optional[dict],
+             load_since: Callable[[object], pd.DataFrame],
+             load_full: Callable[[], pd.DataFrame]) -> Optional[SymbolState]:
+        """
+        Brings one symbol's state up to the store, using its manifest entry:
+
+        - same row count, last date and content hash: nothing to read
+        - more rows, same first date: reads bars from the state's latest
+          date on (load_since), checks that the anchor bar is unchanged and
+          pushes the new bars
+        - anything else (fewer rows, new first date, same rows with a new
+          hash, a changed anchor bar such as after a split adjustment, or no
+          state yet): rebuilds from load_full()
+        """
+        key = (exchange, symbol)
+        with self._lock:
+            state = self.states.get(key)
+            if state is None or entry is None or state.latest is None:
+                return self._rebuild(key, entry, load_full)
+
+            rows = int(entry['rows'] or 0)
+            if _as_date(entry['first_date']) != state.first_date or rows < state.rows:
+                return self._rebuild(key, entry, load_full)
+            if rows == state.rows:
+                same_content = entry.get('content_hash') is None or entry.get('content_hash') == state.content_hash
+                if same_content and _as_date(entry['last_date']) == state.latest['trade_date']:
+                    self.stats["unchanged"] += 1
+                    return state
+                return self._rebuild(key, entry, load_full)
+
+            new = load_since(state.latest['trade_date'])
+            bars = list(_bars(new.sort_values('trade_date'))) if new is not None and not new.empty else []
+            anchor = bars[0] if bars else None
+            if (anchor is None or anchor['trade_date'] != state.latest['trade_date']
+                    or any(anchor[f] != state.latest[f] for f in ('high', 'low', 'close', 'volume'))
+                    or len(bars) - 1 != rows - state.rows):
+                return self._rebuild(key, entry, load_full)
+
+            for bar in bars[1:]:
+                state.push(bar)
+            state.rows = rows
+            state.content_hash = entry.get('content_hash')
+            self._dirty = True
+            self.stats["advanced"] += 1
+            return state
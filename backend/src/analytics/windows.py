@@ -0,0 +1,154 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict
+
+ALL_TIME = -1 # BreakoutConfig flag for "all history before the bar"
+
+
+@dataclass
+class WindowStats:
+    """Window extrema / volume mean for one lookback (excluding the bar itself)."""
+    high: np.ndarray
+    low: np.ndarray
+    vol_avg: np.ndarray
+    complete: np.ndarray # Enough history before the bar for this lookback
+
+
+class MultiWindowKernel:
+    """
+    All BreakoutConfig lookbacks from one pass over the data.
+
+    Inputs are 1-D series or right-aligned (symbols x days) arrays, oldest
+    bar first; NaNs are skipped like pandas max/min/mean. Lookbacks are
+    nested, so:
+
+    - last():      prefix max/min and cumulative volume sums over the
+                   reversed tail; each lookback is a single column read.
+    - every_bar(): a sparse table answers any fixed window in O(1) per bar;
+                   cumulative sums give the volume means.
+
+    Adding lookbacks therefore costs one lookup (last) or one table query
+    (every_bar), not another scan of the history.
+    """
+
+    def __init__(self, lookbacks: Dict[str, int], all_time_vol_window: int = 50):
+        self.lookbacks = dict(lookbacks)
+        self.all_time_vol_window = all_time_vol_window
+
+    @staticmethod
+    def _as_float(a) -> np.ndarray:
+        return np.asarray(a, dtype=np.float64)
+
+    def _vol_window(self, lookback: int) -> int:
+        return self.all_time_vol_window if lookback == ALL_TIME else lookback
+
+    # ---------- Latest bar ----------
+
+    def last(self, high, low, volume, count=None) -> Dict[str, WindowStats]:
+        """
+        Stats for the window before the last bar of each row.
+        count: bars per row (default: full width); used for `complete`.
+        """
+        high, low, volume = self._as_float(high), self._as_float(low), self._as_float(volume)
+        width = high.shape[-1]
+        count = width if count is None else np.asarray(count)
+        depth = width - 1 # Bars before the current one
+
+        if depth > 0:
+            # Reversed tail: column k covers the k+1 bars right before the current one
+            hi_prefix = np.fmax.accumulate(high[..., -2::-1], axis=-1)
+            lo_prefix = np.fmin.accumulate(low[..., -2::-1], axis=-1)
+            tail_vol = volume[..., -2::-1]
+            vol_valid = ~np.isnan(tail_vol)
+            vol_sum = np.cumsum(np.where(vol_valid, tail_vol, 0.0), axis=-1)
+            vol_count = np.cumsum(vol_valid, axis=-1)
+
+        stats = {}
+        for name, lookback in self.lookbacks.items():
+            complete = count >= 2 if lookback == ALL_TIME else count > lookback
+            if depth == 0:
+                nan = np.full(high.shape[:-1], np.nan)
+                stats[name] = WindowStats(nan, nan, nan, complete)
+                continue
+
+            k = depth - 1 if lookback == ALL_TIME else min(lookback, depth) - 1
+            kv = min(self._vol_window(lookback), depth) - 1
+            n = vol_count[..., kv]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                vol_avg = np.where(n > 0, vol_sum[..., kv] / np.maximum(n, 1), np.nan)
+            stats[name] = WindowStats(hi_prefix[..., k], lo_prefix[..., k], vol_avg, complete)
+        return stats
+
+    # ---------- Every bar ----------
+
+    @staticmethod
+    def _sparse_table(values: np.ndarray, pad: int, max_len: int, op) -> list:
+        """levels[j][..., i] = op over padded[..., i:i + 2**j] (NaN padding on the left)."""
+        padded = np.concatenate([np.full(values.shape[:-1] + (pad,), np.nan), values], axis=-1)
+        levels = [padded]
+        span = 1
+        while span * 2 <= max_len:
+            prev = levels[-1]
+            levels.append(op(prev[..., :-span], prev[..., span:]))
+            span *= 2
+        return levels
+
+    @staticmethod
+    def _query(levels: list, pad: int, width: int, lookback: int, op) -> np.ndarray:
+        """op over bars [t - lookback, t - 1] for every t (padded index t - lookback + pad)."""
+        j = lookback.bit_length() - 1
+        span = 1 << j
+        table = levels[j]
+        lo = pad - lookback
+        left = table[..., lo:lo + width]
+        right = table[..., lo + lookback - span:lo + lookback - span + width]
+        return op(left, right)
+
+    def every_bar(self, high, low, volume, count=None) -> Dict[str, WindowStats]:
+        """
+        Stats for the window before every bar: arrays shaped like the input.
+        Memory grows with log2(longest fixed lookback) copies of the input,
+        so chunk large panels by symbol.
+        """
+        high, low, volume = self._as_float(high), self._as_float(low), self._as_float(volume)
+        width = high.shape[-1]
+        count = np.full(high.shape[:-1], width) if count is None else np.asarray(count)
+        # Bars before column t (negative in the left padding of right-aligned rows)
+        bars_before = np.arange(width) - (width - count)[..., None]
+
+        fixed = [lb for lb in self.lookbacks.values() if lb != ALL_TIME]
+        pad = max(fixed, default=1)
+        hi_levels = self._sparse_table(high, pad, pad, np.fmax)
+        lo_levels = self._sparse_table(low, pad, pad, np.fmin)
+
+        # Volume sums over [t - n, t - 1] from cumulative sums with n leading zeros
+        vol_pad = max([self._vol_window(lb) for lb in self.lookbacks.values()] + [1])
+        vol_valid = ~np.isnan(volume)
+        zeros = np.zeros(volume.shape[:-1] + (vol_pad + 1,))
+        vol_sum = np.concatenate([zeros, np.cumsum(np.where(vol_valid, volume, 0.0), axis=-1)], axis=-1)
+        vol_count = np.concatenate([zeros, np.cumsum(vol_valid, axis=-1)], axis=-1)
+
+        # All-time extrema: running max/min shifted one bar right
+        nan_col = np.full(high.shape[:-1] + (1,), np.nan)
+        ath = np.concatenate([nan_col, np.fmax.accumulate(high, axis=-1)[..., :-1]], axis=-1)
+        atl = np.concatenate([nan_col, np.fmin.accumulate(low, axis=-1)[..., :-1]], axis=-1)
+
+        stats = {}
+        for name, lookback in self.lookbacks.items():
+            if lookback == ALL_TIME:
+                window_high, window_low = ath, atl
+                complete = bars_before >= 1
+            else:
+                window_high = self._query(hi_levels, pad, width, lookback, np.fmax)
+                window_low = self._query(lo_levels, pad, width, lookback, np.fmin)
+                complete = bars_before >= lookback
+
+            n = self._vol_window(lookback)
+            hi_idx = slice(vol_pad, vol_pad + width) # cumsum up to t - 1
+            lo_idx = slice(vol_pad - n, vol_pad - n + width)
+            s = vol_sum[..., hi_idx] - vol_sum[..., lo_idx]
+            c = vol_count[..., hi_idx] - vol_count[..., lo_idx]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                vol_avg = np.where(c > 0, s / np.maximum(c, 1), np.nan)
+            stats[name] = WindowStats(window_high, window_low, vol_avg, complete)
+        return stats
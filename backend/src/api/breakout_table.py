@@ -0,0 +1,125 @@
+import json
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.analytics.diff import scan_records
+from src.api.dismissed import DismissedStore
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class BreakoutTable:
+    """
+    The latest breakout scan, resident in memory for GET /breakouts.
+
+    The scan file is re-read only when its mtime/size changes; the
+    not-dismissed mask is rebuilt only when the DismissedStore version
+    moves (set lookups, no file I/O). Each load precomputes boolean
+    masks per exchange and per breakout type, so any filter combination is
+    an OR within a filter and an AND across filters, with the row order of
+    the scan file kept. Serialized responses are cached per normalized filter
+    key until the next scan or dismissal.
+    """
+
+    def __init__(self, scan_path: Path, dismissed: DismissedStore):
+        self.scan_path = scan_path
+        self.dismissed = dismissed
+        self._lock = threading.Lock()
+        self._scan_stamp = None
+        self._dismissed_version = None
+        self._records: List[dict] = []
+        self._by_exchange: Dict[str, np.ndarray] = {}
+        self._by_type: Dict[str, np.ndarray] = {}
+        self._confirmed = np.zeros(0, dtype=bool)
+        self._uid = np.zeros(0, dtype=object)
+        self._visible = np.zeros(0, dtype=bool) # Not dismissed
+        self._responses: Dict[tuple, bytes] = {}
+        self.stats = {"scan_loads": 0, "dismissed_loads": 0, "hits": 0, "misses": 0}
+
+    # ---------- Load ----------
+
+    def _load_scan(self):
+        df = pd.read_parquet(self.scan_path)
+        self._records = scan_records(df)
+        n = len(df)
+        if n:
+            exchange = df['exchange'].to_numpy(dtype=object)
+            types = df['breakout_type'].to_numpy(dtype=object)
+            self._by_exchange = {ex: exchange == ex for ex in pd.unique(exchange)}
+            self._by_type = {t: types == t for t in pd.unique(types)}
+            self._confirmed = df['volume_confirmation'].fillna(False).to_numpy(dtype=bool)
+            self._uid = (df['exchange'] + ":" + df['symbol']).to_numpy(dtype=object)
+        else:
+            self._by_exchange, self._by_type = {}, {}
+            self._confirmed = np.zeros(0, dtype=bool)
+            self._uid = np.zeros(0, dtype=object)
+        self.stats["scan_loads"] += 1
+
+    def _load_dismissed(self):
+        dismissed = self.dismissed.items()
+        self._visible = np.fromiter((uid not in dismissed for uid in self._uid), dtype=bool, count=len(self._uid))
+        self.stats["dismissed_loads"] += 1
+
+    def refresh(self) -> bool:
+        """Reloads whatever changed on disk. Returns False if there is no scan file."""
+        scan_stamp = _stamp(self.scan_path)
+        if scan_stamp is None:
+            return False
+        dismissed_version = self.dismissed.version
+        if scan_stamp == self._scan_stamp and dismissed_version == self._dismissed_version:
+            return True
+        with self._lock:
+            if scan_stamp != self._scan_stamp:
+                self._load_scan()
+                self._scan_stamp = scan_stamp
+                self._dismissed_version = None # Masks are per scan
+            if dismissed_version != self._dismissed_version:
+                self._load_dismissed()
+                self._dismissed_version = dismissed_version
+            self._responses = {}
+        return True
+
+    # ---------- Query ----------
+
+    def _mask(self, masks: Dict[str, np.ndarray], values) -> np.ndarray:
+        out = np.zeros(len(self._records), dtype=bool)
+        for value in values:
+            mask = masks.get(value)
+            if mask is not None:
+                out |= mask
+        return out
+
+    def query(self, exchange: Optional[List[str]] = None, timeframe: Optional[List[str]] = None,
+              confirmed_only: bool = True) -> Optional[bytes]:
+        """JSON body for the filters (None: no scan file). Served from the response cache when possible."""
+        if not self.refresh():
+            return None
+        key = (tuple(sorted(set(exchange))) if exchange else None,
+               tuple(sorted(set(timeframe))) if timeframe else None,
+               bool(confirmed_only))
+        body = self._responses.get(key)
+        if body is not None:
+            self.stats["hits"] += 1
+            return body
+
+        with self._lock:
+            mask = self._visible.copy()
+            if key[0] is not None:
+                mask &= self._mask(self._by_exchange, key[0])
+            if key[1] is not None:
+                mask &= self._mask(self._by_type, key[1])
+            if confirmed_only:
+                mask &= self._confirmed
+            records = self._records
+            body = json.dumps([records[i] for i in np.flatnonzero(mask)], default=str).encode()
+            self._responses[key] = body
+        self.stats["misses"] += 1
+        return body
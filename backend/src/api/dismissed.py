@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List
+
+
+class DismissedStore:
+    """
+    Dismissed signals ("EXCHANGE:SYMBOL") as an in-memory set behind a lock.
+
+    Every change is appended to a journal (one JSON event per line) before
+    it is acknowledged; the set itself is only written out as a snapshot
+    (the old dismissed.json format, a plain list) every `snapshot_every`
+    events, after which the journal starts over. load() rebuilds the set
+    from snapshot + journal; a torn last journal line from a crash is
+    ignored.
+
+    `version` increases on every change so readers (BreakoutTable) can tell
+    when their masks are stale without touching disk.
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, snapshot_every: int = 500):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.snapshot_every = snapshot_every
+        self.version = 0
+        self._items = set()
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_events = 0
+        self._loaded = False
+
+    # ---------- Persistence ----------
+
+    def load(self):
+        with self._lock:
+            items = set()
+            if self.snapshot_path.exists():
+                try:
+                    with open(self.snapshot_path, "r") as f:
+                        items = set(json.load(f))
+                except Exception as e:
+                    print(f"Dismissed snapshot unreadable, starting from journal only: {e}")
+            events = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, "r") as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue # Torn write
+                        if event.get("op") == "dismiss":
+                            items.add(event["id"])
+                        elif event.get("op") == "restore":
+                            items.discard(event["id"])
+                        events += 1
+            self._items = items
+            self._journal_events = events
+            self._loaded = True
+            self.version += 1
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _append(self, op: str, unique_id: str):
+        if self._journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "a")
+        self._journal.write(json.dumps({"op": op, "id": unique_id}) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_events += 1
+
+    def _snapshot(self):
+        """Writes the set out and empties the journal (lock held)."""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(sorted(self._items), f)
+        os.replace(temp_path, self.snapshot_path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.journal_path.unlink(missing_ok=True)
+        self._journal_events = 0
+
+    def snapshot(self):
+        with self._lock:
+            self._ensure_loaded()
+            self._snapshot()
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # ---------- Operations ----------
+
+    def dismiss(self, unique_id: str) -> bool:
+        """Returns False if it was already dismissed."""
+        with self._lock:
+            self._ensure_loaded()
+            if unique_id in self._items:
+                return False
+            self._append("dismiss", unique_id)
+            self._items.add(unique_id)
+            self.version += 1
+            if self._journal_events >= self.snapshot_every:
+                self._snapshot()
+            return True
+
+    def restore(self, unique_id: str) -> bool:
+        """Returns False if it was not dismissed."""
+        with self._lock:
+            self._ensure_loaded()
+            if unique_id not in self._items:
+                return False
+            self._append("restore", unique_id)
+            self._items.discard(unique_id)
+            self.version += 1
+            if self._journal_events >= self.snapshot_every:
+                self._snapshot()
+            return True
+
+    def __contains__(self, unique_id: str) -> bool:
+        self._ensure_loaded()
+        return unique_id in self._items
+
+    def items(self) -> frozenset:
+        with self._lock:
+            self._ensure_loaded()
+            return frozenset(self._items)
+
+    def list(self) -> List[str]:
+        return sorted(self.items())
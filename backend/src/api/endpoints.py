@@ -1,26 +1,70 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-import pandas as pd
-from datetime import datetime
+import json
+import threading
+from datetime import date, datetime, timedelta
 
-from src.market_state.resolver import MarketStateResolver
-from src.historical.store import HistoricalDataCache
-from config.settings import PROCESSED_DIR
+from src.market_state.resolver import get_market_resolver
+from src.analytics.diff import ScanDiffLog
+from src.api.dismissed import DismissedStore
+from config.settings import PROCESSED_DIR, SCAN_DIFF_LOG_SIZE, DISMISSED_SNAPSHOT_EVERY, HISTORY_CACHE_SYMBOLS, HISTORY_BATCH_MAX_SYMBOLS
 
 router = APIRouter()
 
+# Scan-to-scan diffs pushed over the WebSocket (fed by broadcast_updates in main)
+scan_diffs = ScanDiffLog(SCAN_DIFF_LOG_SIZE)
+
+# Dismissed signals: in-memory set, journaled to disk (dismissed.json is the snapshot)
+dismissed = DismissedStore(PROCESSED_DIR / "dismissed.json", PROCESSED_DIR / "dismissed.journal", DISMISSED_SNAPSHOT_EVERY)
+
+# State backed by pandas/pyarrow is created on first use, so the app starts
+# (and answers status requests) without importing the data stack
+_state_lock = threading.Lock()
+history_cache = None
+breakout_table = None
+
+def get_history_cache():
+    """
+    Per-symbol chart history, invalidated by panel generation / manifest content hash.
+    The OHLCV panel is shared across requests; its pages are shared between workers via the OS page cache.
+    """
+    global history_cache
+    with _state_lock:
+        if history_cache is None:
+            from src.historical.panel import OHLCVPanel
+            from src.api.history_cache import HistoryResponseCache
+            history_cache = HistoryResponseCache(OHLCVPanel(), HISTORY_CACHE_SYMBOLS)
+    return history_cache
+
+def get_breakout_table():
+    """Latest scan kept in memory; reloaded when the scan file or dismissed set changes."""
+    global breakout_table
+    with _state_lock:
+        if breakout_table is None:
+            from src.api.breakout_table import BreakoutTable
+            breakout_table = BreakoutTable(PROCESSED_DIR / "breakout_scan.parquet", dismissed)
+    return breakout_table
+
 @router.get("/system/status")
 def get_system_status():
     """Get current market state and system time."""
-    resolver = MarketStateResolver()
+    resolver = get_market_resolver()
     context = resolver.resolve()
     return {
         "system_time": context.run_timestamp.isoformat(),
         "market_state": context.state.value,
         "trade_date": context.effective_trade_date.isoformat(),
-        "is_market_open": context.is_market_open
+        "is_market_open": context.is_market_open,
+        "next_state_change": resolver.next_change(context.run_timestamp).isoformat()
     }
 
+@router.get("/system/scheduler")
+def get_scheduler_status():
+    """Scan scheduler: next planned run and reason, the running scan, last run duration."""
+    from src.api.scheduler import get_scan_scheduler
+    return get_scan_scheduler().status()
+
 @router.get("/breakouts")
 def get_breakouts(
     exchange: Optional[List[str]] = Query(None),
@@ -28,44 +72,43 @@ def get_breakouts(
     confirmed_only: bool = True
 ):
     """Get breakout scan results with optional filtering."""
-    path = PROCESSED_DIR / "breakout_scan.parquet"
-    if not path.exists():
+    body = get_breakout_table().query(exchange, timeframe, confirmed_only)
+    if body is None:
         raise HTTPException(status_code=404, detail="Breakout scan data not found. Please run the backend scan.")
-    
-    df = pd.read_parquet(path)
-    
+    return Response(content=body, media_type="application/json")
+
+@router.get("/breakouts/changes")
+def get_breakout_changes(since: int, epoch: Optional[str] = None):
+    """Scan diffs after version `since`; reset=true means reload /breakouts instead."""
+    diffs = scan_diffs.since(since, epoch)
+    return {
+        "epoch": scan_diffs.epoch,
+        "version": scan_diffs.version,
+        "reset": diffs is None,
+        "diffs": diffs or [],
+    }
+
+@router.get("/breakouts/log")
+def get_breakout_log(
+    symbol: Optional[str] = None,
+    exchange: Optional[str] = None,
+    breakout_type: Optional[str] = None,
+    days: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    confirmed_only: bool = False
+):
+    """Signals from past scans (scan log), e.g. one symbol over the last N days or one type between two times."""
+    if days is not None and start is None:
+        start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=days)
+    from src.analytics.scan_log import ScanLog
+    df = ScanLog().query(start=start, end=end, symbol=symbol, exchange=exchange,
+                         breakout_type=breakout_type, confirmed_only=confirmed_only)
     if df.empty:
         return []
-        
-    # Load Dismissed List
-    dismissed_path = PROCESSED_DIR / "dismissed.json"
-    dismissed_symbols = []
-    if dismissed_path.exists():
-        try:
-            import json
-            with open(dismissed_path, "r") as f:
-                dismissed_symbols = json.load(f)
-        except Exception:
-            pass
-            
-    # Filter specific exchange/symbol combinations
-    # Currently dismissed_symbols can be list of "EXCHANGE:SYMBOL" strings
-    if dismissed_symbols:
-        df['unique_id'] = df['exchange'] + ":" + df['symbol']
-        df = df[~df['unique_id'].isin(dismissed_symbols)]
-        
-    # Apply filters
-    if exchange:
-        df = df[df['exchange'].isin(exchange)]
-        
-    if timeframe:
-        df = df[df['breakout_type'].isin(timeframe)]
-        
-    if confirmed_only:
-        df = df[df['volume_confirmation'] == True]
-        
-    # Convert to list of dicts for JSON response
-    # Handle NaN values for JSON compliance
+    df['scanned_at'] = df['scanned_at'].astype(str)
+    for col in ('trade_date', 'data_source_date'):
+        df[col] = df[col].astype(str)
     return df.fillna("").to_dict(orient="records")
 
 from pydantic import BaseModel
@@ -77,76 +120,132 @@ class DismissRequest(BaseModel):
 @router.post("/dismiss")
 def dismiss_breakout(request: DismissRequest):
     """Dismiss a breakout signal (add to ignored list)."""
-    dismissed_path = PROCESSED_DIR / "dismissed.json"
-    
     unique_id = f"{request.exchange}:{request.symbol}"
-    
-    current_list = []
-    if dismissed_path.exists():
-        try:
-            import json
-            with open(dismissed_path, "r") as f:
-                current_list = json.load(f)
-        except Exception:
-            pass
-            
-    if unique_id not in current_list:
-        current_list.append(unique_id)
-        import json
-        with open(dismissed_path, "w") as f:
-            json.dump(current_list, f)
-            
+    dismissed.dismiss(unique_id)
     return {"status": "success", "message": f"Dismissed {unique_id}"}
 
 @router.post("/restore")
 def restore_breakout(request: DismissRequest):
     """Restore a dismissed breakout signal."""
-    dismissed_path = PROCESSED_DIR / "dismissed.json"
-    
     unique_id = f"{request.exchange}:{request.symbol}"
-    
-    current_list = []
-    if dismissed_path.exists():
-        try:
-            import json
-            with open(dismissed_path, "r") as f:
-                current_list = json.load(f)
-        except Exception:
-            pass
-            
-    if unique_id in current_list:
-        current_list.remove(unique_id)
-        import json
-        with open(dismissed_path, "w") as f:
-            json.dump(current_list, f)
-            
+    dismissed.restore(unique_id)
     return {"status": "success", "message": f"Restored {unique_id}"}
 
 @router.get("/dismissed")
 def get_dismissed_list():
     """Get list of dismissed signals."""
-    dismissed_path = PROCESSED_DIR / "dismissed.json"
-    if dismissed_path.exists():
-        try:
-            import json
-            with open(dismissed_path, "r") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+    return dismissed.list()
+
 
 
+@router.get("/history")
+def get_history_batch(
+    ids: List[str] = Query(..., description="exchange:symbol ids, repeated or comma-separated"),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    last_n: Optional[int] = Query(None, ge=1),
+    points: Optional[int] = Query(None, ge=3),
+    downsample: str = Query("ohlc", pattern="^(ohlc|lttb)$"),
+    fields: Optional[List[str]] = Query(None, description="Subset of open/high/low/close/volume")
+):
+    """
+    History for many symbols in one request (watchlists, sparkline grids).
+
+    Streams NDJSON, one columnar record per symbol ({"symbol", "exchange",
+    "trade_date": [...], "close": [...], ...}, or {"error": "not_found"}),
+    in request order except that symbols needing a store read come last,
+    after one bulk read for all of them.
+    """
+    keys = []
+    for item in ids:
+        for uid in item.split(","):
+            exchange, sep, symbol = uid.strip().partition(":")
+            if not sep or not exchange or not symbol:
+                raise HTTPException(status_code=400, detail=f"Invalid id '{uid}', expected EXCHANGE:SYMBOL")
+            if (exchange, symbol) not in keys:
+                keys.append((exchange, symbol))
+    if len(keys) > HISTORY_BATCH_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {HISTORY_BATCH_MAX_SYMBOLS} symbols per request")
+
+    cache = get_history_cache()
+
+    def lines():
+        for (exchange, symbol), entry in cache.entries(keys):
+            if entry is None:
+                record = {"symbol": symbol, "exchange": exchange, "error": "not_found"}
+            else:
+                record = cache.columns(entry, start, end, last_n, points, downsample, fields)
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @router.get("/history/{symbol}")
-def get_history(symbol: str, exchange: str = "NSE"):
-    """Get historical candle data for a symbol."""
-    cache = HistoricalDataCache()
-    df = cache.load(symbol, exchange)
-    
-    if df.empty:
+def get_history(
+    symbol: str,
+    exchange: str = "NSE",
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    last_n: Optional[int] = Query(None, ge=1),
+    points: Optional[int] = Query(None, ge=3, description="Downsample to about this many points"),
+    downsample: str = Query("ohlc", pattern="^(ohlc|lttb)$"),
+    format: str = Query("rows", pattern="^(rows|columns|arrow)$")
+):
+    """
+    Get historical candle data for a symbol.
+
+    from/to/last_n limit the range; points downsamples it (ohlc: merged
+    candles, lttb: representative bars by close); format is rows (list of
+    dicts), columns (one array per field) or arrow (Arrow IPC stream).
+    Rows carry each bar's data_source_date and is_last_trading_day as the
+    store holds them (a merged candle: its last bar's); columns and arrow
+    carry the OHLCV fields and the latest data_source_date only.
+    """
+    rendered = get_history_cache().response(symbol, exchange, start, end, last_n, points, downsample, format)
+    if rendered is None:
         raise HTTPException(status_code=404, detail=f"No data found for {symbol}")
-        
-    # Ensure dates are strings
-    df['trade_date'] = df['trade_date'].astype(str)
-    
-    return df.to_dict(orient="records")
+    body, media_type = rendered
+    return Response(content=body, media_type=media_type)
+
+class JobRequest(BaseModel):
+    kind: str # 'universe' | 'history' | 'scan' | 'refresh' (history then scan)
+    ingest: Optional[str] = None # history: 'batch' | 'threads' | 'async'
+    engine: Optional[str] = None # scan: breakout engine (default: SCAN_ENGINE setting)
+    full: Optional[bool] = None # scan: recompute every symbol
+
+@router.post("/jobs", status_code=202)
+def submit_job(request: JobRequest):
+    """Start a pipeline phase as a background job; poll /jobs/{id} for progress."""
+    from src.api.jobs import get_job_manager
+    params = {"ingest": request.ingest, "engine": request.engine, "full": request.full}
+    try:
+        job = get_job_manager().submit(request.kind, params, source="api")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.as_dict()
+
+@router.get("/jobs")
+def list_jobs(kind: Optional[str] = None, status: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    """Active jobs, then finished ones, newest first."""
+    from src.api.jobs import get_job_manager
+    return get_job_manager().list(kind, status, limit)
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, live progress (done/total, rate, ETA) and result of a job."""
+    from src.api.jobs import get_job_manager
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Ask a queued or running job to stop at its next checkpoint."""
+    from src.api.jobs import get_job_manager
+    manager = get_job_manager()
+    job = manager.cancel(job_id)
+    if job is None:
+        if manager.get(job_id) is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already finished")
+    return job
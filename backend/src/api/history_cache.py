@@ -0,0 +1,234 @@
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from src.historical.downsample import lttb_indices, ohlc_buckets
+from src.historical.panel import OHLCVPanel
+from src.historical.store import HistoricalDataCache
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+ROW_FIELDS = ('data_source_date', 'is_last_trading_day') # Per bar in the rows format, as the store holds them
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class SymbolHistory:
+    """One symbol's full history as column arrays, plus rendered responses for it."""
+    __slots__ = ('token', 'days', 'dates', 'columns', 'row_fields', 'meta', 'responses')
+
+    def __init__(self, token: tuple, df: pd.DataFrame, meta: dict):
+        self.token = token
+        trade_date = pd.to_datetime(df['trade_date'])
+        self.days = trade_date.to_numpy(dtype='datetime64[D]')
+        self.dates = np.array([d.isoformat() for d in trade_date.dt.date], dtype=object) # Formatted once
+        self.columns = {f: df[f].to_numpy(dtype=np.float64) for f in PRICE_FIELDS if f in df.columns}
+        self.row_fields = {}
+        if 'data_source_date' in df.columns:
+            source_date = pd.to_datetime(df['data_source_date'])
+            self.row_fields['data_source_date'] = np.array(
+                [None if pd.isna(d) else d.date().isoformat() for d in source_date], dtype=object)
+        if 'is_last_trading_day' in df.columns:
+            self.row_fields['is_last_trading_day'] = df['is_last_trading_day'].fillna(False).to_numpy(dtype=bool)
+        self.meta = meta
+        self.responses: "OrderedDict[tuple, Tuple[bytes, str]]" = OrderedDict()
+
+
+def _json_values(values: np.ndarray, as_int: bool = False) -> list:
+    """Floats for JSON with NaN as null."""
+    if as_int:
+        return [None if v != v else int(v) for v in values.tolist()]
+    return [None if v != v else v for v in values.tolist()]
+
+
+class HistoryResponseCache:
+    """
+    Chart history per symbol for GET /history.
+
+    The first request for a symbol loads its full history (OHLCV panel,
+    falling back to the history store) into column arrays with the dates
+    already formatted. Range selection is a binary search on those arrays,
+    downsampling runs on the selected slice, and the rendered body is kept
+    per (range, points, mode, format) for that symbol.
+
+    Entries carry a token of the panel generation and the symbol's manifest
+    content hash / row count; when either moves (the store updated the
+    symbol or the panel was rebuilt) the entry is reloaded. The number of
+    symbols kept is bounded (LRU).
+    """
+    RESPONSES_PER_SYMBOL = 16
+
+    def __init__(self, panel: OHLCVPanel, max_symbols: int = 256):
+        self.panel = panel
+        self.max_symbols = max_symbols
+        self.store = None
+        self._entries: "OrderedDict[Tuple[str, str], SymbolHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "hits": 0, "renders": 0}
+
+    def _store(self) -> HistoricalDataCache:
+        if self.store is None:
+            self.store = HistoricalDataCache()
+        return self.store
+
+    def _token(self, symbol: str, exchange: str) -> tuple:
+        generation = self.panel.generation if self.panel.open() else None
+        entry = self._store().manifest.get(symbol, exchange) or {}
+        return generation, entry.get('content_hash'), entry.get('rows')
+
+    def _panel_frame(self, symbol: str, exchange: str, token: tuple) -> pd.DataFrame:
+        """Panel frame if it carries the per-bar row fields (generations built before them do not)."""
+        df = self.panel.frame(symbol, exchange) if token[0] is not None else pd.DataFrame()
+        return df if all(f in df.columns for f in ROW_FIELDS) else pd.DataFrame()
+
+    def _load(self, symbol: str, exchange: str, token: tuple) -> Optional[SymbolHistory]:
+        df = self._panel_frame(symbol, exchange, token)
+        if df.empty:
+            df = self._store().load(symbol, exchange)
+        return self._from_frame(symbol, exchange, token, df)
+
+    def _from_frame(self, symbol: str, exchange: str, token: tuple, df: pd.DataFrame) -> Optional[SymbolHistory]:
+        if df.empty:
+            return None
+        df = df.sort_values('trade_date')
+        meta = {'symbol': symbol, 'exchange': exchange}
+        if 'data_source_date' in df.columns:
+            meta['data_source_date'] = str(df['data_source_date'].iloc[-1])
+        self.stats["loads"] += 1
+        return SymbolHistory(token, df, meta)
+
+    def entry(self, symbol: str, exchange: str) -> Optional[SymbolHistory]:
+        key = (exchange, symbol)
+        token = self._token(symbol, exchange)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.token == token:
+                self._entries.move_to_end(key)
+                return entry
+        return self._remember(key, self._load(symbol, exchange, token))
+
+    def _remember(self, key: Tuple[str, str], entry: Optional[SymbolHistory]) -> Optional[SymbolHistory]:
+        with self._lock:
+            if entry is None:
+                self._entries.pop(key, None)
+                return None
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_symbols:
+                self._entries.popitem(last=False)
+        return entry
+
+    def entries(self, keys: List[Tuple[str, str]]) -> Iterator[Tuple[Tuple[str, str], Optional[SymbolHistory]]]:
+        """
+        ((exchange, symbol), entry or None) for many symbols, as soon as each is
+        available: cached and panel-backed symbols first, then everything else
+        from one bulk store read (load_many) instead of a read per symbol.
+        """
+        pending = []
+        for exchange, symbol in keys:
+            key = (exchange, symbol)
+            token = self._token(symbol, exchange)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry.token == token:
+                yield key, entry
+                continue
+            df = self._panel_frame(symbol, exchange, token)
+            if df.empty:
+                pending.append((key, token))
+                continue
+            yield key, self._remember(key, self._from_frame(symbol, exchange, token, df))
+
+        if not pending:
+            return
+        bulk = self._store().load_many([(symbol, exchange) for (exchange, symbol), _ in pending])
+        groups = dict(tuple(bulk.groupby(['exchange', 'symbol'], sort=False))) if not bulk.empty else {}
+        for (exchange, symbol), token in pending:
+            df = groups.get((exchange, symbol), pd.DataFrame())
+            yield (exchange, symbol), self._remember((exchange, symbol), self._from_frame(symbol, exchange, token, df))
+
+    # ---------- Rendering ----------
+
+    @staticmethod
+    def _select(entry: SymbolHistory, start: Optional[date], end: Optional[date],
+                last_n: Optional[int], points: Optional[int], mode: str) -> Dict[str, np.ndarray]:
+        lo, hi = 0, len(entry.days)
+        if start is not None:
+            lo = int(np.searchsorted(entry.days, np.datetime64(start, 'D'), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(entry.days, np.datetime64(end, 'D'), side='right'))
+        if last_n is not None:
+            lo = max(lo, hi - last_n)
+        hi = max(lo, hi)
+        cols = {'trade_date': entry.dates[lo:hi], **{f: v[lo:hi] for f, v in entry.columns.items()}}
+        cols.update({f: v[lo:hi] for f, v in entry.row_fields.items()})
+        if points and points < hi - lo:
+            if mode == 'lttb':
+                idx = lttb_indices(cols['close'], points)
+                cols = {f: v[idx] for f, v in cols.items()}
+            else:
+                # A merged candle reports the source date / last-day flag of its last bar
+                cols = ohlc_buckets(cols, points, last=('close', *entry.row_fields))
+        return cols
+
+    @staticmethod
+    def _render(entry: SymbolHistory, cols: Dict[str, np.ndarray], fmt: str) -> Tuple[bytes, str]:
+        if fmt == 'arrow':
+            arrays = {'trade_date': pa.array(cols['trade_date'].astype('datetime64[D]'), type=pa.date32())}
+            arrays.update({f: pa.array(cols[f], type=pa.float64(), from_pandas=True) for f in PRICE_FIELDS if f in cols})
+            table = pa.table(arrays).replace_schema_metadata({k: str(v) for k, v in entry.meta.items()})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), ARROW_MEDIA_TYPE
+
+        values = {f: _json_values(cols[f], as_int=(f == 'volume')) for f in PRICE_FIELDS if f in cols}
+        if fmt == 'columns':
+            body = {**entry.meta, 'trade_date': cols['trade_date'].tolist(), **values}
+        else:
+            # Row dicts, same shape as the original endpoint: per-bar data_source_date / is_last_trading_day
+            per_bar = {f: cols[f].tolist() for f in ROW_FIELDS if f in cols}
+            dates = cols['trade_date'].tolist()
+            fields = list(values)
+            body = [
+                {'trade_date': d, **{f: values[f][i] for f in fields}, **entry.meta, **{f: v[i] for f, v in per_bar.items()}}
+                for i, d in enumerate(dates)
+            ]
+        return json.dumps(body).encode(), "application/json"
+
+    def columns(self, entry: SymbolHistory, start: Optional[date] = None, end: Optional[date] = None,
+                last_n: Optional[int] = None, points: Optional[int] = None, mode: str = 'ohlc',
+                fields: Optional[List[str]] = None) -> dict:
+        """Columnar JSON-ready dict for one symbol (the batch endpoint's per-symbol record)."""
+        cols = self._select(entry, start, end, last_n, points, mode)
+        wanted = [f for f in (fields or PRICE_FIELDS) if f in cols]
+        return {
+            **entry.meta,
+            'trade_date': cols['trade_date'].tolist(),
+            **{f: _json_values(cols[f], as_int=(f == 'volume')) for f in wanted},
+        }
+
+    def response(self, symbol: str, exchange: str, start: Optional[date] = None, end: Optional[date] = None,
+                 last_n: Optional[int] = None, points: Optional[int] = None, mode: str = 'ohlc',
+                 fmt: str = 'rows') -> Optional[Tuple[bytes, str]]:
+        """(body, media type) for the request, or None if the symbol has no history."""
+        entry = self.entry(symbol, exchange)
+        if entry is None:
+            return None
+        key = (start, end, last_n, points, mode, fmt)
+        with self._lock:
+            cached = entry.responses.get(key)
+            if cached is not None:
+                entry.responses.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+        cols = self._select(entry, start, end, last_n, points, mode)
+        rendered = self._render(entry, cols, fmt)
+        self.stats["renders"] += 1
+        with self._lock:
+            entry.responses[key] = rendered
+            while len(entry.responses) > self.RESPONSES_PER_SYMBOL:
+                entry.responses.popitem(last=False)
+        return rendered
@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from config.settings import JOB_PHASE_LIMITS, JOB_HISTORY_SIZE, JOB_HISTORY_PATH
+from src.utils.progress import JobCancelled, reporting
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> phases run in order ('refresh' is history then scan)
+JOB_KINDS = {
+    "universe": ("universe",),
+    "history": ("history",),
+    "scan": ("scan",),
+    "refresh": ("history", "scan"),
+}
+
+# Accepted parameters per phase and their allowed values
+PHASE_PARAMS = {
+    "universe": {},
+    "history": {"ingest": ("batch", "threads", "async")},
+    "scan": {"engine": ("threads", "processes", "vectorized", "incremental"), "full": (True, False)},
+}
+
+
+def _run_universe(params: dict) -> dict:
+    from src.universe.builder import build_universe
+    if not build_universe():
+        raise RuntimeError("Universe build failed")
+    return {"built": True}
+
+def _run_history(params: dict) -> dict:
+    from src.historical.service import HistoricalDataService
+    svc = HistoricalDataService()
+    ingest = params.get("ingest", "batch")
+    if ingest == "async":
+        return svc.update_all_async()
+    return svc.update_all(max_workers=20, batch=(ingest == "batch"))
+
+def _run_scan(params: dict) -> dict:
+    from src.analytics.service import BreakoutService
+    df = BreakoutService().scan_universe(max_workers=20, engine=params.get("engine"), full=bool(params.get("full")))
+    return {"breakouts": len(df)}
+
+PHASE_RUNNERS: Dict[str, Callable[[dict], dict]] = {
+    "universe": _run_universe,
+    "history": _run_history,
+    "scan": _run_scan,
+}
+
+
+class Job:
+    """
+    One tracked run of a job kind. Also the progress sink for the services:
+    Progress/track (src.utils.progress) call begin()/advance() and stop at
+    the next checkpoint once cancel() was called.
+    """
+
+    def __init__(self, kind: str, params: dict, source: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.phases = JOB_KINDS[kind]
+        self.params = params
+        self.source = source
+        self.status = "queued"
+        self.phase: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Dict[str, dict] = {}
+        self.error: Optional[str] = None
+        self.step: Optional[str] = None
+        self.done = 0
+        self.total: Optional[int] = None
+        self._step_started = time.monotonic()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    # ---------- Progress sink ----------
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def begin(self, step: Optional[str], total: Optional[int]):
+        with self._lock:
+            self.step = step or self.phase
+            self.total = total
+            self.done = 0
+            self._step_started = time.monotonic()
+
+    def advance(self, n: int = 1):
+        with self._lock:
+            self.done += n
+
+    # ---------- Control ----------
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job finished; False on timeout."""
+        return self._finished.wait(timeout)
+
+    def as_dict(self) -> dict:
+        def stamp(value):
+            return value.isoformat() if value is not None else None
+        with self._lock:
+            elapsed = time.monotonic() - self._step_started
+            rate = self.done / elapsed if self.status == "running" and elapsed > 0 else None
+            eta = None
+            if rate and self.total is not None:
+                eta = round(max(self.total - self.done, 0) / rate, 1)
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "phases": list(self.phases),
+                "params": self.params,
+                "source": self.source,
+                "status": self.status,
+                "phase": self.phase,
+                "cancel_requested": self.cancelled,
+                "created_at": stamp(self.created_at),
+                "started_at": stamp(self.started_at),
+                "finished_at": stamp(self.finished_at),
+                "progress": {
+                    "step": self.step,
+                    "done": self.done,
+                    "total": self.total,
+                    "per_sec": round(rate, 2) if rate is not None else None,
+                    "eta_sec": eta,
+                },
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Runs pipeline phases (universe, history, scan) as background jobs in
+    this process, each on its own thread, with live progress from the
+    services' progress reporting and cooperative cancellation.
+
+    Each phase has a concurrency limit (JOB_PHASE_LIMITS); a job whose phase
+    is at its limit stays 'queued' until a slot frees. Finished jobs go to
+    a bounded history that is persisted to JOB_HISTORY_PATH, so it
+    survives restarts.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, history_size: int = JOB_HISTORY_SIZE,
+                 history_path: Optional[Path] = None, runners: Optional[Dict[str, Callable[[dict], dict]]] = None):
+        limits = limits or JOB_PHASE_LIMITS
+        self.runners = runners or PHASE_RUNNERS
+        self.history_path = history_path or JOB_HISTORY_PATH
+        self._slots = {phase: threading.BoundedSemaphore(max(1, limits.get(phase, 1))) for phase in PHASE_RUNNERS}
+        self.limits = {phase: max(1, limits.get(phase, 1)) for phase in PHASE_RUNNERS}
+        self._active: Dict[str, Job] = {}
+        self._history: deque = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._load_history()
+
+    # ---------- History ----------
+
+    def _load_history(self):
+        if not self.history_path.exists():
+            return
+        try:
+            with open(self.history_path, "r") as f:
+                self._history.extend(json.load(f))
+        except Exception as e:
+            print(f"Job history unreadable, starting empty: {e}")
+
+    def _archive(self, job: Job):
+        with self._lock:
+            self._active.pop(job.id, None)
+            self._history.append(job.as_dict())
+            try:
+                self.history_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.history_path.with_suffix(".tmp")
+                with open(temp_path, "w") as f:
+                    json.dump(list(self._history), f, default=str)
+                os.replace(temp_path, self.history_path)
+            except Exception as e:
+                logger.error(f"Job history save failed: {e}")
+
+    # ---------- Running ----------
+
+    @staticmethod
+    def validate(kind: str, params: Optional[dict]) -> dict:
+        """Normalized params for the kind; ValueError on an unknown kind, parameter or value."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {list(JOB_KINDS)}")
+        allowed = {}
+        for phase in JOB_KINDS[kind]:
+            allowed.update(PHASE_PARAMS[phase])
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        for key, value in params.items():
+            if key not in allowed:
+                raise ValueError(f"Parameter '{key}' not accepted by '{kind}' jobs")
+            if value not in allowed[key]:
+                raise ValueError(f"Invalid {key} '{value}', expected one of {list(allowed[key])}")
+        return params
+
+    def submit(self, kind: str, params: Optional[dict] = None, source: str = "api") -> Job:
+        job = Job(kind, self.validate(kind, params), source)
+        with self._lock:
+            self._active[job.id] = job
+        threading.Thread(target=self._execute, args=(job,), name=f"job-{kind}-{job.id}", daemon=True).start()
+        return job
+
+    def _acquire(self, job: Job, phase: str):
+        """Waits (queued) for a slot of the phase; gives up if the job is cancelled meanwhile."""
+        slot = self._slots[phase]
+        while not slot.acquire(timeout=0.5):
+            if job.cancelled:
+                raise JobCancelled()
+
+    def _execute(self, job: Job):
+        status, error = "succeeded", None
+        try:
+            with reporting(job):
+                for phase in job.phases:
+                    with job._lock:
+                        job.status, job.phase = "queued", phase
+                    self._acquire(job, phase)
+                    try:
+                        if job.cancelled:
+                            raise JobCancelled()
+                        with job._lock:
+                            job.status = "running"
+                            job.started_at = job.started_at or datetime.now()
+                        job.begin(phase, None)
+                        print(f"Job {job.id}: {phase} started ({job.kind}, {job.source}).")
+                        job.result[phase] = self.runners[phase](job.params)
+                    finally:
+                        self._slots[phase].release()
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+        with job._lock:
+            job.status, job.error = status, error
+            job.finished_at = datetime.now()
+        print(f"Job {job.id}: {job.kind} {status}.")
+        self._archive(job)
+        job._finished.set()
+
+    # ---------- Queries ----------
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is None:
+                return next((j for j in self._history if j["id"] == job_id), None)
+        return job.as_dict()
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Active jobs, then finished ones, newest first."""
+        with self._lock:
+            active = [job.as_dict() for job in reversed(list(self._active.values()))]
+            finished = list(reversed(self._history))
+        jobs = [j for j in active + finished
+                if (kind is None or j["kind"] == kind) and (status is None or j["status"] == status)]
+        return jobs[:limit]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Requests cancellation of an active job; None if no such job is active."""
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            return None
+        job.cancel()
+        return job.as_dict()
+
+    def shutdown(self):
+        """Cancels every active job (the app is stopping)."""
+        with self._lock:
+            jobs = list(self._active.values())
+        for job in jobs:
+            job.cancel()
+
+
+# Called from request threads and the scheduler's worker thread; one manager means one set of phase slots
+_state_lock = threading.Lock()
+job_manager: Optional[JobManager] = None
+
+def get_job_manager() -> JobManager:
+    global job_manager
+    with _state_lock:
+        if job_manager is None:
+            job_manager = JobManager()
+    return job_manager
@@ -63,34 +63,79 @@ manager = ConnectionManager()
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
+        await websocket.send_text(json.dumps({"type": "hello", "epoch": scan_diffs.epoch, "version": scan_diffs.version}))
         while True:
             data = await websocket.receive_text()
-            # Echo or handle client messages if needed
+            # {"type": "since", "version": N, "epoch": E}: catch up after a reconnect
+            try:
+                msg = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(msg, dict) and msg.get("type") == "since":
+                await websocket.send_text(catch_up_message(msg.get("version", -1), msg.get("epoch")))
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
 from src.api.scheduler import start_scheduler
-# Import service to fetch data for broadcast
-from src.analytics.service import BreakoutService
+from src.api.endpoints import scan_diffs, dismissed
+from config.settings import PROCESSED_DIR, SCAN_WATCH_INTERVAL, BACKGROUND_START_DELAY
 import json
 
-# Background task to broadcast updates
+def catch_up_message(version: int, epoch: str = None) -> str:
+    """Missed diffs for a reconnecting client, or a reset if the log no longer reaches back."""
+    diffs = scan_diffs.since(int(version), epoch)
+    if diffs is None:
+        return json.dumps({"type": "reset", "epoch": scan_diffs.epoch, "version": scan_diffs.version})
+    return json.dumps({"type": "diffs", "epoch": scan_diffs.epoch, "version": scan_diffs.version, "diffs": diffs}, default=str)
+
+def _read_scan(path: Path):
+    """(mtime, frame) of the scan result, or None if it is missing or unchanged."""
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if mtime == scan_diffs.source_mtime:
+        return None
+    import pandas as pd # Runs in a worker thread; keeps pandas out of app startup
+    return mtime, pd.read_parquet(path)
+
+# Background task: push only what changed between scans
 async def broadcast_updates():
-    service = BreakoutService()
+    path = PROCESSED_DIR / "breakout_scan.parquet"
+    baseline = True
     while True:
         try:
-            # Fetch latest data (lightweight scan or cache check)
-            # For now, we simulate a push by broadcasting a "refresh" signal
-            # or we can send the actual data if efficient.
-            # Let's send a ping/update signal so frontend knows to re-fetch or invalidates cache.
-            # Real implementation would push diffs.
-            await manager.broadcast(json.dumps({"type": "update", "timestamp": str(asyncio.get_event_loop().time())}))
+            scan = await asyncio.to_thread(_read_scan, path)
+            if scan is not None:
+                mtime, df = scan
+                if baseline:
+                    scan_diffs.load(df, mtime)
+                else:
+                    diff = scan_diffs.apply(df, mtime)
+                    if diff is not None:
+                        await manager.broadcast(json.dumps({"type": "diff", "epoch": scan_diffs.epoch, **diff}, default=str))
+            baseline = False
         except Exception as e:
             print(f"Broadcast error: {e}")
-        await asyncio.sleep(10) # Push every 10s
+        await asyncio.sleep(SCAN_WATCH_INTERVAL)
 
 @app.on_event("startup")
 async def startup_event():
-    start_scheduler()
+    # Rebuild the dismissed set from snapshot + journal and fold the journal in
+    dismissed.load()
+    dismissed.snapshot()
+    asyncio.create_task(start_background())
+
+async def start_background():
+    # Scans and scan watching load the data stack (pandas/pyarrow); let the first requests go first
+    await asyncio.sleep(BACKGROUND_START_DELAY)
+    start_scheduler(manager)
     asyncio.create_task(broadcast_updates())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    dismissed.snapshot()
+    dismissed.close()
+    # Background jobs stop at their next checkpoint
+    from src.api.jobs import get_job_manager
+    get_job_manager().shutdown()
@@ -1,30 +1,233 @@
 import asyncio
 import logging
-from src.analytics.service import BreakoutService
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+from config.settings import (
+    HISTORY_COMPACT_INTERVAL, LIVE_TICK_SOURCE, SCAN_INTERVAL_OPEN, SCAN_IDLE_CHECK_INTERVAL, SCAN_RETRY_BACKOFF
+)
+from src.market_state.enums import MarketState
+from src.market_state.resolver import MarketStateResolver, get_market_resolver
 
 logger = logging.getLogger(__name__)
 
-async def run_scanner_loop():
+class ScanScheduler:
     """
-    Background task to periodically run the breakout scanner.
+    Breakout scans driven by the market state instead of a fixed timer.
+
+    OPEN: every SCAN_INTERVAL_OPEN seconds. PRE_OPEN/POST_CLOSE: wait for the
+    next segment. After the close (EOD CLOSED) one final scan per trade date,
+    once the post-close data has landed. Pre-market, nights, weekends and
+    holidays: no scans unless the history store or OHLCV panel changed since
+    the last scan (checked every SCAN_IDLE_CHECK_INTERVAL seconds).
+
+    Scans are single-flight: a trigger while a scan is running joins the
+    running one instead of starting another.
     """
-    service = BreakoutService()
-    while True:
+
+    def __init__(self, scan=None, resolver: Optional[MarketStateResolver] = None):
+        self.scan = scan or self._scan_universe
+        self.resolver = resolver or get_market_resolver()
+        self._task: Optional[asyncio.Task] = None
+        self._data_paths = None
+        self.last_data_token = None
+        self.final_done_for: Optional[date] = None
+        self.session_scanned_for: Optional[date] = None
+        self.next_run: Optional[datetime] = None
+        self.next_reason: Optional[str] = None
+        self.current: Optional[dict] = None
+        self.last_run: Optional[dict] = None
+        self.runs = 0
+        self.joined_triggers = 0
+
+    @staticmethod
+    def _scan_universe():
+        # Through the job manager: scheduled scans show up as jobs and share the scan phase limit
+        from src.api.jobs import get_job_manager
+        job = get_job_manager().submit("scan", source="scheduler")
+        job.wait()
+        if job.status != "succeeded":
+            raise RuntimeError(f"Scan job {job.id} {job.status}: {job.error or 'no details'}")
+
+    def _data_token(self) -> tuple:
+        """Changes whenever the history manifest is saved or a new panel generation is published."""
+        if self._data_paths is None:
+            from src.historical.panel import OHLCVPanel
+            from src.historical.store import HistoricalDataCache
+            self._data_paths = (HistoricalDataCache().manifest.path, OHLCVPanel().base_path / "CURRENT")
+        token = []
+        for path in self._data_paths:
+            try:
+                token.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                token.append(None)
+        return tuple(token)
+
+    # ---------- Planning ----------
+
+    def plan(self, now: Optional[datetime] = None) -> Tuple[Optional[datetime], Optional[str]]:
+        """(when, reason) of the next scan, or (None, None) while idle."""
+        now = now or self.resolver.clock.now()
+        segment = self.resolver.segment(now)
+        state = segment.state
+
+        if state == MarketState.OPEN:
+            if self.session_scanned_for != segment.effective_trade_date or self.last_run is None:
+                return now, "open"
+            due = self.last_run["started"] + timedelta(seconds=SCAN_INTERVAL_OPEN)
+            return (due if due < segment.end else segment.end), "open"
+        if state == MarketState.PRE_OPEN:
+            return segment.end, "open"
+        if state == MarketState.POST_CLOSE:
+            return segment.end, "final"
+        if state == MarketState.CLOSED and segment.effective_trade_date == now.date() \
+                and self.final_done_for != segment.effective_trade_date:
+            return now, "final"
+        # Idle: only new data warrants a scan
+        if self.last_data_token is None or self._data_token() != self.last_data_token:
+            return now, "data"
+        return None, None
+
+    # ---------- Running ----------
+
+    async def _run(self, reason: str):
+        now = self.resolver.clock.now()
+        segment = self.resolver.segment(now)
+        token = self._data_token()
+        started = time.perf_counter()
+        self.current = {"reason": reason, "started": now}
+        status, error = "ok", None
         try:
-            logger.info("Starting scheduled breakout scan...")
-            print("Scheduler: Starting breakout scan...")
-            # Run the blocking scan_universe method in a separate thread
-            await asyncio.to_thread(service.scan_universe)
-            print("Scheduler: Scan complete. Sleeping for 5 minutes.")
+            print(f"Scheduler: Starting breakout scan ({reason}, {segment.state.value})...")
+            await asyncio.to_thread(self.scan)
         except Exception as e:
+            status, error = "error", str(e)
             logger.error(f"Scheduler Error: {e}")
             print(f"Scheduler Error: {e}")
-            
-        # Sleep for 5 minutes (300 seconds)
-        await asyncio.sleep(300)
+        duration = time.perf_counter() - started
+        # Inputs seen by this scan; data landing while it ran triggers another one
+        self.last_data_token = token
+        if segment.state == MarketState.OPEN:
+            self.session_scanned_for = segment.effective_trade_date
+        if status == "ok" and (reason == "final" or
+                               (segment.state == MarketState.CLOSED and segment.effective_trade_date == now.date())):
+            self.final_done_for = segment.effective_trade_date
+        self.last_run = {"reason": reason, "started": now, "duration_sec": round(duration, 3), "status": status, "error": error}
+        self.current = None
+        self.runs += 1
+        print(f"Scheduler: Scan complete in {duration:.1f}s.")
+
+    async def trigger(self, reason: str = "manual") -> dict:
+        """Runs a scan now, or waits for the one already running (single-flight)."""
+        if self._task is not None and not self._task.done():
+            self.joined_triggers += 1
+        else:
+            self._task = asyncio.create_task(self._run(reason))
+        await asyncio.shield(self._task)
+        return self.last_run
+
+    @staticmethod
+    def _backoff(failures: int) -> float:
+        return min(SCAN_RETRY_BACKOFF * 2 ** (failures - 1), SCAN_IDLE_CHECK_INTERVAL)
+
+    async def run(self):
+        failures = 0
+        while True:
+            try:
+                # Off the event loop: the idle check stats data files and first imports the store modules
+                due, reason = await asyncio.to_thread(self.plan)
+                self.next_run, self.next_reason = due, reason
+                now = self.resolver.clock.now()
+                if due is not None and due <= now:
+                    last_run = await self.trigger(reason)
+                    failures = failures + 1 if last_run and last_run["status"] != "ok" else 0
+                    if failures:
+                        # A failed final scan stays due; do not retry it back to back
+                        await asyncio.sleep(self._backoff(failures))
+                    continue
+                # Wake for the due scan, the next state change, or the next idle data check
+                wait = min(SCAN_IDLE_CHECK_INTERVAL, (self.resolver.next_change(now) - now).total_seconds())
+                if due is not None:
+                    wait = min(wait, (due - now).total_seconds())
+                failures = 0
+            except Exception as e:
+                # Planning errors (calendar, data files) must not end the loop
+                failures += 1
+                wait = self._backoff(failures)
+                logger.error(f"Scheduler Error: {e}")
+                print(f"Scheduler Error: {e} (retrying in {wait:.0f}s)")
+            await asyncio.sleep(max(wait, 1))
+
+    def status(self) -> dict:
+        def stamp(value):
+            return value.isoformat() if value is not None else None
+        context = self.resolver.resolve()
+        return {
+            "market_state": context.state.value,
+            "next_run": stamp(self.next_run),
+            "next_reason": self.next_reason,
+            "running": self.current is not None,
+            "current_started": stamp(self.current["started"]) if self.current else None,
+            "last_run": {**self.last_run, "started": stamp(self.last_run["started"])} if self.last_run else None,
+            "runs": self.runs,
+            "joined_triggers": self.joined_triggers,
+            "open_interval_sec": SCAN_INTERVAL_OPEN,
+        }
+
+
+scan_scheduler: Optional[ScanScheduler] = None
+
+def get_scan_scheduler() -> ScanScheduler:
+    global scan_scheduler
+    if scan_scheduler is None:
+        scan_scheduler = ScanScheduler()
+    return scan_scheduler
+
+async def run_scanner_loop():
+    """
+    Background task running breakout scans on the market-state schedule.
+    """
+    try:
+        await get_scan_scheduler().run()
+    except Exception as e:
+        logger.error(f"Scheduler Error: {e}")
+        print(f"Scheduler Error: {e}")
+
+async def run_compaction_loop():
+    """
+    Background task to fold appended history segments into the base files.
+    """
+    from src.historical.store import HistoricalDataCache
+    while True:
+        await asyncio.sleep(HISTORY_COMPACT_INTERVAL)
+        try:
+            cache = HistoricalDataCache()
+            if cache.needs_compaction():
+                print("Scheduler: Compacting history store...")
+                folded = await asyncio.to_thread(cache.compact)
+                print(f"Scheduler: Compaction complete ({folded} folded).")
+        except Exception as e:
+            logger.error(f"Compaction Error: {e}")
+            print(f"Compaction Error: {e}")
+
+async def run_live_loop(manager):
+    """
+    Background task pushing live intraday breakouts from the configured tick feed.
+    """
+    from src.live.monitor import LiveBreakoutMonitor
+    from src.live.sources import source_from_spec
+    monitor = LiveBreakoutMonitor(manager.broadcast, lambda: source_from_spec(LIVE_TICK_SOURCE))
+    try:
+        await monitor.run()
+    except Exception as e:
+        logger.error(f"Live Monitor Error: {e}")
+        print(f"Live Monitor Error: {e}")
 
-def start_scheduler():
+def start_scheduler(manager=None):
     """
-    Starts the background scheduler task.
+    Starts the background scheduler tasks.
     """
     asyncio.create_task(run_scanner_loop())
+    asyncio.create_task(run_compaction_loop())
+    if LIVE_TICK_SOURCE and manager is not None:
+        asyncio.create_task(run_live_loop(manager))
@@ -1,22 +1,16 @@
-import pandas_market_calendars as mcal
 from datetime import date, timedelta, datetime
 import pandas as pd
 from typing import Optional
+from src.market_state.sessions import get_session_index
 
 class MarketCalendarService:
     def __init__(self):
-        # XBOM is Bombay Stock Exchange, which follows same holidays as NSE
-        try:
-            self.cal = mcal.get_calendar('XBOM')
-        except Exception:
-            # Fallback or generic if XBOM specific not found (should exist)
-            print("Warning: XBOM calendar not found, falling back to NYSE for test or generic.") 
-            self.cal = mcal.get_calendar('NYSE') # Dangerous fallback, but better than crash. 
-            # Ideally we'd define custom if missing.
+        # XBOM is Bombay Stock Exchange, which follows same holidays as NSE.
+        # Sessions come from the process-wide index (built once per day, cached on disk).
+        self.sessions = get_session_index()
             
     def is_trading_day(self, check_date: date) -> bool:
-        schedule = self.cal.schedule(start_date=check_date, end_date=check_date)
-        return not schedule.empty
+        return get_session_index(check_date).is_trading_day(check_date)
 
     def get_last_trading_day(self, from_date: date = None) -> date:
         """
@@ -28,14 +22,11 @@ class MarketCalendarService:
         if from_date is None:
             from_date = date.today()
             
-        # Get schedule for last 15 days to be safe
-        start_date = from_date - timedelta(days=15)
-        schedule = self.cal.schedule(start_date=start_date, end_date=from_date)
-        
-        if schedule.empty:
-            return start_date # Should not happen
+        last = get_session_index(from_date).previous_session(from_date)
+        if last is None:
+            return from_date - timedelta(days=15) # Should not happen
             
-        return schedule.index[-1].date()
+        return last
         
     def get_market_status(self) -> dict:
         today = date.today()
@@ -0,0 +1,62 @@
+import numpy as np
+from typing import Dict, Iterable
+
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points of `y`
+    (x is the bar position) that keep the visual shape of the line.
+    First and last points are always kept.
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    threshold = max(threshold, 3)
+
+    x = np.arange(n, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Interior points are split into threshold - 2 buckets
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average point of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def ohlc_buckets(columns: Dict[str, np.ndarray], target: int, last: Iterable[str] = ('close',)) -> Dict[str, np.ndarray]:
+    """
+    Merges consecutive bars into at most `target` candles: first open and
+    trade_date, max high, min low, last close (and other `last` fields),
+    summed volume.
+    """
+    last = set(last)
+    n = len(columns['close'])
+    if target >= n or target < 1:
+        return columns
+    starts = np.floor(np.linspace(0, n, target + 1)[:-1]).astype(np.int64)
+    starts = np.unique(starts)
+    ends = np.append(starts[1:], n) - 1
+    out = {}
+    for field, values in columns.items():
+        if field == 'high':
+            out[field] = np.fmax.reduceat(values, starts)
+        elif field == 'low':
+            out[field] = np.fmin.reduceat(values, starts)
+        elif field == 'volume':
+            out[field] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), starts)
+        elif field in last:
+            out[field] = values[ends]
+        else: # open, trade_date
+            out[field] = values[starts]
+    return out
@@ -1,12 +1,15 @@
 import yfinance as yf
 import pandas as pd
 from datetime import date, timedelta
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
+from config.settings import HISTORY_BATCH_SIZE
 from src.historical.schema import HistoricalRecord
 
 class HistoricalDataFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, client=None):
+        # Anything exposing yfinance's Ticker() and download(); swappable for
+        # recorded/offline stand-ins (see scripts/bench_fetch_batch.py)
+        self.client = client or yf
         
     def _get_yfinance_ticker(self, symbol: str, exchange: str) -> str:
         if exchange == 'NSE':
@@ -31,7 +34,7 @@ class HistoricalDataFetcher:
             # Wait, breakout at 52-week high needs real levels. If a stock split, raw prices drop, adjusted back-adjusts past. 
             # Adjusted data is MANDATORY for consistent breakouts over long periods (5y).
             
-            ticker = yf.Ticker(ticker_symbol)
+            ticker = self.client.Ticker(ticker_symbol)
             
             # Efficient fetching
             if start_date:
@@ -42,46 +45,102 @@ class HistoricalDataFetcher:
             if df.empty:
                 return None
                 
-            # Normalize
-            df = df.reset_index()
-            
-            # Ensure columns exist (Date, Open, High, Low, Close, Volume)
-            # yfinance returns: Date (index), Open, High, Low, Close, Volume, Dividends, Stock Splits
-            
-            rename_map = {
-                'Date': 'trade_date',
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            }
-            df = df.rename(columns=rename_map)
-            
-            # Filter cols
-            cols = ['trade_date', 'open', 'high', 'low', 'close', 'volume']
-            df = df[cols].copy()
-            
-            # Convert date
-            df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
-            
-            # Add metadata columns required by schema (filled by Service usually, but we can structure here)
-            df['symbol'] = symbol
-            df['exchange'] = exchange
-            
-            return df
+            return self._normalize(df, symbol, exchange)
             
         except Exception as e:
             print(f"Error fetching {ticker_symbol}: {e}")
             return None
 
-    def fetch_batch(self, tasks: List[tuple]) -> List[pd.DataFrame]:
-        # yfinance generic batch download is faster but requires list of tickers
-        # However, we need to map results back to exchange/symbol.
-        # For robustness, we implement per-ticker fetch here or investigate yf.download(tickers=...)
-        # yf.download is faster for bulk.
-        # But we have mix of NSE and BSE. 
-        # Detailed implementation: Let's stick to single fetch for simplicity and robustness in Phase 2 
-        # unless 3000 stocks is too slow. 3000 requests might take ~10 mins with threading.
-        # We will use threading in the Service layer.
-        pass
+    def _normalize(self, df: pd.DataFrame, symbol: str, exchange: str) -> Optional[pd.DataFrame]:
+        """Maps a yfinance OHLCV frame (Date index) to the store schema."""
+        # Normalize
+        df = df.reset_index()
+        
+        # Ensure columns exist (Date, Open, High, Low, Close, Volume)
+        # yfinance returns: Date (index), Open, High, Low, Close, Volume, Dividends, Stock Splits
+        
+        rename_map = {
+            'Date': 'trade_date',
+            'Open': 'open',
+            'High': 'high',
+            'Low': 'low',
+            'Close': 'close',
+            'Volume': 'volume'
+        }
+        df = df.rename(columns=rename_map)
+        
+        # Filter cols
+        cols = ['trade_date', 'open', 'high', 'low', 'close', 'volume']
+        df = df[cols].copy()
+        
+        # Bulk downloads align every ticker on one date index; drop days this ticker didn't trade
+        df = df.dropna(subset=['close'])
+        if df.empty:
+            return None
+        df['volume'] = df['volume'].fillna(0).astype('int64')
+        
+        # Convert date
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
+        
+        # Add metadata columns required by schema (filled by Service usually, but we can structure here)
+        df['symbol'] = symbol
+        df['exchange'] = exchange
+        
+        return df.reset_index(drop=True)
+
+    def _split_wide(self, wide: Optional[pd.DataFrame], chunk: List[tuple]) -> Dict[Tuple[str, str], Optional[pd.DataFrame]]:
+        """Splits a multi-ticker (ticker, field) frame back into per-(symbol, exchange) frames."""
+        results = {}
+        for symbol, exchange in chunk:
+            ticker_symbol = self._get_yfinance_ticker(symbol, exchange)
+            frame = None
+            if wide is not None and not wide.empty and isinstance(wide.columns, pd.MultiIndex):
+                if ticker_symbol in wide.columns.get_level_values(0):
+                    frame = self._normalize(wide[ticker_symbol], symbol, exchange)
+            results[(symbol, exchange)] = frame
+        return results
+
+    def iter_batches(self, tasks: List[tuple], batch_size: int = HISTORY_BATCH_SIZE, period: str = "5y") -> Iterator[Dict[Tuple[str, str], Optional[pd.DataFrame]]]:
+        """
+        Multi-ticker download.
+
+        tasks: (symbol, exchange, start_date) tuples; start_date None means a full
+        `period` download. Tasks sharing a date range are requested together in
+        chunks of batch_size. Tickers missing from a bulk response are retried
+        one by one with fetch_history. Yields one {(symbol, exchange): frame or None}
+        dict per chunk so callers can persist as results arrive.
+        """
+        groups = {}
+        for symbol, exchange, start_date in tasks:
+            groups.setdefault(start_date, []).append((symbol, exchange))
+
+        for start_date, members in groups.items():
+            for i in range(0, len(members), batch_size):
+                chunk = members[i:i + batch_size]
+                tickers = [self._get_yfinance_ticker(s, e) for s, e in chunk]
+                try:
+                    if start_date:
+                        wide = self.client.download(tickers, start=start_date, auto_adjust=True, group_by='ticker', progress=False, threads=True)
+                    else:
+                        wide = self.client.download(tickers, period=period, auto_adjust=True, group_by='ticker', progress=False, threads=True)
+                except Exception as e:
+                    print(f"Batch download failed ({len(tickers)} tickers from {start_date or period}): {e}")
+                    wide = None
+
+                results = self._split_wide(wide, chunk)
+
+                # Per-symbol fallback only for the tickers the bulk request missed
+                for (symbol, exchange), frame in results.items():
+                    if frame is None:
+                        if start_date:
+                            results[(symbol, exchange)] = self.fetch_history(symbol, exchange, start_date=start_date)
+                        else:
+                            results[(symbol, exchange)] = self.fetch_history(symbol, exchange, period=period)
+                yield results
+
+    def fetch_batch(self, tasks: List[tuple], batch_size: int = HISTORY_BATCH_SIZE, period: str = "5y") -> Dict[Tuple[str, str], Optional[pd.DataFrame]]:
+        """Collects iter_batches() into a single {(symbol, exchange): frame or None} dict."""
+        results = {}
+        for chunk_results in self.iter_batches(tasks, batch_size=batch_size, period=period):
+            results.update(chunk_results)
+        return results
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+MANIFEST_COLUMNS = [
+    'exchange', 'symbol', 'first_date', 'last_date', 'rows',
+    'content_hash', 'version', 'last_status', 'updated_at'
+]
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Stable digest of a history frame's OHLCV content."""
+    cols = [c for c in ('trade_date', 'open', 'high', 'low', 'close', 'volume') if c in df.columns]
+    content = df[cols].copy()
+    if 'trade_date' in cols:
+        content['trade_date'] = content['trade_date'].astype(str)
+    values = pd.util.hash_pandas_object(content, index=False).values
+    return hashlib.sha1(values.tobytes()).hexdigest()[:16]
+
+
+class HistoryManifest:
+    """
+    Compact per-symbol summary of the history store:
+    first/last trade_date, row count, content hash, a version counter
+    bumped on every save/append, and last fetch status.
+
+    Updated by HistoricalDataCache on every save/append and written next to
+    the store on flush(), so freshness checks never open the history files.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries = {} # (exchange, symbol) -> dict
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._loaded_mtime = None
+
+    # ---------- Persistence ----------
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self):
+        """(Re)loads from disk if the file changed since the last load."""
+        if not self.path.exists():
+            return
+        mtime = self.path.stat().st_mtime
+        with self._lock:
+            if self._dirty or mtime == self._loaded_mtime:
+                return
+            df = pd.read_parquet(self.path)
+            self._entries = {
+                (rec['exchange'], rec['symbol']): {k: (None if pd.isna(v) else v) for k, v in rec.items()}
+                for rec in df.to_dict(orient="records")
+            }
+            self._loaded_mtime = mtime
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            df = self.frame()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            df.to_parquet(temp_path, index=False)
+            os.replace(temp_path, self.path)
+            self._loaded_mtime = self.path.stat().st_mtime
+            self._dirty = False
+
+    def frame(self) -> pd.DataFrame:
+        self.load()
+        with self._lock:
+            if not self._entries:
+                return pd.DataFrame(columns=MANIFEST_COLUMNS)
+            return pd.DataFrame(list(self._entries.values()), columns=MANIFEST_COLUMNS)
+
+    def get(self, symbol: str, exchange: str) -> Optional[dict]:
+        self.load()
+        with self._lock:
+            entry = self._entries.get((exchange, symbol))
+            return dict(entry) if entry else None
+
+    # ---------- Updates ----------
+
+    def _entry(self, symbol: str, exchange: str) -> dict:
+        key = (exchange, symbol)
+        if key not in self._entries:
+            self._entries[key] = {
+                'exchange': exchange, 'symbol': symbol, 'first_date': None, 'last_date': None,
+                'rows': 0, 'content_hash': None, 'version': 0, 'last_status': None, 'updated_at': None,
+            }
+        return self._entries[key]
+
+    def record_save(self, df: pd.DataFrame, symbol: str, exchange: str):
+        self.load()
+        with self._lock:
+            entry = self._entry(symbol, exchange)
+            entry['first_date'] = df['trade_date'].min() if not df.empty else None
+            entry['last_date'] = df['trade_date'].max() if not df.empty else None
+            entry['rows'] = int(len(df))
+            entry['content_hash'] = frame_hash(df) if not df.empty else None
+            entry['version'] = int(entry.get('version') or 0) + 1
+            entry['updated_at'] = datetime.now()
+            self._dirty = True
+
+    def record_append(self, df: pd.DataFrame, symbol: str, exchange: str):
+        if df.empty:
+            return
+        self.load()
+        with self._lock:
+            entry = self._entry(symbol, exchange)
+            last_date = entry['last_date']
+            new_rows = df if last_date is None else df[df['trade_date'] > last_date]
+            entry['rows'] = int(entry['rows'] or 0) + int(len(new_rows))
+            if entry['first_date'] is None or df['trade_date'].min() < entry['first_date']:
+                entry['first_date'] = df['trade_date'].min()
+            if last_date is None or df['trade_date'].max() > last_date:
+                entry['last_date'] = df['trade_date'].max()
+            # Chained: hash of (previous content, appended rows)
+            entry['content_hash'] = hashlib.sha1(f"{entry['content_hash']}:{frame_hash(df)}".encode()).hexdigest()[:16]
+            entry['version'] = int(entry.get('version') or 0) + 1
+            entry['updated_at'] = datetime.now()
+            self._dirty = True
+
+    def record_status(self, symbol: str, exchange: str, status: str):
+        self.load()
+        with self._lock:
+            entry = self._entry(symbol, exchange)
+            entry['last_status'] = status
+            self._dirty = True
+
+    def rebuild(self, panel: pd.DataFrame):
+        """Recomputes every entry from a long history frame (used when no manifest exists yet)."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = True # Don't let record_save() reload the stale file
+            if panel is not None and not panel.empty:
+                for (exchange, symbol), df in panel.groupby(['exchange', 'symbol'], sort=False):
+                    self.record_save(df, symbol, exchange)
+            self._dirty = True
+            self.save()
@@ -0,0 +1,313 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from config.settings import DATA_DIR
+
+
+class OHLCVPanel:
+    """
+    Derived, memory-mapped view of the whole history store.
+
+    Layout under <base>/<generation>/:
+        <field>.f64      float64 memmap, shape (symbols x trading days), NaN where no bar
+        data_source_date.i32, is_last_trading_day.u8
+                         per-bar store metadata, same shape (source day number, NO_DAY where none)
+        days.npy         trading-day -> column index (sorted datetime64[D])
+        symbols.parquet  (exchange, symbol) -> row, first/last column, data_source_date, fingerprint
+        meta.json        shape, fields, build time
+
+    Rebuilds write a new generation directory and then swap the CURRENT pointer,
+    so readers (and other API workers sharing the page cache) never see a
+    half-written panel.
+    """
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+    DTYPE = np.float64
+    # Carried per bar so frame() matches the store frame; not in FIELDS, so not fingerprinted or packed
+    BAR_FIELDS = {'data_source_date': np.int32, 'is_last_trading_day': np.uint8}
+    NO_DAY = np.iinfo(np.int32).min
+
+    def __init__(self, base_path: Optional[Path] = None):
+        self.base_path = base_path or DATA_DIR / "panel"
+        self._lock = threading.Lock()
+        self._generation = None
+        self._arrays: Dict[str, np.memmap] = {}
+        self._days = None
+        self._index = None # DataFrame indexed by (exchange, symbol)
+        self._locs = {} # (exchange, symbol) -> (row, first_col, last_col)
+
+    # ---------- Build ----------
+
+    def build(self, df: pd.DataFrame) -> bool:
+        """Builds a new panel generation from a long (exchange, symbol, trade_date, ...) frame."""
+        if df is None or df.empty:
+            return False
+
+        df = df[['exchange', 'symbol', 'trade_date', *self.FIELDS] +
+                [f for f in self.BAR_FIELDS if f in df.columns]].copy()
+        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        df = df.sort_values(['exchange', 'symbol', 'trade_date'])
+
+        keys = df['exchange'].astype(str) + ":" + df['symbol'].astype(str)
+        rows, uniques = pd.factorize(keys, sort=True)
+        trade_days = df['trade_date'].values.astype('datetime64[D]')
+        days = np.unique(trade_days)
+        cols = np.searchsorted(days, trade_days)
+        shape = (len(uniques), len(days))
+
+        generation = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        gen_dir = self.base_path / generation
+        gen_dir.mkdir(parents=True, exist_ok=True)
+
+        for field in self.FIELDS:
+            arr = np.memmap(gen_dir / f"{field}.f64", dtype=self.DTYPE, mode='w+', shape=shape)
+            arr[:] = np.nan
+            arr[rows, cols] = df[field].to_numpy(dtype=self.DTYPE, na_value=np.nan)
+            arr.flush()
+            del arr
+
+        bar_fields = {}
+        for field, dtype in self.BAR_FIELDS.items():
+            if field not in df.columns:
+                continue
+            if field == 'data_source_date':
+                source = pd.to_datetime(df[field]).values.astype('datetime64[D]')
+                values = np.where(np.isnat(source), self.NO_DAY, source.astype(np.int64))
+                fill = self.NO_DAY
+            else:
+                values, fill = df[field].fillna(False).to_numpy(dtype=bool), 0
+            arr = np.memmap(gen_dir / f"{field}.{np.dtype(dtype).str[1:]}", dtype=dtype, mode='w+', shape=shape)
+            arr[:] = fill
+            arr[rows, cols] = values.astype(dtype)
+            arr.flush()
+            del arr
+            bar_fields[field] = np.dtype(dtype).str
+
+        np.save(gen_dir / "days.npy", days)
+
+        grouped = pd.DataFrame({'row': rows, 'col': cols})
+        index = grouped.groupby('row')['col'].agg(first_col='min', last_col='max')
+        index['exchange'] = [u.split(":", 1)[0] for u in uniques]
+        index['symbol'] = [u.split(":", 1)[1] for u in uniques]
+        if 'data_source_date' in df.columns:
+            index['data_source_date'] = df.groupby(rows)['data_source_date'].last().values
+        # Per-symbol content fingerprint: wrapping sum of row hashes (bars are keyed by date)
+        normalized = pd.DataFrame({'trade_date': trade_days.astype(np.int64),
+                                   **{f: df[f].to_numpy(dtype=self.DTYPE, na_value=np.nan) for f in self.FIELDS}})
+        row_hash = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+        sums = np.zeros(len(uniques), dtype=np.uint64)
+        np.add.at(sums, rows, row_hash)
+        index['fingerprint'] = [f"{v:016x}" for v in sums[index.index.to_numpy()]]
+        index = index.reset_index()
+        index.to_parquet(gen_dir / "symbols.parquet", index=False)
+
+        with open(gen_dir / "meta.json", "w") as f:
+            json.dump({
+                "shape": list(shape),
+                "fields": list(self.FIELDS),
+                "dtype": np.dtype(self.DTYPE).str,
+                "bar_fields": bar_fields,
+                "built_at": datetime.now().isoformat()
+            }, f)
+
+        self._swap_current(generation)
+        return True
+
+    def build_from_store(self, cache) -> bool:
+        """Rebuilds the panel from a HistoricalDataCache (one bulk read)."""
+        return self.build(cache.load_all())
+
+    def _swap_current(self, generation: str):
+        pointer = self.base_path / "CURRENT"
+        temp = pointer.with_suffix(".tmp")
+        temp.write_text(generation)
+        os.replace(temp, pointer)
+
+        # Keep the previous generation for readers that resolved CURRENT just before the swap.
+        # On Windows mapped files can't be removed yet; they are retried on the next build.
+        generations = sorted(p.name for p in self.base_path.iterdir() if p.is_dir())
+        for name in generations[:-2]:
+            shutil.rmtree(self.base_path / name, ignore_errors=True)
+
+    # ---------- Read ----------
+
+    def _current_generation(self) -> Optional[str]:
+        pointer = self.base_path / "CURRENT"
+        if not pointer.exists():
+            return None
+        return pointer.read_text().strip() or None
+
+    def is_available(self) -> bool:
+        return self._current_generation() is not None
+
+    def open(self) -> bool:
+        """
+        Maps the current generation (read-only). Re-maps if a newer one was built.
+        Call once per scan/request; lookups reuse the mapping without re-checking.
+        """
+        generation = self._current_generation()
+        if generation is None:
+            return False
+        with self._lock:
+            if generation == self._generation:
+                return True
+            gen_dir = self.base_path / generation
+            with open(gen_dir / "meta.json") as f:
+                meta = json.load(f)
+            shape = tuple(meta['shape'])
+            arrays = {
+                field: np.memmap(gen_dir / f"{field}.f64", dtype=meta['dtype'], mode='r', shape=shape)
+                for field in meta['fields']
+            }
+            # Generations built before per-bar metadata have none; frame() then stamps the symbol's date
+            for field, dtype in meta.get('bar_fields', {}).items():
+                arrays[field] = np.memmap(gen_dir / f"{field}.{dtype[1:]}", dtype=dtype, mode='r', shape=shape)
+            self._arrays = arrays
+            self._days = np.load(gen_dir / "days.npy")
+            index = pd.read_parquet(gen_dir / "symbols.parquet")
+            self._index = index.set_index(['exchange', 'symbol'])
+            self._locs = {
+                (ex, sym): (int(r), int(f), int(l))
+                for ex, sym, r, f, l in zip(index['exchange'], index['symbol'], index['row'], index['first_col'], index['last_col'])
+            }
+            self._generation = generation
+        return True
+
+    @property
+    def generation(self) -> Optional[str]:
+        return self._generation
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days
+
+    @property
+    def index(self) -> pd.DataFrame:
+        return self._index
+
+    def fingerprints(self) -> Optional[Dict[Tuple[str, str], str]]:
+        """(exchange, symbol) -> content fingerprint, or None for generations built without one."""
+        if self._index is None or 'fingerprint' not in self._index.columns:
+            return None
+        return self._index['fingerprint'].to_dict()
+
+    def array(self, field: str) -> np.memmap:
+        return self._arrays[field]
+
+    def locate(self, symbol: str, exchange: str) -> Optional[Tuple[int, int, int]]:
+        """Returns (row, first_col, last_col) or None if the symbol isn't in the panel."""
+        if self._generation is None and not self.open():
+            return None
+        return self._locs.get((exchange, symbol))
+
+    def _col_range(self, first: int, last: int, start_date: Optional[date], end_date: Optional[date], last_n: Optional[int]):
+        lo, hi = first, last + 1
+        if start_date is not None:
+            lo = max(lo, int(np.searchsorted(self._days, np.datetime64(start_date, 'D'), side='left')))
+        if end_date is not None:
+            hi = min(hi, int(np.searchsorted(self._days, np.datetime64(end_date, 'D'), side='right')))
+        if last_n is not None:
+            lo = max(lo, hi - last_n)
+        return lo, max(lo, hi)
+
+    def slice(self, symbol: str, exchange: str, fields=None, last_n: Optional[int] = None,
+              start_date: Optional[date] = None, end_date: Optional[date] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Zero-copy views of one symbol's row, trimmed to its listed range.
+        Columns are calendar-aligned: days where the symbol had no bar are NaN.
+        last_n counts panel columns, not bars.
+        """
+        loc = self.locate(symbol, exchange)
+        if loc is None:
+            return None
+        row, first, last = loc
+        lo, hi = self._col_range(first, last, start_date, end_date, last_n)
+        out = {field: self._arrays[field][row, lo:hi] for field in (fields or self.FIELDS)}
+        out['trade_date'] = self._days[lo:hi]
+        return out
+
+    def packed(self, keys=None, fields=None, with_cols: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Right-aligned copies of the panel for cross-sectional engines: each row's
+        bars are shifted so its latest bar sits in the last column, with gap days
+        removed and NaN padding on the left. keys: (symbol, exchange) pairs to
+        include (default: every symbol, in row order).
+
+        Returns {field: (rows x days) arrays, 'count': bars per row,
+        'last_col': panel column of each row's latest bar, 'exchange', 'symbol'}.
+        with_cols adds 'col': the panel column of every packed bar (-1 in padding).
+        """
+        if not self.open():
+            return {}
+        if keys is None:
+            locs = sorted(self._locs.items(), key=lambda kv: kv[1][0])
+        else:
+            locs = [((ex, sym), self._locs[(ex, sym)]) for sym, ex in keys if (ex, sym) in self._locs]
+        rows = np.array([loc[0] for _, loc in locs], dtype=np.int64)
+
+        close = np.asarray(self._arrays['close'][rows])
+        present = ~np.isnan(close)
+        count = present.sum(axis=1)
+        width = close.shape[1]
+
+        # Target column for every present bar: its rank within the row, pushed right
+        target = np.cumsum(present, axis=1) - 1 + (width - count)[:, None]
+        r_idx, c_idx = np.nonzero(present)
+        t_idx = target[r_idx, c_idx]
+
+        out = {}
+        for field in (fields or self.FIELDS):
+            src = close if field == 'close' else np.asarray(self._arrays[field][rows])
+            dst = np.full(src.shape, np.nan, dtype=self.DTYPE)
+            dst[r_idx, t_idx] = src[r_idx, c_idx]
+            out[field] = dst
+
+        if with_cols:
+            col = np.full(close.shape, -1, dtype=np.int64)
+            col[r_idx, t_idx] = c_idx
+            out['col'] = col
+
+        last_col = np.where(count > 0, width - 1 - np.argmax(present[:, ::-1], axis=1), -1)
+        out['count'] = count
+        out['last_col'] = last_col
+        out['exchange'] = np.array([key[0] for key, _ in locs], dtype=object)
+        out['symbol'] = np.array([key[1] for key, _ in locs], dtype=object)
+        return out
+
+    def frame(self, symbol: str, exchange: str, last_n: Optional[int] = None,
+              start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
+        """
+        Per-symbol frame in the store's column layout (gap days dropped), for
+        consumers such as BreakoutCalculator that expect a DataFrame.
+        """
+        if self._generation is None and not self.open():
+            return pd.DataFrame()
+        bar_fields = tuple(f for f in self.BAR_FIELDS if f in self._arrays)
+        views = self.slice(symbol, exchange, fields=self.FIELDS + bar_fields, start_date=start_date, end_date=end_date)
+        if views is None:
+            return pd.DataFrame()
+        mask = ~np.isnan(views['close'])
+        df = pd.DataFrame({
+            'trade_date': pd.to_datetime(views['trade_date'][mask]).date,
+            **{field: views[field][mask] for field in self.FIELDS},
+        })
+        if last_n is not None:
+            df = df.iloc[-last_n:]
+        df['volume'] = df['volume'].fillna(0).astype('int64')
+        df['symbol'] = symbol
+        df['exchange'] = exchange
+        kept = slice(int(mask.sum()) - len(df), None) # Bars left after last_n
+        if 'data_source_date' in bar_fields:
+            source = views['data_source_date'][mask][kept].astype(np.int64)
+            source = np.where(source == self.NO_DAY, np.datetime64('NaT'), source.astype('datetime64[D]'))
+            df['data_source_date'] = pd.to_datetime(source).date
+        elif 'data_source_date' in self._index.columns:
+            df['data_source_date'] = self._index.loc[(exchange, symbol), 'data_source_date']
+        if 'is_last_trading_day' in bar_fields:
+            df['is_last_trading_day'] = views['is_last_trading_day'][mask][kept].astype(bool)
+        return df.reset_index(drop=True)
@@ -0,0 +1,287 @@
+import asyncio
+import time
+import httpx
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from config.settings import (
+    USER_AGENT,
+    DEFAULT_TIMEOUT,
+    YAHOO_CHART_URL,
+    HISTORY_ASYNC_RATE_PER_HOST,
+    HISTORY_ASYNC_BURST,
+    HISTORY_ASYNC_FETCH_CONCURRENCY,
+    HISTORY_ASYNC_NORMALIZE_CONCURRENCY,
+    HISTORY_ASYNC_PERSIST_CONCURRENCY,
+    HISTORY_ASYNC_QUEUE_SIZE,
+)
+from src.utils.progress import Progress, cancelled, checkpoint
+
+_DONE = object() # Queue sentinel
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests/second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0 # Seconds spent inside the stage
+        self.started = time.monotonic()
+
+    def throughput(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "processed": self.processed,
+            "errors": self.errors,
+            "per_sec": round(self.throughput(), 2),
+            "busy_sec": round(self.busy, 2),
+        }
+
+
+class AsyncChartClient:
+    """
+    Async Yahoo chart API client with one shared connection pool and a
+    token-bucket rate limit per host.
+    """
+
+    def __init__(self, rate_per_host: float = HISTORY_ASYNC_RATE_PER_HOST, burst: int = HISTORY_ASYNC_BURST,
+                 max_connections: int = HISTORY_ASYNC_FETCH_CONCURRENCY, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    async def fetch_chart(self, ticker: str, start_date=None, period_years: int = 5) -> Optional[dict]:
+        end = datetime.now()
+        if start_date is not None:
+            start = datetime.combine(pd.Timestamp(start_date).date(), datetime.min.time())
+        else:
+            start = end - timedelta(days=365 * period_years)
+        url = YAHOO_CHART_URL.format(ticker=ticker)
+        params = {
+            "period1": int(start.timestamp()),
+            "period2": int(end.timestamp()),
+            "interval": "1d",
+            "events": "div,splits",
+        }
+        await self._bucket(url).acquire()
+        response = await self._client.get(url, params=params)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def parse_chart(payload: Optional[dict]) -> Optional[pd.DataFrame]:
+    """
+    Yahoo chart JSON -> yfinance-style frame (Date index, Open/High/Low/Close/Volume),
+    adjusted like auto_adjust=True (OHLC scaled by adjclose/close).
+    """
+    if not payload:
+        return None
+    result = (payload.get("chart") or {}).get("result") or []
+    if not result or not result[0].get("timestamp"):
+        return None
+    result = result[0]
+    quote = result["indicators"]["quote"][0]
+    offset = result.get("meta", {}).get("gmtoffset", 0)
+
+    df = pd.DataFrame({
+        "Date": pd.to_datetime([ts + offset for ts in result["timestamp"]], unit="s").normalize(),
+        "Open": quote.get("open"),
+        "High": quote.get("high"),
+        "Low": quote.get("low"),
+        "Close": quote.get("close"),
+        "Volume": quote.get("volume"),
+    }).astype({"Open": float, "High": float, "Low": float, "Close": float})
+
+    adjclose = result["indicators"].get("adjclose")
+    if adjclose:
+        adj = pd.Series(adjclose[0]["adjclose"], dtype=float)
+        ratio = adj / df["Close"]
+        for col in ("Open", "High", "Low"):
+            df[col] = df[col] * ratio
+        df["Close"] = adj
+    return df.set_index("Date")
+
+
+class AsyncIngestionPipeline:
+    """
+    fetch (async HTTP) -> normalize (thread) -> persist (thread), connected by
+    bounded queues. Each stage has its own concurrency limit so slow disk
+    writes back-pressure the queue instead of holding network slots.
+    """
+
+    def __init__(self, service, client: Optional[AsyncChartClient] = None,
+                 fetch_concurrency: int = HISTORY_ASYNC_FETCH_CONCURRENCY,
+                 normalize_concurrency: int = HISTORY_ASYNC_NORMALIZE_CONCURRENCY,
+                 persist_concurrency: int = HISTORY_ASYNC_PERSIST_CONCURRENCY,
+                 queue_size: int = HISTORY_ASYNC_QUEUE_SIZE,
+                 report_every: float = 5.0):
+        self.service = service
+        self.client = client
+        self.concurrency = {
+            "fetch": fetch_concurrency,
+            "normalize": normalize_concurrency,
+            "persist": persist_concurrency,
+        }
+        self.queue_size = queue_size
+        self.report_every = report_every
+        self.stats = {name: StageStats(name) for name in self.concurrency}
+        self.results = {"success": 0, "failed": 0, "skipped": 0, "error": 0}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._progress: Optional[Progress] = None
+
+    def snapshot(self) -> dict:
+        """Per-stage throughput and current queue depth."""
+        return {
+            name: {**stats.as_dict(), "queue_depth": self._queues[name].qsize() if name in self._queues else 0}
+            for name, stats in self.stats.items()
+        }
+
+    def _record(self, plan: dict, res: dict):
+        self.service._record(self.results, res, plan['exchange'])
+        if self._progress is not None:
+            self._progress.update(1, check=False)
+
+    async def _fetch_worker(self):
+        stats = self.stats["fetch"]
+        while True:
+            plan = await self._queues["fetch"].get()
+            if plan is _DONE:
+                return
+            if cancelled():
+                continue # Job cancelled: drain the queue without fetching
+            ticker = self.service.fetcher._get_yfinance_ticker(plan['symbol'], plan['exchange'])
+            t0 = time.monotonic()
+            try:
+                payload = await self.client.fetch_chart(ticker, plan['start_date'])
+                await self._queues["normalize"].put((plan, payload))
+            except Exception as e:
+                stats.errors += 1
+                self._record(plan, {"symbol": plan['symbol'], "status": "failed", "msg": str(e)})
+            stats.busy += time.monotonic() - t0
+            stats.processed += 1
+
+    def _normalize(self, plan: dict, payload: Optional[dict]) -> Optional[pd.DataFrame]:
+        raw = parse_chart(payload)
+        if raw is None or raw.empty:
+            return None
+        return self.service.fetcher._normalize(raw, plan['symbol'], plan['exchange'])
+
+    async def _normalize_worker(self):
+        stats = self.stats["normalize"]
+        while True:
+            item = await self._queues["normalize"].get()
+            if item is _DONE:
+                return
+            plan, payload = item
+            t0 = time.monotonic()
+            try:
+                df = await asyncio.to_thread(self._normalize, plan, payload)
+                await self._queues["persist"].put((plan, df))
+            except Exception as e:
+                stats.errors += 1
+                self._record(plan, {"symbol": plan['symbol'], "status": "error", "msg": str(e)})
+            stats.busy += time.monotonic() - t0
+            stats.processed += 1
+
+    async def _persist_worker(self):
+        stats = self.stats["persist"]
+        while True:
+            item = await self._queues["persist"].get()
+            if item is _DONE:
+                return
+            plan, df = item
+            t0 = time.monotonic()
+            try:
+                res = await asyncio.to_thread(self.service._store_stock, plan, df)
+            except Exception as e:
+                stats.errors += 1
+                res = {"symbol": plan['symbol'], "status": "error", "msg": str(e)}
+            self._record(plan, res)
+            stats.busy += time.monotonic() - t0
+            stats.processed += 1
+
+    async def _reporter(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            parts = [
+                f"{name}: {s['processed']} done, {s['per_sec']}/s, q={s['queue_depth']}"
+                for name, s in self.snapshot().items()
+            ]
+            print("Pipeline | " + " | ".join(parts))
+
+    async def run(self, plans: List[dict]) -> dict:
+        self._progress = Progress(total=len(plans), desc="history", disable=True) # Console output is _reporter's
+        own_client = self.client is None
+        if own_client:
+            self.client = AsyncChartClient(max_connections=self.concurrency["fetch"])
+        self._queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in self.concurrency}
+        for stats in self.stats.values():
+            stats.started = time.monotonic()
+
+        workers = {
+            "fetch": [asyncio.create_task(self._fetch_worker()) for _ in range(self.concurrency["fetch"])],
+            "normalize": [asyncio.create_task(self._normalize_worker()) for _ in range(self.concurrency["normalize"])],
+            "persist": [asyncio.create_task(self._persist_worker()) for _ in range(self.concurrency["persist"])],
+        }
+        reporter = asyncio.create_task(self._reporter())
+
+        try:
+            for plan in plans:
+                await self._queues["fetch"].put(plan)
+            # Drain stage by stage: a stage's sentinels go in once the previous stage has finished
+            for name in ("fetch", "normalize", "persist"):
+                for _ in workers[name]:
+                    await self._queues[name].put(_DONE)
+                await asyncio.gather(*workers[name])
+            checkpoint()
+        finally:
+            reporter.cancel()
+            self._progress.close()
+            if own_client:
+                await self.client.aclose()
+                self.client = None
+        return self.results
@@ -13,3 +13,9 @@ class HistoricalRecord:
     volume: int
     data_source_date: date
     is_last_trading_day: bool
+
+# Column order / types used by the columnar store.
+HISTORY_COLUMNS = [
+    'exchange', 'symbol', 'trade_date', 'open', 'high', 'low', 'close',
+    'volume', 'data_source_date', 'is_last_trading_day'
+]
@@ -1,16 +1,19 @@
+import asyncio
 import pandas as pd
 from datetime import date
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
-from config.settings import PROCESSED_DIR
+from config.settings import PROCESSED_DIR, HISTORY_BATCH_SIZE
 from src.historical.fetcher import HistoricalDataFetcher
 from src.historical.store import HistoricalDataCache
+from src.historical.panel import OHLCVPanel
 from src.historical.calendar import MarketCalendarService
+from src.utils.progress import Progress, track
 
 class HistoricalDataService:
     def __init__(self):
         self.fetcher = HistoricalDataFetcher()
         self.cache = HistoricalDataCache()
+        self.panel = OHLCVPanel()
         self.calendar = MarketCalendarService()
         self.market_status = self.calendar.get_market_status()
         self.universe_path = PROCESSED_DIR / "universe.parquet"
@@ -20,83 +23,183 @@ class HistoricalDataService:
             raise FileNotFoundError("Universe file not found. Run Phase 1 first.")
         return pd.read_parquet(self.universe_path)
 
+    def _stale_universe(self, universe: pd.DataFrame, results: dict) -> pd.DataFrame:
+        """
+        Universe rows whose stored history ends before the last valid trading day,
+        worked out from the store manifest in one vectorized comparison.
+        Adds a 'last_date' column (NaT/None when the symbol has no history yet).
+        """
+        freshness = self.cache.freshness()[['exchange', 'symbol', 'last_date']]
+        merged = universe.merge(freshness, on=['exchange', 'symbol'], how='left')
+        
+        # We need data up to last valid trading day
+        target = pd.Timestamp(self.market_status['last_valid_day'])
+        last = pd.to_datetime(merged['last_date'])
+        stale = merged[last.isna() | (last < target)]
+        
+        results['skipped'] = results.get('skipped', 0) + (len(merged) - len(stale))
+        print(f"{len(stale)} stocks need data ({len(merged) - len(stale)} up to date).")
+        return stale
+
+    def _plan_stock(self, row) -> dict:
+        """Full or incremental fetch, from the manifest's last_date on the (stale) row."""
+        symbol = row['symbol']
+        exchange = row['exchange']
+        last_date = row.get('last_date')
+        
+        plan = {"symbol": symbol, "exchange": exchange, "mode": "full", "start_date": None, "last_date": None}
+        
+        if last_date is not None and not pd.isna(last_date):
+            last_date = pd.Timestamp(last_date).date()
+            plan["start_date"] = last_date + pd.Timedelta(days=1)
+            plan["last_date"] = last_date
+            plan["mode"] = "incremental"
+        return plan
+
+    def _record(self, results: dict, res: dict, exchange: str):
+        results[res['status']] = results.get(res['status'], 0) + 1
+        self.cache.record_status(res['symbol'], exchange, res['status'])
+
+    def _store_stock(self, plan: dict, new_df) -> dict:
+        """Merges fetched rows into the store according to the plan."""
+        symbol = plan['symbol']
+        exchange = plan['exchange']
+        mode = plan['mode']
+        
+        if new_df is None or new_df.empty:
+            return {"symbol": symbol, "status": "failed", "msg": "No data returned"}
+        
+        # 3. Merge
+        if mode == "incremental":
+            # Only the new rows are written; the store appends them as a
+            # delta segment and merges on read until compaction.
+            combined_df = new_df[new_df['trade_date'] > plan['last_date']]
+            if combined_df.empty:
+                return {"symbol": symbol, "status": "skipped", "msg": "No new rows"}
+        else:
+            combined_df = new_df
+        
+        # 4. Enhance/Validate
+        combined_df = combined_df.sort_values('trade_date').copy()
+        
+        # Add metadata columns
+        combined_df['data_source_date'] = self.market_status['today']
+        
+        # Vectorized 'is_last_trading_day'
+        # The last row IS the last available trading data. 
+        # Does it match the market's specific last trading day?
+        # If market is OPEN (mid-day), last row might be TODAY.
+        # If market is CLOSED (evening), last row should be TODAY.
+        # If Holiday, last row is PREV BUS DAY.
+        # Simple logic: check if date == last_valid_day
+        last_valid_day = self.market_status['last_valid_day']
+        combined_df['is_last_trading_day'] = combined_df['trade_date'] == last_valid_day
+        
+        # 5. Save
+        if mode == "incremental":
+            self.cache.append(combined_df, symbol, exchange)
+        else:
+            self.cache.save(combined_df, symbol, exchange)
+        
+        return {"symbol": symbol, "status": "success", "msg": f"Updated ({mode})"}
+
     def _process_stock(self, row) -> dict:
         symbol = row['symbol']
         exchange = row['exchange']
         
         try:
-            # 1. Load Existing
-            existing_df = self.cache.load(symbol, exchange)
-            
-            start_date = None
-            mode = "full"
-            
-            if not existing_df.empty:
-                last_date = existing_df['trade_date'].max()
-                # Check if up to date
-                # We need data up to last valid trading day
-                target_date = self.market_status['last_valid_day']
-                
-                if last_date >= target_date:
-                    return {"symbol": symbol, "status": "skipped", "msg": "Up to date"}
-                
-                start_date = last_date + pd.Timedelta(days=1)
-                mode = "incremental"
+            plan = self._plan_stock(row)
             
             # 2. Fetch Data
-            if mode == "full":
+            if plan['mode'] == "full":
                 new_df = self.fetcher.fetch_history(symbol, exchange, period="5y")
             else:
                 # If incremental, end_date defaults to today in fetcher if None
-                new_df = self.fetcher.fetch_history(symbol, exchange, start_date=start_date)
+                new_df = self.fetcher.fetch_history(symbol, exchange, start_date=plan['start_date'])
             
-            if new_df is None or new_df.empty:
-                return {"symbol": symbol, "status": "failed", "msg": "No data returned"}
-            
-            # 3. Merge
-            if mode == "incremental" and not existing_df.empty:
-                # Filter out overlap if any
-                combined_df = pd.concat([existing_df, new_df])
-                combined_df = combined_df.drop_duplicates(subset=['trade_date'], keep='last')
-            else:
-                combined_df = new_df
-            
-            # 4. Enhance/Validate
-            combined_df = combined_df.sort_values('trade_date')
-            
-            # Add metadata columns
-            combined_df['data_source_date'] = self.market_status['today']
-            
-            # Vectorized 'is_last_trading_day'
-            # The last row IS the last available trading data. 
-            # Does it match the market's specific last trading day?
-            # If market is OPEN (mid-day), last row might be TODAY.
-            # If market is CLOSED (evening), last row should be TODAY.
-            # If Holiday, last row is PREV BUS DAY.
-            # Simple logic: check if date == last_valid_day
-            last_valid_day = self.market_status['last_valid_day']
-            combined_df['is_last_trading_day'] = combined_df['trade_date'] == last_valid_day
-            
-            # 5. Save
-            self.cache.save(combined_df, symbol, exchange)
-            
-            return {"symbol": symbol, "status": "success", "msg": f"Updated ({mode})"}
+            return self._store_stock(plan, new_df)
             
         except Exception as e:
             return {"symbol": symbol, "status": "error", "msg": str(e)}
 
-    def update_all(self, max_workers=10):
+    def _update_per_symbol(self, stale: pd.DataFrame, max_workers: int, results: dict):
+        rows = [row for _, row in stale.iterrows()]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_stock = {executor.submit(self._process_stock, row): row for row in rows}
+            
+            for future in track(as_completed(future_to_stock), total=len(rows), desc="history", pending=future_to_stock):
+                self._record(results, future.result(), future_to_stock[future]['exchange'])
+
+    def _plan_all(self, stale: pd.DataFrame) -> dict:
+        """{(symbol, exchange): plan} for every stale row. No store reads needed."""
+        plans = {}
+        for _, row in stale.iterrows():
+            plan = self._plan_stock(row)
+            plans[(plan['symbol'], plan['exchange'])] = plan
+        return plans
+
+    def _update_batched(self, stale: pd.DataFrame, batch_size: int, results: dict):
+        # 1. Plan
+        plans = self._plan_all(stale)
+        if not plans:
+            return
+        
+        # 2. Multi-ticker downloads, stored chunk by chunk as they arrive
+        tasks = [(p['symbol'], p['exchange'], p['start_date']) for p in plans.values()]
+        with Progress(total=len(tasks), desc="history") as progress:
+            for chunk_results in self.fetcher.iter_batches(tasks, batch_size=batch_size):
+                for key, new_df in chunk_results.items():
+                    try:
+                        res = self._store_stock(plans[key], new_df)
+                    except Exception as e:
+                        res = {"symbol": key[0], "status": "error", "msg": str(e)}
+                    self._record(results, res, key[1])
+                progress.update(len(chunk_results))
+
+    def update_all(self, max_workers=10, batch=True, batch_size=HISTORY_BATCH_SIZE):
         print("Loading universe...")
         universe = self.load_universe()
         print(f"Market Status: {self.market_status}")
         
-        tasks = []
-        rows = [row for _, row in universe.iterrows()]
+        results = {
+            "success": 0,
+            "failed": 0,
+            "skipped": 0,
+            "error": 0
+        }
+        
+        # Only stale symbols are submitted; fresh ones never touch their files
+        stale = self._stale_universe(universe, results)
         
-        # Testing Limit? User said 3000+, but for verify we might want to see progress.
-        # We will process ALL.
+        mode = f"batches of {batch_size}" if batch else "per-symbol requests"
+        print(f"Updating {len(stale)} of {len(universe)} stocks with {max_workers} workers ({mode})...")
         
-        print(f"Updating {len(rows)} stocks with {max_workers} workers...")
+        completed = False
+        try:
+            if batch:
+                self._update_batched(stale, batch_size, results)
+            else:
+                self._update_per_symbol(stale, max_workers, results)
+            completed = True
+        finally:
+            # Buffered backends (partitioned store) write their partitions here
+            self.cache.flush()
+            if not completed:
+                self._interrupted(results)
+
+        return self._finish_update(results)
+
+    def update_all_async(self, **pipeline_options):
+        """
+        Alternative to update_all: fetch -> normalize -> persist as an asyncio
+        pipeline with per-stage concurrency and a per-host rate limit.
+        pipeline_options are passed to AsyncIngestionPipeline.
+        """
+        from src.historical.pipeline import AsyncIngestionPipeline
+        
+        print("Loading universe...")
+        universe = self.load_universe()
+        print(f"Market Status: {self.market_status}")
         
         results = {
             "success": 0,
@@ -105,16 +208,59 @@ class HistoricalDataService:
             "error": 0
         }
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_stock = {executor.submit(self._process_stock, row): row['symbol'] for row in rows}
-            
-            for future in tqdm(as_completed(future_to_stock), total=len(rows)):
-                res = future.result()
-                status = res['status']
-                results[status] = results.get(status, 0) + 1
+        completed = False
+        try:
+            plans = self._plan_all(self._stale_universe(universe, results))
+            if plans:
+                pipeline = AsyncIngestionPipeline(self, **pipeline_options)
+                print(f"Ingesting {len(plans)} stocks (async pipeline, concurrency {pipeline.concurrency})...")
+                try:
+                    asyncio.run(pipeline.run(list(plans.values())))
+                finally:
+                    # Counts so far, also when the run stopped early
+                    for status, count in pipeline.results.items():
+                        results[status] = results.get(status, 0) + count
+                for stage in pipeline.snapshot().values():
+                    print(f"  {stage['stage']:<10} {stage['processed']:>6} done  {stage['per_sec']:>8}/s  errors={stage['errors']}")
+            completed = True
+        finally:
+            self.cache.flush()
+            if not completed:
+                self._interrupted(results)
+
+        return self._finish_update(results)
+
+    def _rebuild_panel(self):
+        print("Rebuilding OHLCV panel...")
+        try:
+            self.panel.build_from_store(self.cache)
+        except Exception as e:
+            print(f"Panel rebuild failed: {e}")
+
+    def _interrupted(self, results: dict):
+        """Update stopped early (cancelled job or error): rows already stored still reach the scan panel."""
+        if results["success"] > 0:
+            print(f"Update interrupted after {results['success']} stored; syncing the panel with them.")
+            self._rebuild_panel()
+
+    def _finish_update(self, results: dict) -> dict:
+        if self.cache.needs_compaction():
+            self.compact()
+
+        # Keep the memory-mapped scan panel in sync with the store
+        if results["success"] > 0 or not self.panel.is_available():
+            self._rebuild_panel()
                 
         print("\nPhase 2 Update Complete.")
         print(f"Summary: {results}")
+        return results
+
+    def compact(self):
+        """Folds appended delta segments into the base history files."""
+        print(f"Compacting history store (segment depth: {self.cache.segment_depth()})...")
+        folded = self.cache.compact()
+        print(f"Compaction complete ({folded} folded).")
+        return folded
 
 if __name__ == "__main__":
     svc = HistoricalDataService()
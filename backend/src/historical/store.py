@@ -1,30 +1,628 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import threading
+import uuid
+from datetime import datetime
 from pathlib import Path
-from config.settings import DATA_DIR
+from typing import Dict, Iterable, List, Optional, Tuple
+from config.settings import (
+    DATA_DIR,
+    HISTORY_STORE_BACKEND,
+    HISTORY_STORE_FLUSH_SYMBOLS,
+    HISTORY_STORE_ROW_GROUP_ROWS,
+    HISTORY_COMPACT_MIN_SEGMENTS,
+)
+from src.historical.schema import HISTORY_COLUMNS
+from src.historical.manifest import HistoryManifest
+from src.utils.locks import file_lock
 import os
 
-class HistoricalDataCache:
-    def __init__(self):
-        self.base_path = DATA_DIR / "historical"
-        
-    def _get_path(self, exchange: str, symbol: str) -> Path:
+HISTORY_ARROW_SCHEMA = pa.schema([
+    ('exchange', pa.string()),
+    ('symbol', pa.string()),
+    ('trade_date', pa.date32()),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('volume', pa.int64()),
+    ('data_source_date', pa.date32()),
+    ('is_last_trading_day', pa.bool_()),
+])
+
+
+def merge_history(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merges a base frame with newer delta frames (oldest first).
+    Later rows win on (exchange, symbol, trade_date). Only the newest
+    is_last_trading_day flag per symbol is kept, since older deltas were
+    flagged against an earlier session.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    keys = [c for c in ('exchange', 'symbol') if c in df.columns]
+    df = df.drop_duplicates(subset=keys + ['trade_date'], keep='last')
+    df = df.sort_values(keys + ['trade_date']).reset_index(drop=True)
+
+    if 'is_last_trading_day' in df.columns:
+        flags = df['is_last_trading_day'].fillna(False).astype(bool)
+        flagged_dates = pd.to_datetime(df['trade_date']).where(flags)
+        latest = flagged_dates.groupby([df[k] for k in keys]).transform('max') if keys else flagged_dates.max()
+        df['is_last_trading_day'] = flags & (pd.to_datetime(df['trade_date']) == latest)
+    return df
+
+
+def _exchange_lock(base_path: Path, exchange: str, shared: bool = False):
+    """
+    Cross-process lock on an exchange's files: exclusive to rewrite them,
+    shared to read base files and segments as one consistent set. The API's
+    compaction loop and history updates (start_servers.py subprocesses,
+    in-process jobs) each have their own store object, so the store's
+    thread lock alone does not keep a compaction from racing a rewrite.
+    """
+    return file_lock(base_path / "_locks" / f"{exchange}.lock", shared=shared)
+
+
+def _segment_name() -> str:
+    # Lexical order == write order
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+class ParquetFileStore:
+    """
+    Legacy layout: one parquet file per (exchange, symbol).
+    Appended deltas live in <EXCHANGE>/_segments/<SYMBOL>/ until compacted.
+    """
+    name = "per_file"
+
+    def __init__(self, base_path: Optional[Path] = None):
+        self.base_path = base_path or DATA_DIR / "historical"
+
+    def _clean(self, symbol: str) -> str:
         # Avoid special chars in filename
-        clean_symbol = "".join(c for c in symbol if c.isalnum() or c in ('-','_'))
-        return self.base_path / exchange / f"{clean_symbol}.parquet"
+        return "".join(c for c in symbol if c.isalnum() or c in ('-','_'))
+
+    def _get_path(self, exchange: str, symbol: str) -> Path:
+        return self.base_path / exchange / f"{self._clean(symbol)}.parquet"
+
+    def _segment_dir(self, exchange: str, symbol: str) -> Path:
+        return self.base_path / exchange / "_segments" / self._clean(symbol)
+
+    def _segments(self, exchange: str, symbol: str) -> List[Path]:
+        seg_dir = self._segment_dir(exchange, symbol)
+        if not seg_dir.exists():
+            return []
+        return sorted(seg_dir.glob("*.parquet"))
 
     def save(self, df: pd.DataFrame, symbol: str, exchange: str):
+        """Write errors propagate, so the caller never records rows that aren't on disk."""
         path = self._get_path(exchange, symbol)
         path.parent.mkdir(parents=True, exist_ok=True)
-        try:
+        with _exchange_lock(self.base_path, exchange):
             df.to_parquet(path, index=False)
-        except Exception as e:
-            print(f"Error caching {symbol}: {e}")
+            # A full rewrite supersedes any pending deltas
+            for seg in self._segments(exchange, symbol):
+                seg.unlink()
+
+    def append(self, df: pd.DataFrame, symbol: str, exchange: str):
+        seg_dir = self._segment_dir(exchange, symbol)
+        with _exchange_lock(self.base_path, exchange):
+            seg_dir.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(seg_dir / _segment_name(), index=False)
 
     def load(self, symbol: str, exchange: str) -> pd.DataFrame:
         path = self._get_path(exchange, symbol)
-        if path.exists():
-            return pd.read_parquet(path)
-        return pd.DataFrame()
+        with _exchange_lock(self.base_path, exchange, shared=True):
+            base = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+            segments = [pd.read_parquet(seg) for seg in self._segments(exchange, symbol)]
+        if not segments:
+            return base
+        return merge_history([base] + segments)
+
+    def load_many(self, keys: Iterable[Tuple[str, str]]) -> pd.DataFrame:
+        """keys: (symbol, exchange) pairs. Returns one long frame."""
+        frames = [self.load(symbol, exchange) for symbol, exchange in keys]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def load_all(self) -> pd.DataFrame:
+        return self.load_many(self.keys())
+
+    def keys(self) -> List[Tuple[str, str]]:
+        # File names are sanitized symbols, which is what load() expects back
+        keys = set()
+        if not self.base_path.exists():
+            return []
+        for exchange_dir in self.base_path.iterdir():
+            if not exchange_dir.is_dir():
+                continue
+            for path in exchange_dir.glob("*.parquet"):
+                keys.add((path.stem, exchange_dir.name))
+            seg_root = exchange_dir / "_segments"
+            if seg_root.exists():
+                keys.update((p.name, exchange_dir.name) for p in seg_root.iterdir() if any(p.glob("*.parquet")))
+        return sorted(keys)
 
     def exists(self, symbol: str, exchange: str) -> bool:
-        return self._get_path(exchange, symbol).exists()
+        return self._get_path(exchange, symbol).exists() or bool(self._segments(exchange, symbol))
+
+    def has_data(self) -> bool:
+        nse_dir = self.base_path / "NSE"
+        return nse_dir.exists() and any(nse_dir.glob("*.parquet"))
+
+    def flush(self) -> bool:
+        return True # Writes are immediate
+
+    def segment_depth(self) -> int:
+        """Most segments any one symbol has pending (extra files merged per read)."""
+        if not self.base_path.exists():
+            return 0
+        return max((sum(1 for _ in d.glob("*.parquet")) for d in self.base_path.glob("*/_segments/*")), default=0)
+
+    def compact(self) -> int:
+        """Folds every symbol's segments into its base file. Returns symbols compacted."""
+        compacted = 0
+        for seg_dir in sorted(self.base_path.glob("*/_segments/*")):
+            exchange = seg_dir.parent.parent.name
+            path = self.base_path / exchange / f"{seg_dir.name}.parquet"
+            try:
+                with _exchange_lock(self.base_path, exchange):
+                    segments = sorted(seg_dir.glob("*.parquet"))
+                    if not segments:
+                        continue
+                    base = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+                    merged = merge_history([base] + [pd.read_parquet(seg) for seg in segments])
+                    temp_path = path.with_suffix(".tmp")
+                    merged.to_parquet(temp_path, index=False)
+                    os.replace(temp_path, path)
+                    # Only the segments folded above; newer ones wait for the next run
+                    for seg in segments:
+                        seg.unlink()
+                compacted += 1
+            except Exception as e:
+                print(f"Error compacting {exchange}/{seg_dir.name}: {e}")
+        return compacted
+
+
+class PartitionedParquetStore:
+    """
+    Consolidated layout: <root>/<EXCHANGE>/<YEAR>.parquet, each file sorted by
+    (symbol, trade_date) with small row groups, so per-symbol reads are served
+    by row-group statistics instead of opening thousands of files.
+
+    save() is buffered; on flush() (or automatically once
+    HISTORY_STORE_FLUSH_SYMBOLS symbols are pending) the years holding the
+    saved symbols are rewritten, staged and then swapped in together.
+    Symbols with nothing stored yet are written as a segment instead.
+    append() deltas are flushed into <root>/<EXCHANGE>/_segments/*.parquet,
+    merged transparently on read and folded into the year files by compact().
+    Both hold the exchange's cross-process lock while they rewrite its files.
+    """
+    name = "partitioned"
+
+    def __init__(self, base_path: Optional[Path] = None, flush_every: int = HISTORY_STORE_FLUSH_SYMBOLS):
+        self.base_path = base_path or DATA_DIR / "history_store"
+        self.flush_every = flush_every
+        self._pending = {} # (exchange, symbol) -> DataFrame (full replacement)
+        self._pending_deltas = {} # (exchange, symbol) -> [DataFrame, ...]
+        self._lock = threading.RLock()
+        self._index = None # Lazily built set of (exchange, symbol)
+
+    # ---------- Layout ----------
+
+    def _partition_path(self, exchange: str, year: int) -> Path:
+        return self.base_path / exchange / f"{year}.parquet"
+
+    def _partition_files(self, exchange: str) -> List[Path]:
+        exchange_dir = self.base_path / exchange
+        if not exchange_dir.exists():
+            return []
+        return sorted(exchange_dir.glob("[0-9][0-9][0-9][0-9].parquet"))
+
+    def _segment_files(self, exchange: str) -> List[Path]:
+        seg_dir = self.base_path / exchange / "_segments"
+        if not seg_dir.exists():
+            return []
+        return sorted(seg_dir.glob("*.parquet"))
+
+    def _exchanges(self) -> List[str]:
+        if not self.base_path.exists():
+            return []
+        return sorted(p.name for p in self.base_path.iterdir() if p.is_dir() and not p.name.startswith("_"))
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        df = df.copy()
+        for col in HISTORY_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
+        df['data_source_date'] = pd.to_datetime(df['data_source_date']).dt.date
+        df['volume'] = df['volume'].fillna(0).astype('int64')
+        df['is_last_trading_day'] = df['is_last_trading_day'].fillna(False).astype(bool)
+        return pa.Table.from_pandas(df[HISTORY_COLUMNS], schema=HISTORY_ARROW_SCHEMA, preserve_index=False)
+
+    @staticmethod
+    def _to_frame(table: Optional[pa.Table]) -> pd.DataFrame:
+        if table is None or table.num_rows == 0:
+            return pd.DataFrame()
+        table = table.sort_by([('exchange', 'ascending'), ('symbol', 'ascending'), ('trade_date', 'ascending')])
+        return table.to_pandas()
+
+    def _write_partitions(self, tables: Dict[Path, pa.Table]):
+        """
+        Writes every file to a temp path first and only then swaps them all
+        in, so a failed write leaves each file with its old contents instead
+        of some years updated and others not. Empty tables delete the file.
+        """
+        staged = []
+        try:
+            for path, table in tables.items():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if table.num_rows == 0:
+                    staged.append((path, None))
+                    continue
+                temp_path = path.with_suffix(".tmp")
+                pq.write_table(table, temp_path, row_group_size=HISTORY_STORE_ROW_GROUP_ROWS, write_statistics=True)
+                staged.append((path, temp_path))
+        except Exception:
+            for _, temp_path in staged:
+                if temp_path is not None:
+                    temp_path.unlink(missing_ok=True)
+            raise
+        for path, temp_path in staged:
+            if temp_path is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.replace(temp_path, path)
+
+    # ---------- Reads ----------
+
+    @staticmethod
+    def _scan(files: List[Path], filter_expr=None, columns=None) -> Optional[pa.Table]:
+        if not files:
+            return None
+        dataset = ds.dataset([str(f) for f in files], format="parquet", schema=HISTORY_ARROW_SCHEMA)
+        return dataset.to_table(filter=filter_expr, columns=columns)
+
+    def _read(self, exchange: str, filter_expr=None) -> pd.DataFrame:
+        """Base partitions merged with on-disk segments."""
+        # Shared lock: a compaction between the two reads would drop the rows it folds
+        with _exchange_lock(self.base_path, exchange, shared=True):
+            base = self._to_frame(self._scan(self._partition_files(exchange), filter_expr))
+            # Segments are read in write order so later deltas win
+            deltas = [self._scan([seg], filter_expr).to_pandas() for seg in self._segment_files(exchange)]
+        if not deltas:
+            return base
+        return merge_history([base] + deltas)
+
+    def _overlay_pending(self, df: pd.DataFrame, keys: List[Tuple[str, str]]) -> pd.DataFrame:
+        """Applies buffered (unflushed) saves/appends for the given (exchange, symbol) keys."""
+        with self._lock:
+            replaced = {k: self._pending[k] for k in keys if k in self._pending}
+            deltas = {k: list(self._pending_deltas[k]) for k in keys if k in self._pending_deltas}
+        if not replaced and not deltas:
+            return df
+        if replaced and not df.empty:
+            key_index = pd.MultiIndex.from_arrays([df['exchange'], df['symbol']])
+            df = df[~key_index.isin(list(replaced.keys()))]
+        frames = [df] + list(replaced.values()) + [d for frames in deltas.values() for d in frames]
+        return merge_history(frames)
+
+    def load(self, symbol: str, exchange: str) -> pd.DataFrame:
+        key = (exchange, symbol)
+        with self._lock:
+            pending = self._pending.get(key)
+            has_deltas = key in self._pending_deltas
+        if pending is not None:
+            return pending.copy()
+        df = self._read(exchange, ds.field('symbol') == symbol)
+        if has_deltas:
+            df = self._overlay_pending(df, [key])
+        return df.reset_index(drop=True)
+
+    def load_many(self, keys: Iterable[Tuple[str, str]]) -> pd.DataFrame:
+        """keys: (symbol, exchange) pairs. One dataset read per exchange."""
+        by_exchange = {}
+        for symbol, exchange in keys:
+            by_exchange.setdefault(exchange, set()).add(symbol)
+
+        frames = []
+        for exchange, symbols in by_exchange.items():
+            df = self._read(exchange, ds.field('symbol').isin(sorted(symbols)))
+            df = self._overlay_pending(df, [(exchange, s) for s in symbols])
+            if not df.empty:
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def load_all(self) -> pd.DataFrame:
+        self.flush()
+        frames = [df for df in (self._read(ex) for ex in self._exchanges()) if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            if self._index is None:
+                index = set()
+                for exchange in self._exchanges():
+                    files = self._partition_files(exchange) + self._segment_files(exchange)
+                    table = self._scan(files, columns=['symbol'])
+                    if table is not None:
+                        index.update((exchange, s) for s in pc.unique(table['symbol']).to_pylist())
+                self._index = index
+            keys = self._index | set(self._pending) | set(self._pending_deltas)
+        return sorted((symbol, exchange) for exchange, symbol in keys)
+
+    def exists(self, symbol: str, exchange: str) -> bool:
+        return (symbol, exchange) in set(self.keys())
+
+    def has_data(self) -> bool:
+        return bool(self._partition_files("NSE") or self._segment_files("NSE") or self._pending)
+
+    # ---------- Writes ----------
+
+    def save(self, df: pd.DataFrame, symbol: str, exchange: str):
+        """Replaces all rows of (exchange, symbol). Buffered until flush()."""
+        with self._lock:
+            self._pending[(exchange, symbol)] = df
+            self._pending_deltas.pop((exchange, symbol), None)
+            should_flush = len(self._pending) + len(self._pending_deltas) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def append(self, df: pd.DataFrame, symbol: str, exchange: str):
+        """Adds new rows for (exchange, symbol) without rewriting its history."""
+        key = (exchange, symbol)
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = merge_history([self._pending[key], df])
+            else:
+                self._pending_deltas.setdefault(key, []).append(df)
+            should_flush = len(self._pending) + len(self._pending_deltas) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Writes buffered rows. False if some stay buffered after a write error (retried next flush)."""
+        with self._lock:
+            if not self._pending and not self._pending_deltas:
+                return True
+            pending, self._pending = self._pending, {}
+            pending_deltas, self._pending_deltas = self._pending_deltas, {}
+
+            by_exchange = {}
+            for (exchange, symbol), df in pending.items():
+                by_exchange.setdefault(exchange, {})[symbol] = df
+
+            for exchange, frames in by_exchange.items():
+                try:
+                    with _exchange_lock(self.base_path, exchange):
+                        stored = self._stored_symbols(exchange, frames.keys())
+                        new = [df for symbol, df in frames.items() if symbol not in stored]
+                        if new:
+                            # Nothing on disk to replace: written like deltas (compaction folds them), so an
+                            # initial download does not rewrite the growing year files on every flush
+                            self._write_segment(exchange, new)
+                        replaced = {symbol: df for symbol, df in frames.items() if symbol in stored}
+                        if replaced:
+                            # Older segments for these symbols would override the new full history
+                            if self._segments_touch(exchange, replaced.keys()):
+                                self._compact_exchange(exchange)
+                            self._rewrite_exchange(exchange, replaced)
+                except Exception as e:
+                    print(f"Error flushing {exchange} history store: {e}")
+                    # Keep the data buffered so a later flush can retry
+                    for symbol, df in frames.items():
+                        self._pending.setdefault((exchange, symbol), df)
+
+            deltas_by_exchange = {}
+            for (exchange, symbol), dfs in pending_deltas.items():
+                deltas_by_exchange.setdefault(exchange, []).extend(dfs)
+
+            for exchange, dfs in deltas_by_exchange.items():
+                try:
+                    with _exchange_lock(self.base_path, exchange):
+                        self._write_segment(exchange, dfs)
+                except Exception as e:
+                    print(f"Error writing {exchange} history segment: {e}")
+                    for (ex, symbol), frames in pending_deltas.items():
+                        if ex == exchange:
+                            self._pending_deltas.setdefault((ex, symbol), []).extend(frames)
+            self._index = None
+            return not self._pending and not self._pending_deltas
+
+    def _write_segment(self, exchange: str, dfs: List[pd.DataFrame]):
+        table = self._to_table(pd.concat(dfs, ignore_index=True))
+        table = table.sort_by([('symbol', 'ascending'), ('trade_date', 'ascending')])
+        self._write_partitions({self.base_path / exchange / "_segments" / _segment_name(): table})
+
+    def _stored_symbols(self, exchange: str, symbols) -> set:
+        """Those of `symbols` with rows in the exchange's year files or segments."""
+        files = self._partition_files(exchange) + self._segment_files(exchange)
+        table = self._scan(files, ds.field('symbol').isin(sorted(symbols)), columns=['symbol'])
+        return set(pc.unique(table['symbol']).to_pylist()) if table is not None else set()
+
+    def _segments_touch(self, exchange: str, symbols) -> bool:
+        table = self._scan(self._segment_files(exchange), ds.field('symbol').isin(sorted(symbols)), columns=['symbol'])
+        return table is not None and table.num_rows > 0
+
+    def _rewrite_exchange(self, exchange: str, frames: dict):
+        symbols = pa.array(sorted(frames.keys()), type=pa.string())
+        new_table = self._to_table(pd.concat(frames.values(), ignore_index=True))
+        new_years = pc.year(new_table['trade_date'])
+
+        # Only years with new rows or old rows of the saved symbols change (row-group stats answer the lookup)
+        years = set(pc.unique(new_years).to_pylist())
+        old = self._scan(self._partition_files(exchange), ds.field('symbol').isin(symbols), columns=['trade_date'])
+        if old is not None and old.num_rows:
+            years |= set(pc.unique(pc.year(old['trade_date'])).to_pylist())
+
+        tables = {}
+        for year in sorted(years):
+            path = self._partition_path(exchange, year)
+            parts = []
+            if path.exists():
+                existing = pq.read_table(path, schema=HISTORY_ARROW_SCHEMA)
+                # Symbols being saved are replaced wholesale
+                parts.append(existing.filter(pc.invert(pc.is_in(existing['symbol'], value_set=symbols))))
+            parts.append(new_table.filter(pc.equal(new_years, year)))
+            tables[path] = pa.concat_tables(parts).sort_by([('symbol', 'ascending'), ('trade_date', 'ascending')])
+        self._write_partitions(tables)
+
+    # ---------- Compaction ----------
+
+    def segment_depth(self) -> int:
+        """Most segment files pending in any exchange (extra files merged per read)."""
+        return max((len(self._segment_files(ex)) for ex in self._exchanges()), default=0)
+
+    def compact(self) -> int:
+        """Folds all on-disk segments into the year partitions. Returns segments folded."""
+        self.flush()
+        folded = 0
+        with self._lock:
+            for exchange in self._exchanges():
+                try:
+                    with _exchange_lock(self.base_path, exchange):
+                        folded += self._compact_exchange(exchange)
+                except Exception as e:
+                    print(f"Error compacting {exchange} history store: {e}")
+            self._index = None
+        return folded
+
+    def _compact_exchange(self, exchange: str) -> int:
+        segments = self._segment_files(exchange)
+        if not segments:
+            return 0
+        deltas = merge_history([self._scan([seg]).to_pandas() for seg in segments])
+        delta_table = self._to_table(deltas)
+        delta_years = pc.year(delta_table['trade_date'])
+
+        tables = {}
+        for year in sorted(set(pc.unique(delta_years).to_pylist())):
+            path = self._partition_path(exchange, year)
+            year_deltas = delta_table.filter(pc.equal(delta_years, year)).to_pandas()
+            base = pq.read_table(path, schema=HISTORY_ARROW_SCHEMA).to_pandas() if path.exists() else pd.DataFrame()
+            merged = merge_history([base, year_deltas])
+            tables[path] = self._to_table(merged).sort_by([('symbol', 'ascending'), ('trade_date', 'ascending')])
+
+        # Stale last-trading-day flags from earlier years (deltas may cross a year boundary)
+        self._clear_superseded_flags(exchange, deltas, tables)
+        self._write_partitions(tables)
+
+        for seg in segments:
+            seg.unlink()
+        return len(segments)
+
+    def _clear_superseded_flags(self, exchange: str, deltas: pd.DataFrame, tables: Dict[Path, pa.Table]):
+        """Adds the earlier-year partitions whose flags need clearing to `tables` (staged ones are edited there)."""
+        flagged = deltas[deltas['is_last_trading_day'].fillna(False).astype(bool)]
+        if flagged.empty:
+            return
+        latest = pd.to_datetime(flagged['trade_date']).min().year
+        for path in sorted(set(self._partition_files(exchange)) | set(tables)):
+            if int(path.stem) >= latest:
+                continue
+            table = tables[path] if path in tables else pq.read_table(path, schema=HISTORY_ARROW_SCHEMA)
+            hit = pc.and_(table['is_last_trading_day'], pc.is_in(table['symbol'], value_set=pa.array(flagged['symbol'].unique(), type=pa.string())))
+            if pc.any(hit).as_py():
+                flags = pc.and_(table['is_last_trading_day'], pc.invert(hit))
+                tables[path] = table.set_column(table.schema.get_field_index('is_last_trading_day'), 'is_last_trading_day', flags)
+
+
+BACKENDS = {
+    ParquetFileStore.name: ParquetFileStore,
+    PartitionedParquetStore.name: PartitionedParquetStore,
+}
+
+
+def resolve_backend_name(name: Optional[str] = None) -> str:
+    name = name or HISTORY_STORE_BACKEND
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown history store backend: {name}. Expected one of {list(BACKENDS)} or 'auto'.")
+        return name
+    # Auto: prefer whichever layout already holds data, partitioned for fresh installs
+    if PartitionedParquetStore().has_data():
+        return PartitionedParquetStore.name
+    if ParquetFileStore().has_data():
+        return ParquetFileStore.name
+    return PartitionedParquetStore.name
+
+
+class HistoricalDataCache:
+    """
+    Entry point used by the services. Delegates to the configured backend
+    (see HISTORY_STORE_BACKEND in config.settings).
+    """
+    def __init__(self, backend: Optional[str] = None):
+        self.backend_name = resolve_backend_name(backend)
+        self.backend = BACKENDS[self.backend_name]()
+        self.base_path = self.backend.base_path
+        self.manifest = HistoryManifest(self.base_path / "_manifest.parquet")
+
+    def save(self, df: pd.DataFrame, symbol: str, exchange: str):
+        # Recorded only once the backend accepted the rows (a write error raises past this)
+        self.backend.save(df, symbol, exchange)
+        self.manifest.record_save(df, symbol, exchange)
+
+    def append(self, df: pd.DataFrame, symbol: str, exchange: str):
+        self.backend.append(df, symbol, exchange)
+        self.manifest.record_append(df, symbol, exchange)
+
+    def record_status(self, symbol: str, exchange: str, status: str):
+        self.manifest.record_status(symbol, exchange, status)
+
+    def freshness(self) -> pd.DataFrame:
+        """
+        Manifest as a frame (exchange, symbol, first_date, last_date, rows, ...).
+        Built from the store once if no manifest exists yet (e.g. after upgrading).
+        """
+        if not self.manifest.exists() and self.has_data():
+            print("Building history manifest from store (one-time)...")
+            self.manifest.rebuild(self.load_all())
+        return self.manifest.frame()
+
+    def load(self, symbol: str, exchange: str) -> pd.DataFrame:
+        return self.backend.load(symbol, exchange)
+
+    def load_many(self, keys: Iterable[Tuple[str, str]]) -> pd.DataFrame:
+        return self.backend.load_many(keys)
+
+    def load_all(self) -> pd.DataFrame:
+        return self.backend.load_all()
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return self.backend.keys()
+
+    def exists(self, symbol: str, exchange: str) -> bool:
+        return self.backend.exists(symbol, exchange)
+
+    def has_data(self) -> bool:
+        return self.backend.has_data()
+
+    def flush(self):
+        # Data first, so the manifest never claims rows that aren't on disk
+        if self.backend.flush():
+            self.manifest.save()
+        else:
+            print("History store flush incomplete; manifest not saved until the buffered rows are written.")
+
+    def segment_depth(self) -> int:
+        return self.backend.segment_depth()
+
+    def needs_compaction(self) -> bool:
+        return self.segment_depth() >= HISTORY_COMPACT_MIN_SEGMENTS
+
+    def compact(self) -> int:
+        return self.backend.compact()
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import numpy as np
+from src.analytics.config import BreakoutConfig
+from src.historical.panel import OHLCVPanel
+from src.live.sources import TickSource
+from src.live.triggers import TriggerIndex
+from src.market_state.enums import MarketState
+from src.market_state.resolver import MarketStateResolver, get_market_resolver
+
+
+class LatencyStats:
+    """Rolling latency sample (microseconds) with percentile snapshots."""
+
+    def __init__(self, size: int = 10000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds * 1e6)
+        self.count += 1
+
+    def as_dict(self) -> dict:
+        if not self.samples:
+            return {"count": self.count}
+        arr = np.fromiter(self.samples, dtype=np.float64)
+        return {
+            "count": self.count,
+            "p50_us": round(float(np.percentile(arr, 50)), 1),
+            "p99_us": round(float(np.percentile(arr, 99)), 1),
+            "max_us": round(float(arr.max()), 1),
+        }
+
+
+class LiveBreakoutMonitor:
+    """
+    Live intraday breakouts while the market is OPEN.
+
+    Once per session the TriggerIndex is built from the OHLCV panel; after
+    that every tick from the source is a dictionary lookup plus two binary
+    searches, and crossings are pushed to the WebSocket clients as
+    {"type": "breakout", "events": [...]}.
+    """
+    STATE_CHECK_INTERVAL = 30 # Seconds between market-state checks
+
+    def __init__(self, broadcast: Callable[[str], Awaitable[None]], source_factory: Callable[[], TickSource],
+                 panel: Optional[OHLCVPanel] = None, config: BreakoutConfig = None,
+                 resolver: Optional[MarketStateResolver] = None):
+        self.broadcast = broadcast
+        self.source_factory = source_factory
+        self.panel = panel or OHLCVPanel()
+        self.index = TriggerIndex(config)
+        self.resolver = resolver or get_market_resolver()
+        self.tick_latency = LatencyStats() # Tick in -> events ready
+        self.push_latency = LatencyStats() # Tick in -> broadcast done (ticks with events only)
+        self.ticks = 0
+        self.events = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "session_date": self.index.session_date.isoformat() if self.index.session_date else None,
+            "symbols": len(self.index),
+            "ticks": self.ticks,
+            "events": self.events,
+            "tick_latency": self.tick_latency.as_dict(),
+            "push_latency": self.push_latency.as_dict(),
+        }
+
+    def prepare(self, session_date) -> int:
+        """(Re)builds trigger levels for the session from the current panel generation."""
+        if not self.panel.open():
+            print("Live monitor: OHLCV panel not available.")
+            return 0
+        t0 = time.perf_counter()
+        n = self.index.build(self.panel, session_date)
+        print(f"Live monitor: {n} symbols indexed for {session_date} in {time.perf_counter() - t0:.2f}s")
+        return n
+
+    async def process(self, tick) -> list:
+        t0 = time.perf_counter()
+        self.ticks += 1
+        events = self.index.on_tick(tick)
+        self.tick_latency.add(time.perf_counter() - t0)
+        if events:
+            self.events += len(events)
+            await self.broadcast(json.dumps({"type": "breakout", "events": events}))
+            self.push_latency.add(time.perf_counter() - t0)
+        return events
+
+    async def run_session(self, source: TickSource, until_closed: bool = True):
+        """Consumes ticks until the source ends or (until_closed) the market leaves OPEN."""
+        next_check = time.monotonic() + self.STATE_CHECK_INTERVAL
+        try:
+            async for tick in source.ticks():
+                await self.process(tick)
+                if until_closed and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.STATE_CHECK_INTERVAL
+                    if self.resolver.resolve().state != MarketState.OPEN:
+                        break
+        finally:
+            await source.close()
+
+    async def run(self):
+        """Waits for OPEN, indexes the session once, then streams ticks; repeats every session."""
+        while True:
+            context = self.resolver.resolve()
+            if context.state != MarketState.OPEN:
+                await asyncio.sleep(self.STATE_CHECK_INTERVAL)
+                continue
+            if self.index.session_date != context.effective_trade_date:
+                await asyncio.to_thread(self.prepare, context.effective_trade_date)
+            try:
+                await self.run_session(self.source_factory())
+            except Exception as e:
+                print(f"Live monitor: tick source error: {e}")
+            print(f"Live monitor: {self.snapshot()}")
+            await asyncio.sleep(self.STATE_CHECK_INTERVAL)
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from src.analytics.config import BreakoutConfig
+from src.analytics.engine import VectorizedBreakoutEngine
+from src.historical.panel import OHLCVPanel
+from src.live.monitor import LiveBreakoutMonitor
+from src.live.triggers import Tick
+from src.market_state.clock import SimulatedClock
+from src.market_state.resolver import MarketStateResolver
+
+# Session timeline in seconds after midnight (IST), matching MarketStateResolver
+PRE_OPEN = 9 * 3600
+OPEN = 9 * 3600 + 15 * 60
+CLOSE = 15 * 3600 + 30 * 60
+DAY_DONE = 16 * 3600
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "count": len(arr),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+class MarketReplay:
+    """
+    Replays stored (or synthetic) daily bars as trading sessions through the
+    scan and notification path, on a SimulatedClock.
+
+    For each session day the bars before it become the panel; the day's bar
+    of every symbol is turned into an intraday tick path (open -> high/low ->
+    close, volume accumulating). Ticks feed the live monitor, and every
+    `scan_interval` simulated seconds the vectorized scan runs on history plus
+    the partial bar so far, pushing newly found breakouts.
+
+    speed: 1.0 real time, 10.0 ten times faster, 0 as fast as possible.
+
+    Reports throughput, scan latency percentiles (ms), the live tick path's
+    latency and signal-to-push latency (ms) for scan pushes: from the tick
+    that first crossed a level to the push that reported it.
+    """
+
+    def __init__(self, history: pd.DataFrame, speed: float = 0.0, scan_interval: int = 300,
+                 ticks_per_bar: int = 40, config: BreakoutConfig = None,
+                 broadcast: Optional[Callable[[str], Awaitable[None]]] = None,
+                 work_dir: Optional[Path] = None, seed: int = 0):
+        self.history = history.copy()
+        self.history['trade_date'] = pd.to_datetime(self.history['trade_date']).dt.date
+        self.speed = speed
+        self.scan_interval = scan_interval
+        self.ticks_per_bar = ticks_per_bar
+        self.config = config or BreakoutConfig()
+        self.engine = VectorizedBreakoutEngine(self.config)
+        self.broadcast = broadcast or self._sink
+        self.work_dir = work_dir
+        self.rng = np.random.default_rng(seed)
+        self.pushed_bytes = 0
+
+    async def _sink(self, message: str):
+        self.pushed_bytes += len(message)
+
+    def sessions(self, count: int) -> List[date]:
+        """The last `count` trading days in the history (each needs earlier bars)."""
+        days = sorted(self.history['trade_date'].unique())
+        return days[-count:] if len(days) > count else days[1:]
+
+    # ---------- Intraday path ----------
+
+    def _tick_path(self, bars: pd.DataFrame):
+        """
+        Intraday ticks for every symbol's daily bar: piecewise-linear path
+        open -> high -> low -> close (or via low first), volume spread evenly.
+        Returns arrays sorted by time: seconds, row, price, cumulative volume.
+        """
+        n, k = len(bars), self.ticks_per_bar
+        o, h, l, c = (bars[f].to_numpy(dtype=np.float64) for f in ('open', 'high', 'low', 'close'))
+        high_first = self.rng.random(n) < 0.5
+        anchors = np.stack([o, np.where(high_first, h, l), np.where(high_first, l, h), c], axis=1)
+        # Anchor positions along the path: 0, two random turns, 1
+        turns = np.sort(self.rng.uniform(0.05, 0.95, (n, 2)), axis=1)
+        xs = np.concatenate([np.zeros((n, 1)), turns, np.ones((n, 1))], axis=1)
+        grid = np.linspace(0, 1, k)
+        prices = np.empty((n, k))
+        for i in range(n):
+            prices[i] = np.interp(grid, xs[i], anchors[i])
+        volume = bars['volume'].to_numpy(dtype=np.float64)[:, None] * (np.arange(1, k + 1) / k)
+        # Ticks spread over the open session with a little jitter per symbol
+        seconds = OPEN + grid[None, :] * (CLOSE - OPEN - 1) + self.rng.uniform(0, 1, (n, k))
+        seconds = np.minimum(seconds, CLOSE - 1)
+        order = np.argsort(seconds, axis=None, kind='stable')
+        rows = np.repeat(np.arange(n), k)
+        return seconds.ravel()[order], rows[order], prices.ravel()[order], volume.ravel()[order]
+
+    # ---------- Session ----------
+
+    async def _pace(self, sim_seconds: float, sim_start: float, real_start: float):
+        if self.speed > 0:
+            delay = (sim_seconds - sim_start) / self.speed - (time.perf_counter() - real_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def run_session(self, day: date, work_dir: Path) -> dict:
+        hist = self.history[self.history['trade_date'] < day]
+        bars = self.history[self.history['trade_date'] == day].sort_values(['exchange', 'symbol']).reset_index(drop=True)
+        if hist.empty or bars.empty:
+            return {"session": day.isoformat(), "skipped": True}
+
+        midnight = datetime.combine(day, datetime.min.time())
+        clock = SimulatedClock(midnight + timedelta(seconds=PRE_OPEN - 300))
+        resolver = MarketStateResolver(clock=clock)
+
+        t0 = time.perf_counter()
+        panel = OHLCVPanel(work_dir / "panel")
+        panel.build(hist)
+        monitor = LiveBreakoutMonitor(self.broadcast, None, panel=panel, config=self.config, resolver=resolver)
+        monitor.prepare(day)
+        keys = list(zip(bars['symbol'], bars['exchange']))
+        packed = panel.packed(keys=keys, fields=('high', 'low', 'close', 'volume'))
+        # Scan rows follow the panel's key order; map session bars onto them
+        row_of = {(ex, sym): i for i, (ex, sym) in enumerate(zip(packed['exchange'], packed['symbol']))}
+        bar_rows = np.array([row_of.get((ex, sym), -1) for sym, ex in keys])
+        prepare_sec = time.perf_counter() - t0
+
+        seconds, tick_rows, prices, volumes = self._tick_path(bars)
+        rows = len(packed['count'])
+        partial = {f: np.full(rows, np.nan) for f in ('high', 'low', 'close', 'volume')}
+        first_cross: Dict[tuple, float] = {}
+        pushed = set()
+        scan_ms, signal_ms, states = [], [], []
+
+        meta = {
+            'exchange': packed['exchange'],
+            'symbol': packed['symbol'],
+            'trade_date': np.array([day] * rows, dtype=object),
+        }
+        count = packed['count'] + 1
+        history_cols = {f: packed[f] for f in partial}
+
+        async def scan():
+            s0 = time.perf_counter()
+            arrays = {f: np.concatenate([history_cols[f], partial[f][:, None]], axis=1) for f in partial}
+            found = self.engine.compute(arrays['high'], arrays['low'], arrays['close'], arrays['volume'], count, meta)
+            scan_ms.append((time.perf_counter() - s0) * 1000)
+            new = [rec for rec in found.to_dict(orient="records")
+                   if (rec['exchange'], rec['symbol'], rec['breakout_type']) not in pushed]
+            if not new:
+                return
+            for rec in new:
+                rec['trade_date'] = rec['trade_date'].isoformat()
+            await self.broadcast(json.dumps({"type": "scan", "breakouts": new}, default=str))
+            done = time.perf_counter()
+            for rec in new:
+                key = (rec['exchange'], rec['symbol'], rec['breakout_type'])
+                pushed.add(key)
+                signal_ms.append((done - first_cross.get(key, s0)) * 1000)
+
+        # Event timeline: state checkpoints, scans every interval while open (+ one after close), ticks
+        checkpoints = [PRE_OPEN - 300, PRE_OPEN, OPEN, CLOSE, DAY_DONE]
+        scan_times = list(range(OPEN + self.scan_interval, CLOSE, self.scan_interval)) + [CLOSE]
+        events = sorted(
+            [(t, 0, None) for t in checkpoints] + [(t, 1, None) for t in scan_times] +
+            [(float(t), 2, i) for i, t in enumerate(seconds)],
+            key=lambda e: (e[0], e[1])
+        )
+
+        real_start = time.perf_counter()
+        sim_start = events[0][0]
+        tick_count = 0
+        for sim_t, kind, i in events:
+            await self._pace(sim_t, sim_start, real_start)
+            clock.set(midnight + timedelta(seconds=float(sim_t)))
+            if kind == 0:
+                states.append((clock.now().strftime("%H:%M"), resolver.resolve().state.value))
+            elif kind == 1:
+                await scan()
+            else:
+                r = bar_rows[tick_rows[i]]
+                if r < 0:
+                    continue
+                price, vol = prices[i], volumes[i]
+                partial['high'][r] = price if np.isnan(partial['high'][r]) else max(partial['high'][r], price)
+                partial['low'][r] = price if np.isnan(partial['low'][r]) else min(partial['low'][r], price)
+                partial['close'][r] = price
+                partial['volume'][r] = vol
+                tick_real = time.perf_counter()
+                crossed = await monitor.process(Tick(packed['exchange'][r], packed['symbol'][r], float(price), float(vol), float(sim_t)))
+                for event in crossed:
+                    first_cross.setdefault((event['exchange'], event['symbol'], event['breakout_type']), tick_real)
+                tick_count += 1
+        elapsed = time.perf_counter() - real_start
+
+        live = monitor.snapshot()
+        return {
+            "session": day.isoformat(),
+            "symbols": len(bars),
+            "prepare_sec": round(prepare_sec, 3),
+            "replay_sec": round(elapsed, 3),
+            "ticks": tick_count,
+            "ticks_per_sec": round(tick_count / elapsed, 1) if elapsed > 0 else None,
+            "states": states,
+            "scan_ms": percentiles(scan_ms),
+            "live_events": live["events"],
+            "tick_latency_us": live["tick_latency"],
+            "tick_push_latency_us": live["push_latency"],
+            "scan_signals": len(pushed),
+            "signal_to_push_ms": percentiles(signal_ms),
+            "_scan_ms": scan_ms,
+            "_signal_ms": signal_ms,
+        }
+
+    async def run(self, sessions: List[date]) -> dict:
+        reports = []
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as tmp:
+            for day in sessions:
+                report = await self.run_session(day, Path(tmp) / day.isoformat())
+                reports.append(report)
+        done = [r for r in reports if not r.get("skipped")]
+        ticks = sum(r["ticks"] for r in done)
+        replay_sec = sum(r["replay_sec"] for r in done)
+        summary = {
+            "sessions": len(done),
+            "ticks": ticks,
+            "ticks_per_sec": round(ticks / replay_sec, 1) if replay_sec > 0 else None,
+            "scan_ms": percentiles([v for r in done for v in r["_scan_ms"]]),
+            "signal_to_push_ms": percentiles([v for r in done for v in r["_signal_ms"]]),
+            "pushed_bytes": self.pushed_bytes,
+        }
+        for r in done:
+            del r["_scan_ms"], r["_signal_ms"]
+        return {"summary": summary, "sessions": reports}
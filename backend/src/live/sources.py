@@ -0,0 +1,105 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import time
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from src.live.triggers import Tick
+
+
+def parse_tick(line: str) -> Optional[Tick]:
+    """
+    One tick per line, either JSON ({"exchange", "symbol", "price", "volume", "ts"})
+    or CSV (ts,exchange,symbol,price,volume). Blank lines, comments and
+    CSV headers are skipped.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        rec = json.loads(line)
+        return Tick(rec['exchange'], rec['symbol'], float(rec['price']),
+                    float(rec.get('volume', 0)), float(rec.get('ts', time.time())))
+    parts = line.split(",")
+    if len(parts) < 5 or parts[0] == "ts":
+        return None
+    return Tick(parts[1], parts[2], float(parts[3]), float(parts[4]), float(parts[0]))
+
+
+class TickSource(ABC):
+    """Pluggable price feed: anything that yields Ticks asynchronously."""
+
+    @abstractmethod
+    def ticks(self) -> AsyncIterator[Tick]:
+        """Async iterator of ticks (implemented as an async generator)."""
+
+    async def close(self):
+        pass
+
+
+class FileReplaySource(TickSource):
+    """
+    Replays a recorded tick file (CSV or NDJSON, see parse_tick).
+    speed: 1.0 keeps the recorded gaps between ticks, 10.0 plays ten times
+    faster, 0 replays as fast as possible.
+    """
+
+    def __init__(self, path: Path, speed: float = 0.0):
+        self.path = Path(path)
+        self.speed = speed
+
+    async def ticks(self) -> AsyncIterator[Tick]:
+        first_ts = started = None
+        with open(self.path) as f:
+            for line in f:
+                tick = parse_tick(line)
+                if tick is None:
+                    continue
+                if self.speed > 0:
+                    if first_ts is None:
+                        first_ts, started = tick.ts, time.monotonic()
+                    delay = (tick.ts - first_ts) / self.speed - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                yield tick
+
+
+class SocketTickSource(TickSource):
+    """Line-delimited ticks from a TCP feed (e.g. scripts/replay_ticks.py serving a recorded file)."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._writer = None
+
+    async def ticks(self) -> AsyncIterator[Tick]:
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                tick = parse_tick(line.decode())
+                if tick is not None:
+                    yield tick
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def source_from_spec(spec: str) -> Optional[TickSource]:
+    """'file:<path>[@speed]' or 'tcp:<host>:<port>' (see LIVE_TICK_SOURCE)."""
+    if not spec:
+        return None
+    kind, _, target = spec.partition(":")
+    if kind == "file":
+        path, _, speed = target.partition("@")
+        return FileReplaySource(Path(path), float(speed) if speed else 1.0)
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        return SocketTickSource(host, int(port))
+    raise ValueError(f"Unknown tick source: {spec}")
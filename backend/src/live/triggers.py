@@ -0,0 +1,148 @@
+import bisect
+import numpy as np
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from src.analytics.config import BreakoutConfig
+from src.analytics.windows import MultiWindowKernel
+
+
+@dataclass
+class Tick:
+    exchange: str
+    symbol: str
+    price: float
+    volume: float # Cumulative session volume
+    ts: float # Exchange timestamp (epoch seconds)
+
+
+class SymbolTriggers:
+    """
+    One symbol's trigger levels for the session.
+
+    up_levels ascending (window highs: a price above crosses), down_levels
+    descending (window lows: a price below crosses). The crossed counts
+    only grow, so each level fires at most once per session.
+    """
+    __slots__ = ('exchange', 'symbol', 'up_levels', 'up_names', 'down_levels', 'down_names',
+                 'volume_threshold', 'up_crossed', 'down_crossed')
+
+    def __init__(self, exchange: str, symbol: str, up: List[Tuple[float, str]], down: List[Tuple[float, str]],
+                 volume_threshold: Dict[str, float]):
+        self.exchange = exchange
+        self.symbol = symbol
+        up = sorted(up)
+        down = sorted(down, reverse=True)
+        self.up_levels = [level for level, _ in up]
+        self.up_names = [name for _, name in up]
+        # Negated so bisect works on an ascending list
+        self.down_levels = [-level for level, _ in down]
+        self.down_names = [name for _, name in down]
+        self.volume_threshold = volume_threshold
+        self.up_crossed = 0
+        self.down_crossed = 0
+
+
+class TriggerIndex:
+    """
+    Per-session breakout trigger levels for the whole universe.
+
+    Built once from the OHLCV panel: for every symbol and lookback, the
+    window high/low over the stored bars before the session and the volume
+    needed for confirmation. A tick then only needs two binary searches
+    in its symbol's sorted levels; nothing is recomputed per tick.
+    """
+
+    def __init__(self, config: BreakoutConfig = None):
+        self.config = config or BreakoutConfig()
+        self.kernel = MultiWindowKernel(self.config.LOOKBACKS, self.config.ALL_TIME_VOL_WINDOW)
+        self.session_date: Optional[date] = None
+        self._symbols: Dict[Tuple[str, str], SymbolTriggers] = {}
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def get(self, symbol: str, exchange: str) -> Optional[SymbolTriggers]:
+        return self._symbols.get((exchange, symbol))
+
+    def build(self, panel, session_date: date, keys=None) -> int:
+        """
+        Computes levels for `session_date` from the panel. Bars on or after the
+        session date (e.g. a partial bar from an earlier intraday refresh) are
+        left out of the windows. Returns the number of symbols indexed.
+        """
+        packed = panel.packed(keys=keys, fields=('high', 'low', 'volume'))
+        self._symbols = {}
+        self.session_date = session_date
+        if not packed or len(packed['count']) == 0:
+            return 0
+
+        count = packed['count']
+        last_day = panel.days[np.maximum(packed['last_col'], 0)]
+        has_session_bar = (count > 0) & (last_day >= np.datetime64(session_date, 'D'))
+
+        # Put a placeholder "live" bar in the last column: rows that already hold a
+        # session bar use it as the placeholder, the others get an extra NaN column.
+        rows, width = count.shape[0], packed['high'].shape[1]
+        arrays = {}
+        for field in ('high', 'low', 'volume'):
+            arr = np.full((rows, width + 1), np.nan)
+            arr[~has_session_bar, :width] = packed[field][~has_session_bar]
+            arr[has_session_bar, 1:] = packed[field][has_session_bar]
+            arrays[field] = arr
+        live_count = np.where(has_session_bar, count, count + 1)
+
+        windows = self.kernel.last(arrays['high'], arrays['low'], arrays['volume'], live_count)
+        for i in range(rows):
+            up, down, thresholds = [], [], {}
+            for name, stats in windows.items():
+                if not stats.complete[i] or np.isnan(stats.high[i]) or np.isnan(stats.low[i]):
+                    continue
+                up.append((float(stats.high[i]), name))
+                down.append((float(stats.low[i]), name))
+                avg = stats.vol_avg[i]
+                thresholds[name] = float(avg * self.config.VOLUME_MULT) if avg > 0 else float('nan')
+            if up:
+                key = (packed['exchange'][i], packed['symbol'][i])
+                self._symbols[key] = SymbolTriggers(key[0], key[1], up, down, thresholds)
+        return len(self._symbols)
+
+    def on_tick(self, tick: Tick) -> List[dict]:
+        """Levels newly crossed by this tick (breakouts above window highs, breakdowns below window lows)."""
+        triggers = self._symbols.get((tick.exchange, tick.symbol))
+        if triggers is None:
+            return []
+        events = []
+        price = tick.price
+
+        # Levels strictly below the price have been broken out of
+        crossed = bisect.bisect_left(triggers.up_levels, price)
+        if crossed > triggers.up_crossed:
+            for i in range(triggers.up_crossed, crossed):
+                events.append(self._event(triggers, tick, triggers.up_names[i], triggers.up_levels[i], "BREAKOUT"))
+            triggers.up_crossed = crossed
+
+        # Levels strictly above the price have been broken down through
+        crossed = bisect.bisect_left(triggers.down_levels, -price)
+        if crossed > triggers.down_crossed:
+            for i in range(triggers.down_crossed, crossed):
+                events.append(self._event(triggers, tick, triggers.down_names[i], -triggers.down_levels[i], "BREAKDOWN"))
+            triggers.down_crossed = crossed
+        return events
+
+    def _event(self, triggers: SymbolTriggers, tick: Tick, name: str, level: float, direction: str) -> dict:
+        threshold = triggers.volume_threshold.get(name, float('nan'))
+        return {
+            "exchange": triggers.exchange,
+            "symbol": triggers.symbol,
+            "trade_date": self.session_date.isoformat() if self.session_date else None,
+            "breakout_type": name,
+            "direction": direction,
+            "breakout_level": round(level, 2),
+            "price": round(tick.price, 2),
+            "breakout_pct": round((tick.price - level) / level * 100, 2),
+            "volume": int(tick.volume),
+            "volume_threshold": None if threshold != threshold else int(threshold),
+            "volume_confirmation": bool(threshold == threshold and tick.volume > threshold),
+            "tick_ts": tick.ts,
+        }
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
 class MarketClock:
@@ -13,3 +13,30 @@ class MarketClock:
         """Returns (hour, minute) of current time in market timezone."""
         now = cls.now()
         return now.hour, now.minute
+
+
+class SimulatedClock:
+    """
+    Stand-in for MarketClock in replays: time only moves when set()/advance()
+    is called. Pass it to MarketStateResolver(clock=...).
+    """
+    TIMEZONE = MarketClock.TIMEZONE
+
+    def __init__(self, start: datetime):
+        self._now = self._localize(start)
+
+    @classmethod
+    def _localize(cls, value: datetime) -> datetime:
+        return cls.TIMEZONE.localize(value) if value.tzinfo is None else value.astimezone(cls.TIMEZONE)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def get_time_tuple(self):
+        return self._now.hour, self._now.minute
+
+    def set(self, value: datetime):
+        self._now = self._localize(value)
+
+    def advance(self, seconds: float):
+        self._now = self._now + timedelta(seconds=seconds)
@@ -1,9 +1,10 @@
 import pandas as pd
-from src.market_state.resolver import MarketContext
+from typing import Optional
+from src.market_state.resolver import MarketContext, get_market_resolver
 
 class DataIntegrityService:
     @staticmethod
-    def validate_breakouts(df: pd.DataFrame, context: MarketContext) -> pd.DataFrame:
+    def validate_breakouts(df: pd.DataFrame, context: Optional[MarketContext] = None) -> pd.DataFrame:
         """
         Enforces data integrity on the breakout dataframe.
         1. Tags market state and run timestamp.
@@ -11,6 +12,7 @@ class DataIntegrityService:
         """
         if df.empty:
             return df
+        context = context or get_market_resolver().resolve()
             
         # Add Context Tags
         df['market_state'] = context.state.value
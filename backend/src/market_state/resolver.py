@@ -1,5 +1,8 @@
+import bisect
+import threading
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
 from src.market_state.enums import MarketState
 from src.market_state.clock import MarketClock
 from src.market_state.calendar import ExchangeCalendarService
@@ -16,91 +19,133 @@ class MarketContext:
         return self.state == MarketState.OPEN
 
 
+@dataclass(frozen=True)
+class StateSegment:
+    start: datetime # Inclusive
+    end: datetime # Exclusive
+    state: MarketState
+    effective_trade_date: date
+    description: str
+
+
+class DayTimeline:
+    """One calendar day split into market-state segments (covers midnight to midnight)."""
+
+    def __init__(self, day: date, segments: List[StateSegment], is_trading_day: bool, is_weekend: bool):
+        self.day = day
+        self.segments = segments
+        self.starts = [seg.start for seg in segments]
+        self.is_trading_day = is_trading_day
+        self.is_weekend = is_weekend
+
+    def at(self, now: datetime) -> StateSegment:
+        i = bisect.bisect_right(self.starts, now) - 1
+        return self.segments[max(0, min(i, len(self.segments) - 1))]
+
+
 class MarketStateResolver:
-    def __init__(self):
-        self.clock = MarketClock
+    """
+    Market state for the clock's current time.
+
+    Each day's full timeline (segment boundaries, state, effective trade
+    date, weekend/holiday) is computed once from the session index and
+    cached; resolve() is then a binary search over that day's boundaries.
+    Safe to share between threads; get_market_resolver() returns the
+    process-wide instance on the real clock.
+    """
+    # Trading-day boundaries (IST)
+    PRE_OPEN = time(9, 0)
+    OPEN = time(9, 15)
+    CLOSE = time(15, 30)
+    DAY_DONE = time(16, 0)
+    CACHED_DAYS = 8
+
+    def __init__(self, clock=None):
+        # Anything with now() -> tz-aware datetime; SimulatedClock for replays
+        self.clock = clock or MarketClock
         self.calendar = ExchangeCalendarService()
-        
-    def resolve(self) -> MarketContext:
-        now = self.clock.now()
-        today = now.date()
-        current_time = (now.hour, now.minute)
-        
-        # 1. Check Weekend
-        if self.calendar.is_weekend(today):
-            last_date = self.calendar.get_last_session_date(today)
-            return MarketContext(
-                state=MarketState.WEEKEND,
-                effective_trade_date=last_date,
-                run_timestamp=now,
-                description=f"Weekend. Using last session: {last_date}"
-            )
-            
-        # 2. Check Holiday (if not weekend)
-        if not self.calendar.is_trading_day(today):
-            last_date = self.calendar.get_last_session_date(today)
-            return MarketContext(
-                state=MarketState.HOLIDAY,
-                effective_trade_date=last_date,
-                run_timestamp=now,
-                description=f"Exchange Holiday. Using last session: {last_date}"
-            )
-            
-        # 3. It is a Trading Day. Check Time.
+        self._timelines: Dict[date, DayTimeline] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _at(day: date, t: time) -> datetime:
+        return MarketClock.TIMEZONE.localize(datetime.combine(day, t))
+
+    def _build(self, day: date) -> DayTimeline:
+        midnight = self._at(day, time.min)
+        next_midnight = self._at(day + timedelta(days=1), time.min)
+
+        # 1. Weekend
+        if self.calendar.is_weekend(day):
+            last_date = self.calendar.get_last_session_date(day)
+            segment = StateSegment(midnight, next_midnight, MarketState.WEEKEND, last_date,
+                                   f"Weekend. Using last session: {last_date}")
+            return DayTimeline(day, [segment], False, True)
+
+        # 2. Holiday (if not weekend)
+        if not self.calendar.is_trading_day(day):
+            last_date = self.calendar.get_last_session_date(day)
+            segment = StateSegment(midnight, next_midnight, MarketState.HOLIDAY, last_date,
+                                   f"Exchange Holiday. Using last session: {last_date}")
+            return DayTimeline(day, [segment], False, False)
+
+        # 3. Trading day
+        # < 09:00       : Closed (Pre-Market), previous session's data
         # 09:00 - 09:15 : Pre-Open
         # 09:15 - 15:30 : Open
-        # 15:30 - 16:00 : Post-Close
-        # > 16:00       : Closed (Day Done)
-        # < 09:00       : Closed (Pre-Market)
-        
-        hh, mm = current_time
-        time_val = hh * 100 + mm
-        
-        if time_val < 900:
-            # Before Market (Morning of trading day) -> Use PREVIOUS day data
-            # effectively, market hasn't opened, so we look at yesterday's close.
-            # But wait, if we are running morning scan, we probably want yesterday's data.
-            # get_last_session_date(today) returns today because it IS in schedule.
-            # So we must manually subtract one day and find last session.
-            prev_day = today - timedelta(days=1)
-            last_date = self.calendar.get_last_session_date(prev_day)
-            return MarketContext(
-                state=MarketState.CLOSED,
-                effective_trade_date=last_date,
-                run_timestamp=now,
-                description=f"Pre-Market Morning. Using last session: {last_date}"
-            )
-            
-        elif 900 <= time_val < 915:
-            return MarketContext(
-                state=MarketState.PRE_OPEN,
-                effective_trade_date=today, # Pre-open quotes coming in
-                run_timestamp=now,
-                description="Pre-Open Session"
-            )
-            
-        elif 915 <= time_val < 1530:
-            return MarketContext(
-                state=MarketState.OPEN,
-                effective_trade_date=today,
-                run_timestamp=now,
-                description="Market Open (Live)"
-            )
-            
-        elif 1530 <= time_val < 1600:
-            # Post Close session, data is finalizing. Treat as Today.
-            return MarketContext(
-                state=MarketState.POST_CLOSE,
-                effective_trade_date=today,
-                run_timestamp=now,
-                description="Post-Close Session"
-            )
-            
-        else: # >= 1600
-            # Market Closed for the day. Data is final.
-            return MarketContext(
-                state=MarketState.CLOSED,
-                effective_trade_date=today,
-                run_timestamp=now,
-                description="Market Closed (EOD)"
-            )
+        # 15:30 - 16:00 : Post-Close (data finalizing, treated as today)
+        # >= 16:00      : Closed (Day Done), data is final
+        previous = self.calendar.get_last_session_date(day, inclusive=False)
+        bounds = [midnight] + [self._at(day, t) for t in (self.PRE_OPEN, self.OPEN, self.CLOSE, self.DAY_DONE)] + [next_midnight]
+        specs = [
+            (MarketState.CLOSED, previous, f"Pre-Market Morning. Using last session: {previous}"),
+            (MarketState.PRE_OPEN, day, "Pre-Open Session"),
+            (MarketState.OPEN, day, "Market Open (Live)"),
+            (MarketState.POST_CLOSE, day, "Post-Close Session"),
+            (MarketState.CLOSED, day, "Market Closed (EOD)"),
+        ]
+        segments = [StateSegment(bounds[i], bounds[i + 1], *spec) for i, spec in enumerate(specs)]
+        return DayTimeline(day, segments, True, False)
+
+    def timeline(self, day: date) -> DayTimeline:
+        """The (cached) state timeline of `day` in the market timezone."""
+        with self._lock:
+            cached = self._timelines.get(day)
+            if cached is not None:
+                return cached
+            timeline = self._build(day)
+            self._timelines[day] = timeline
+            while len(self._timelines) > self.CACHED_DAYS:
+                self._timelines.pop(min(self._timelines))
+            return timeline
+
+    def segment(self, now: Optional[datetime] = None) -> StateSegment:
+        now = now or self.clock.now()
+        return self.timeline(now.astimezone(MarketClock.TIMEZONE).date()).at(now)
+
+    def resolve(self) -> MarketContext:
+        now = self.clock.now()
+        segment = self.segment(now)
+        return MarketContext(
+            state=segment.state,
+            effective_trade_date=segment.effective_trade_date,
+            run_timestamp=now,
+            description=segment.description
+        )
+
+    def next_change(self, now: Optional[datetime] = None) -> datetime:
+        """When the current segment ends (may be midnight with the same state on the next day)."""
+        return self.segment(now).end
+
+
+_shared: Optional[MarketStateResolver] = None
+_shared_lock = threading.Lock()
+
+
+def get_market_resolver() -> MarketStateResolver:
+    """Process-wide resolver on the real market clock (API, scheduler, live monitor)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MarketStateResolver()
+        return _shared
@@ -0,0 +1,131 @@
+import os
+import threading
+import numpy as np
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+from config.settings import DATA_DIR, SESSION_INDEX_CALENDAR, SESSION_INDEX_YEARS_BACK, SESSION_INDEX_DAYS_AHEAD
+
+
+class SessionIndex:
+    """
+    Sorted array of exchange session dates answering calendar questions by
+    binary search instead of pandas_market_calendars schedule() calls.
+    """
+
+    def __init__(self, sessions: np.ndarray, start: date, end: date, built_on: date, calendar_name: str):
+        self.sessions = np.asarray(sessions, dtype='datetime64[D]')
+        self.start = start
+        self.end = end
+        self.built_on = built_on
+        self.calendar_name = calendar_name
+
+    # ---------- Build / persist ----------
+
+    @classmethod
+    def build(cls, start: date, end: date, calendar_name: str = SESSION_INDEX_CALENDAR) -> "SessionIndex":
+        import pandas_market_calendars as mcal # Only needed when (re)building
+        try:
+            cal = mcal.get_calendar(calendar_name)
+        except Exception:
+            # Fallback or generic if XBOM specific not found (should exist)
+            print(f"Warning: {calendar_name} calendar not found, falling back to NYSE.")
+            calendar_name = 'NYSE'
+            cal = mcal.get_calendar(calendar_name)
+        days = cal.valid_days(start_date=start, end_date=end)
+        sessions = np.array([d.date() for d in days], dtype='datetime64[D]')
+        return cls(sessions, start, end, date.today(), calendar_name)
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            temp_path,
+            sessions=self.sessions,
+            bounds=np.array([self.start, self.end, self.built_on], dtype='datetime64[D]'),
+            calendar=np.array(self.calendar_name),
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["SessionIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                start, end, built_on = (d.item() for d in data['bounds'])
+                return cls(data['sessions'], start, end, built_on, str(data['calendar']))
+        except Exception:
+            return None
+
+    # ---------- Queries ----------
+
+    def covers(self, d: date) -> bool:
+        return self.start <= d <= self.end
+
+    def _pos(self, d: date, side: str) -> int:
+        return int(np.searchsorted(self.sessions, np.datetime64(d, 'D'), side=side))
+
+    def is_trading_day(self, d: date) -> bool:
+        i = self._pos(d, 'left')
+        return i < len(self.sessions) and self.sessions[i] == np.datetime64(d, 'D')
+
+    def previous_session(self, d: date, inclusive: bool = True) -> Optional[date]:
+        """Last session on or before d (strictly before when inclusive=False)."""
+        i = self._pos(d, 'right' if inclusive else 'left') - 1
+        return self.sessions[i].item() if i >= 0 else None
+
+    def next_session(self, d: date, inclusive: bool = True) -> Optional[date]:
+        i = self._pos(d, 'left' if inclusive else 'right')
+        return self.sessions[i].item() if i < len(self.sessions) else None
+
+    def sessions_back(self, d: date, n: int) -> Optional[date]:
+        """The session n sessions before d (n=0 is previous_session(d))."""
+        i = self._pos(d, 'right') - 1 - n
+        return self.sessions[i].item() if i >= 0 else None
+
+    def sessions_between(self, start: date, end: date) -> np.ndarray:
+        """Sessions in [start, end] as datetime64[D]."""
+        return self.sessions[self._pos(start, 'left'):self._pos(end, 'right')]
+
+    def count_between(self, start: date, end: date) -> int:
+        return max(0, self._pos(end, 'right') - self._pos(start, 'left'))
+
+
+_index: Optional[SessionIndex] = None
+_lock = threading.Lock()
+
+
+def _cache_path(calendar_name: str) -> Path:
+    return DATA_DIR / "cache" / f"sessions_{calendar_name}.npz"
+
+
+def get_session_index(covering: Optional[date] = None) -> SessionIndex:
+    """
+    Process-wide session index. Loaded from the disk cache when it was built
+    today, otherwise rebuilt once (per process per day) and cached again.
+    Pass `covering` for dates that might fall outside the usual horizon.
+    """
+    global _index
+    today = date.today()
+    with _lock:
+        if _index is not None and _index.built_on == today and (covering is None or _index.covers(covering)):
+            return _index
+
+        start = today - timedelta(days=365 * SESSION_INDEX_YEARS_BACK)
+        end = today + timedelta(days=SESSION_INDEX_DAYS_AHEAD)
+        if covering is not None:
+            start, end = min(start, covering), max(end, covering)
+
+        path = _cache_path(SESSION_INDEX_CALENDAR)
+        cached = SessionIndex.load(path)
+        if cached is not None and cached.built_on == today and cached.covers(start) and cached.covers(end):
+            _index = cached
+            return _index
+
+        _index = SessionIndex.build(start, end)
+        try:
+            _index.save(path)
+        except Exception as e:
+            print(f"Warning: could not cache session index: {e}")
+        return _index
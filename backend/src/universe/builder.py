@@ -164,6 +164,7 @@ def build_universe() -> bool:
     # Save
     output_path = PROCESSED_DIR / "universe.parquet"
     try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         universe_df.to_parquet(output_path, index=False)
         print(f"Universe saved to {output_path}")
         print(f"Total Stocks: {len(universe_df)}")
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+
+class JobCancelled(BaseException):
+    """
+    Raised at a progress checkpoint once the running job was asked to stop.
+    A BaseException (like asyncio.CancelledError) so the per-symbol
+    `except Exception` handlers in the services do not swallow it.
+    """
+
+
+# Progress sink of the job running in this thread/task (see src.api.jobs.Job), if any
+_reporter: ContextVar = ContextVar("progress_reporter", default=None)
+
+
+@contextmanager
+def reporting(reporter):
+    """Routes Progress updates in this context to `reporter` (begin/advance/cancelled)."""
+    token = _reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _reporter.reset(token)
+
+
+def cancelled() -> bool:
+    """True once the current job was asked to stop; always False outside jobs."""
+    reporter = _reporter.get()
+    return reporter is not None and reporter.cancelled
+
+
+def checkpoint():
+    """Raises JobCancelled if the current job was cancelled; no-op outside jobs."""
+    if cancelled():
+        raise JobCancelled()
+
+
+class Progress:
+    """
+    A tqdm bar that also feeds the current job's progress and is its
+    cancellation point: update() raises JobCancelled once the job is
+    cancelled, after cancelling `pending` futures that have not started.
+    """
+
+    def __init__(self, total: Optional[int] = None, desc: Optional[str] = None, pending=None, disable: bool = False):
+        from tqdm import tqdm
+        self.bar = tqdm(total=total, desc=desc, disable=disable)
+        self.pending = pending
+        self.reporter = _reporter.get()
+        if self.reporter is not None:
+            self.reporter.begin(desc, total)
+            self._check()
+
+    def _check(self):
+        if self.reporter.cancelled:
+            for future in self.pending or ():
+                future.cancel()
+            raise JobCancelled()
+
+    def update(self, n: int = 1, check: bool = True):
+        """check=False only reports (for callers that wind down on cancelled() themselves)."""
+        self.bar.update(n)
+        if self.reporter is not None:
+            self.reporter.advance(n)
+            if check:
+                self._check()
+
+    def close(self):
+        self.bar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def track(iterable: Iterable, total: Optional[int] = None, desc: Optional[str] = None, pending=None) -> Iterator:
+    """tqdm(iterable) replacement reporting to the current job (see Progress)."""
+    with Progress(total=total, desc=desc, pending=pending) as progress:
+        for item in iterable:
+            yield item
+            progress.update(1)
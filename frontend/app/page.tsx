@@ -1,7 +1,7 @@
 "use client";
 
-import { useEffect, useState } from "react";
-import { getBreakouts, getSystemStatus, dismissBreakout, type Breakout, type SystemStatus } from "@/lib/api";
+import { useEffect, useRef, useState } from "react";
+import { getBreakouts, getSystemStatus, dismissBreakout, getDismissedList, applyScanDiff, type Breakout, type ScanDiff, type SystemStatus } from "@/lib/api";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { ArrowUpRight, Activity, Clock, Layers, EyeOff } from "lucide-react";
@@ -16,10 +16,14 @@ export default function Dashboard() {
   const [selectedExchange, setSelectedExchange] = useState<string>("NSE");
   const [searchQuery, setSearchQuery] = useState("");
   const [directionFilter, setDirectionFilter] = useState<'ALL' | 'BULL' | 'BEAR'>('ALL');
+  // Last scan diff applied, so a reconnect can ask for what it missed
+  const scanVersion = useRef<{ epoch: string; version: number } | null>(null);
+  const dismissed = useRef<Set<string>>(new Set());
 
   const handleDismiss = async (symbol: string, exchange: string) => {
     try {
       await dismissBreakout(symbol, exchange);
+      dismissed.current.add(`${exchange}:${symbol}`);
       setBreakouts(prev => prev.filter(b => !(b.symbol === symbol && b.exchange === exchange)));
     } catch (e) {
       console.error("Dismiss failed", e);
@@ -32,10 +36,12 @@ export default function Dashboard() {
       if (!status) setLoading(true);
 
       try {
-        const [boData, sysData] = await Promise.all([
+        const [boData, sysData, dismissedList] = await Promise.all([
           getBreakouts(selectedExchange),
           getSystemStatus(),
+          getDismissedList(),
         ]);
+        dismissed.current = new Set(dismissedList);
         setBreakouts(boData);
         setStatus(sysData);
       } catch (error) {
@@ -58,12 +64,39 @@ export default function Dashboard() {
 
       ws.onopen = () => {
         console.log("Connected to Real-Time Feed");
+        // Catch up on diffs missed while disconnected
+        if (scanVersion.current) {
+          ws?.send(JSON.stringify({ type: 'since', ...scanVersion.current }));
+        }
+      };
+
+      const applyDiffs = (diffs: ScanDiff[]) => {
+        if (diffs.length === 0) return;
+        setBreakouts(prev => diffs.reduce(
+          (rows, diff) => applyScanDiff(rows, diff, selectedExchange, dismissed.current), prev));
       };
 
       ws.onmessage = (event) => {
         try {
           const msg = JSON.parse(event.data);
-          if (msg.type === 'update') {
+          if (msg.type === 'hello') {
+            if (!scanVersion.current) scanVersion.current = { epoch: msg.epoch, version: msg.version };
+          } else if (msg.type === 'diff') {
+            const last = scanVersion.current;
+            if (last && last.epoch === msg.epoch && msg.version === last.version + 1) {
+              applyDiffs([msg]);
+            } else {
+              // Gap or server restart: the local list can no longer be patched
+              fetchData();
+            }
+            scanVersion.current = { epoch: msg.epoch, version: msg.version };
+          } else if (msg.type === 'diffs') {
+            applyDiffs(msg.diffs);
+            scanVersion.current = { epoch: msg.epoch, version: msg.version };
+          } else if (msg.type === 'reset') {
+            scanVersion.current = { epoch: msg.epoch, version: msg.version };
+            fetchData();
+          } else if (msg.type === 'update') {
             // Re-fetch data on update signal
             fetchData();
           }
@@ -45,6 +45,7 @@ export interface SystemStatus {
     market_state: string;
     trade_date: string;
     is_market_open: boolean;
+    next_state_change?: string;
 }
 
 export async function getSystemStatus(): Promise<SystemStatus> {
@@ -53,6 +54,53 @@ export async function getSystemStatus(): Promise<SystemStatus> {
     return res.json();
 }
 
+export type JobKind = "universe" | "history" | "scan" | "refresh";
+
+export interface Job {
+    id: string;
+    kind: JobKind;
+    phases: string[];
+    params: Record<string, string | boolean>;
+    source: string;
+    status: "queued" | "running" | "succeeded" | "failed" | "cancelled";
+    phase: string | null;
+    cancel_requested: boolean;
+    created_at: string;
+    started_at: string | null;
+    finished_at: string | null;
+    progress: { step: string | null; done: number; total: number | null; per_sec: number | null; eta_sec: number | null };
+    result: Record<string, unknown>;
+    error: string | null;
+}
+
+export async function startJob(kind: JobKind, params: { ingest?: string; engine?: string; full?: boolean } = {}): Promise<Job> {
+    const res = await fetch(`${API_BASE_URL}/jobs`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ kind, ...params }),
+    });
+    if (!res.ok) throw new Error(`Failed to start ${kind} job`);
+    return res.json();
+}
+
+export async function getJob(id: string): Promise<Job> {
+    const res = await fetch(`${API_BASE_URL}/jobs/${id}`, { cache: "no-store" });
+    if (!res.ok) throw new Error("Failed to fetch job");
+    return res.json();
+}
+
+export async function getJobs(): Promise<Job[]> {
+    const res = await fetch(`${API_BASE_URL}/jobs`, { cache: "no-store" });
+    if (!res.ok) throw new Error("Failed to fetch jobs");
+    return res.json();
+}
+
+export async function cancelJob(id: string): Promise<Job> {
+    const res = await fetch(`${API_BASE_URL}/jobs/${id}/cancel`, { method: 'POST' });
+    if (!res.ok) throw new Error("Failed to cancel job");
+    return res.json();
+}
+
 export async function getBreakouts(exchange?: string): Promise<Breakout[]> {
     const params = new URLSearchParams();
     if (exchange) params.append("exchange", exchange);
@@ -61,3 +109,37 @@ export async function getBreakouts(exchange?: string): Promise<Breakout[]> {
     if (!res.ok) throw new Error("Failed to fetch breakouts");
     return res.json();
 }
+
+export interface BreakoutKey {
+    exchange: string;
+    symbol: string;
+    breakout_type: string;
+}
+
+export interface ScanDiff {
+    version: number;
+    added: Breakout[];
+    removed: BreakoutKey[];
+    changed: (Breakout & { fields: string[] })[];
+}
+
+const breakoutKey = (b: BreakoutKey) => `${b.exchange}:${b.symbol}:${b.breakout_type}`;
+
+// Applies a scan diff to the list shown for one exchange (volume-confirmed, not dismissed, like getBreakouts)
+export function applyScanDiff(current: Breakout[], diff: ScanDiff, exchange: string, dismissed: Set<string>): Breakout[] {
+    const rows = new Map(current.map(b => [breakoutKey(b), b]));
+    for (const key of diff.removed) rows.delete(breakoutKey(key));
+    for (const rec of [...diff.added, ...diff.changed]) {
+        const key = breakoutKey(rec);
+        const visible = rec.exchange === exchange && rec.volume_confirmation === true
+            && !dismissed.has(`${rec.exchange}:${rec.symbol}`);
+        if (!visible) {
+            rows.delete(key);
+            continue;
+        }
+        const { fields, ...row } = rec as Breakout & { fields?: string[] };
+        // Changed rows carry no detected_at; keep the one from when the row was added
+        rows.set(key, { ...rows.get(key), ...row });
+    }
+    return Array.from(rows.values());
+}